@@ -1,5 +1,23 @@
 from __future__ import annotations
 
-from .metrics import NDCG, AccuracyMetric
+from .metrics import (
+    MAP,
+    MRR,
+    NDCG,
+    AccuracyMetric,
+    HitRate,
+    Precision,
+    RankingMetrics,
+    Recall,
+)
 
-__all__ = ["NDCG", "AccuracyMetric"]
+__all__ = [
+    "NDCG",
+    "Precision",
+    "Recall",
+    "MAP",
+    "MRR",
+    "HitRate",
+    "RankingMetrics",
+    "AccuracyMetric",
+]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.accuracy.utils import aligned_inputs, calculable_ats, relevance_matrix
+from recsyslearn.dataset.containers import RecommendationLists, RelevanceIndex
+from recsyslearn.dataset.utils import top_k_lists
+from recsyslearn.utils import Accumulator
+
+
+class RankingAccumulator(Accumulator):
+
+    """
+    Running per-user values of ranking accuracy metrics (see AccuracyMetric), for chunked evaluation.
+    Only the per-user values and the length of the shortest list are kept between chunks.
+
+    :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+    :type pos_items: pd.DataFrame or RelevanceIndex
+    :param ats: The tuple of values at which to evaluate the metrics.
+    :type ats: tuple, default (5, 10)
+    :param metrics: The AccuracyMetric classes to evaluate.
+    :type metrics: tuple
+    """
+
+    shared = ("pos_items",)
+
+    def __init__(
+        self,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        metrics: tuple = (),
+    ) -> None:
+        self.pos_items = (
+            pos_items.copy()
+            if isinstance(pos_items, RelevanceIndex)
+            else RelevanceIndex.from_pos_items(pos_items)
+        )
+        self.ats = ats
+        self.metrics = metrics
+        self.min_length = np.inf
+        self.users = []
+        self.scores = []
+
+    def update(self, chunk: pd.DataFrame | RecommendationLists) -> RankingAccumulator:
+        top_n, self.pos_items = aligned_inputs(chunk, self.pos_items)
+        self.min_length = min(self.min_length, top_n.lengths.min())
+
+        ats = [k for k in self.ats if k <= top_n.lengths.min()]
+        if len(ats) == 0:
+            return self
+
+        users, relevance = relevance_matrix(top_n, self.pos_items, max(ats))
+        scores = {}
+        for metric in self.metrics:
+            scores.update(metric.scores(self.pos_items, users, ats, relevance))
+        self.users.append(users)
+        self.scores.append(scores)
+        return self
+
+    def consume_scores(
+        self,
+        scores,
+        users=None,
+        items=None,
+        exclude: pd.DataFrame = None,
+        batch_size: int = 1024,
+    ) -> pd.DataFrame:
+        """
+        Update the per-user values with the top-max(ats) lists of every batch of rows of a score matrix
+        (see top_k_lists) and finalize them.
+
+        :param scores: Score of every item (column) for every user (row), e.g., the output of a model.
+        :type scores: np.ndarray or sparse matrix
+        :param users: User ID of every row, by default the row index.
+        :type users: array-like, default None
+        :param items: Item ID of every column, by default the column index.
+        :type items: array-like, default None
+        :param exclude: Interactions never to be recommended (e.g., the training ones). Columns: ['user', 'item'].
+        :type exclude: pd.DataFrame, default None
+        :param batch_size: Number of rows scored at a time.
+        :type batch_size: int, default 1024
+        :return: The metrics per user.
+        :rtype: pd.DataFrame
+        """
+
+        for top_n in top_k_lists(
+            scores,
+            max(self.ats),
+            users,
+            items,
+            exclude,
+            self.pos_items.vocabularies,
+            batch_size,
+        ):
+            self.update(top_n)
+        return self.finalize()
+
+    def merge(self, other: RankingAccumulator) -> RankingAccumulator:
+        user_vocabulary = self.pos_items.vocabularies["user"]
+        other_vocabulary = other.pos_items.vocabularies["user"]
+        for users, scores in zip(other.users, other.scores):
+            if other_vocabulary is not user_vocabulary:
+                users = user_vocabulary.encode(
+                    other_vocabulary.decode(users), update=True
+                )
+            self.users.append(users)
+            self.scores.append(scores)
+        self.min_length = min(self.min_length, other.min_length)
+        return self
+
+    def finalize(self) -> pd.DataFrame:
+        ats = calculable_ats(self.min_length, self.ats)
+        if len(self.users) == 0:
+            return pd.DataFrame(columns=["user"])
+
+        users = np.concatenate(self.users)
+        order = np.argsort(users, kind="stable")
+        columns = {"user": self.pos_items.vocabularies["user"].decode(users[order])}
+        for col in self.scores[0]:
+            if int(col.split("@")[1]) in ats:
+                columns[col] = np.concatenate([s[col] for s in self.scores])[order]
+        return pd.DataFrame(columns)
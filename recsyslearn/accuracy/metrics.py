@@ -1,109 +1,468 @@
-import warnings
-from abc import ABC
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Iterable
 
 import numpy as np
 import pandas as pd
 
-from recsyslearn.errors.errors import RecListTooShortException
-from recsyslearn.utils import check_columns_exist
+from recsyslearn.accuracy.accumulators import RankingAccumulator
+from recsyslearn.accuracy.utils import (
+    average_precision_at,
+    cumulative_dcg,
+    gains,
+    hit_rate_at,
+    ndcg_at,
+    precision_at,
+    ranked_relevance,
+    recall_at,
+    reciprocal_rank_at,
+)
+from recsyslearn.dataset.containers import RecommendationLists, RelevanceIndex
 
 
 class AccuracyMetric(ABC):
+
+    """
+    Abstract Class for ranking accuracy metrics.
+    Every metric reads its per-user values off the relevance matrix of the recommended items,
+    so that several metrics can share it (see RankingMetrics).
+    """
+
     def __init__(self) -> None:
         return
 
+    @classmethod
+    @abstractmethod
+    def scores(
+        cls,
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        """
+        Compute the per-user values of the metric at every cutoff.
+
+        :param pos_items: Relevance index encoded as the recommendation lists.
+        :type pos_items: RelevanceIndex
+        :param users: Codes of the evaluated users.
+        :type users: np.ndarray
+        :param ats: The cutoffs at which to evaluate the metric.
+        :type ats: list
+        :param relevance: Relevance of the recommended items, of shape (len(users), max(ats)).
+        :type relevance: np.ndarray
+        :return: Mapping from column name (e.g., 'NDCG@k') to the per-user values.
+        :rtype: dict
+        """
+
+    @classmethod
+    def evaluate(
+        cls,
+        top_n: pd.DataFrame | RecommendationLists,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        n_jobs: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Compute the metric@k of a model, for every user, by using its recommendation list.
+
+        :param top_n: Top N recommendations' lists for every user. Columns: ['user', 'item', 'rank'].
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metric.
+        :type ats: tuple, default (5, 10)
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises ColumnsNotExistException: If top_n does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
+        :raises RecListTooShortException: If the top_n list does not contain enough items.
+        :return: The metric per user, in the form ('user', 'metric@k_0', ..., 'metric@k_n').
+        :rtype: pd.DataFrame
+        """
+
+        if n_jobs != 1:
+            return cls.accumulator(pos_items, ats).consume_parallel(top_n, n_jobs)
+
+        top_n, pos_items, users, ats, relevance = ranked_relevance(
+            top_n, pos_items, ats
+        )
+        return pd.DataFrame(
+            {
+                "user": top_n.vocabularies["user"].decode(users),
+                **cls.scores(pos_items, users, ats, relevance),
+            }
+        )
+
+    @classmethod
+    def evaluate_chunks(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+    ) -> pd.DataFrame:
+        """
+        Compute the metric@k of a model, for every user, by streaming its recommendation lists in chunks
+        (e.g., from pd.read_csv(chunksize=...)), so that the lists never need to be loaded at once.
+        The rows of every user must be contiguous in the stream. Returns the same values of evaluate.
+
+        :param chunks: Top N recommendations' lists for some users. Columns: ['user', 'item', 'rank'].
+        :type chunks: Iterable[pd.DataFrame]
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metric.
+        :type ats: tuple, default (5, 10)
+        :raises ColumnsNotExistException: If a chunk does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
+        :raises RecListTooShortException: If the lists do not contain enough items.
+        :return: The metric per user, in the form ('user', 'metric@k_0', ..., 'metric@k_n').
+        :rtype: pd.DataFrame
+        """
+
+        return cls.accumulator(pos_items, ats).consume(chunks)
+
+    @classmethod
+    def evaluate_scores(
+        cls,
+        scores,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        users=None,
+        items=None,
+        exclude: pd.DataFrame = None,
+        batch_size: int = 1024,
+    ) -> pd.DataFrame:
+        """
+        Compute the metric@k of a model, for every user, directly from its user x item score matrix.
+        The top-max(ats) items of a batch of rows at a time are ranked with argpartition and evaluated
+        as they are, without building a long-format DataFrame.
+
+        :param scores: Score of every item (column) for every user (row), e.g., the output of a model.
+        :type scores: np.ndarray or sparse matrix
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metric.
+        :type ats: tuple, default (5, 10)
+        :param users: User ID of every row, by default the row index.
+        :type users: array-like, default None
+        :param items: Item ID of every column, by default the column index.
+        :type items: array-like, default None
+        :param exclude: Interactions never to be recommended (e.g., the training ones). Columns: ['user', 'item'].
+        :type exclude: pd.DataFrame, default None
+        :param batch_size: Number of rows scored at a time.
+        :type batch_size: int, default 1024
+        :raises ColumnsNotExistException: If pos_items does not contain columns ('user', 'pos_items') or exclude does not contain columns ('user', 'item').
+        :raises RecListTooShortException: If there are not enough items.
+        :return: The metric per user, in the form ('user', 'metric@k_0', ..., 'metric@k_n').
+        :rtype: pd.DataFrame
+        """
+
+        return cls.accumulator(pos_items, ats).consume_scores(
+            scores, users, items, exclude, batch_size
+        )
+
+    @classmethod
+    def accumulator(
+        cls, pos_items: pd.DataFrame | RelevanceIndex, ats: tuple = (5, 10)
+    ) -> RankingAccumulator:
+        """
+        Create the running state of the metric, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the metric with finalize().
+
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metric.
+        :type ats: tuple, default (5, 10)
+        :raises ColumnsNotExistException: If pos_items does not contain columns ('user', 'pos_items').
+        :return: The empty accumulator.
+        :rtype: RankingAccumulator
+        """
+
+        return RankingAccumulator(pos_items, ats, (cls,))
+
 
 class NDCG(AccuracyMetric):
 
     """
     NDCG evaluator for recommender systems.
+    Relevance is graded if pos_items carries relevance values (see find_relevant_items), binary otherwise.
+    """
+
+    @classmethod
+    def scores(
+        cls,
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        return ndcg_at(
+            cumulative_dcg(gains(relevance)),
+            cumulative_dcg(gains(pos_items.top_relevance(users, relevance.shape[1]))),
+            ats,
+        )
+
+    @classmethod
+    def evaluate(
+        cls,
+        top_n: pd.DataFrame | RecommendationLists,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        n_jobs: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Compute the NDCG@k of a model, for every user, by using its recommendation list.
+        Relevance is graded if pos_items carries relevance values (see find_relevant_items), binary otherwise.
+
+        :param top_n: Top N recommendations' lists for every user. Columns: ['user', 'item', 'rank'].
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate NDCG@k.
+        :type ats: tuple, default (5, 10)
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises ColumnsNotExistException: If top_n does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
+        :raises RecListTooShortException: If the top_n list does not contain enough items.
+        :return: The NDCG per user, in the form ('user', 'NDCG@k_0', ..., 'NDCG@k_n').
+        :rtype: pd.DataFrame
+        """
+
+        return super().evaluate(top_n, pos_items, ats, n_jobs)
+
+
+class Precision(AccuracyMetric):
+
+    """
+    Precision@k evaluator for recommender systems: fraction of the first k recommendations that are relevant.
+    """
+
+    @classmethod
+    def scores(
+        cls,
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        return precision_at(np.cumsum(relevance > 0, axis=1), ats)
+
+
+class Recall(AccuracyMetric):
+
+    """
+    Recall@k evaluator for recommender systems: fraction of the relevant items among the first k recommendations.
     """
 
     @classmethod
-    def __dcg(cls, scores: pd.DataFrame) -> float:
-        return np.sum(
-            np.divide(
-                np.power(2, scores) - 1,
-                np.log(np.arange(scores.shape[0], dtype=np.float32) + 2),
-            ),
-            dtype=np.float32,
+    def scores(
+        cls,
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        return recall_at(
+            np.cumsum(relevance > 0, axis=1), pos_items.n_relevant(users), ats
         )
 
+
+class MAP(AccuracyMetric):
+
+    """
+    Mean Average Precision (MAP@k) evaluator for recommender systems.
+    The average precision of a user is the precision at every hit within k, averaged over min(k, #relevant items).
+    """
+
     @classmethod
-    def __ndcg(
+    def scores(
         cls,
-        ranked_list: pd.DataFrame,
-        pos_items: pd.DataFrame,
-        relevance: pd.DataFrame = None,
-        at: int = None,
-    ) -> float:
-        if relevance is None:
-            relevance = np.ones_like(pos_items, dtype=np.int32)
-        assert len(relevance) == pos_items.shape[0]
-
-        it2rel = {it: r for it, r in zip(pos_items, relevance)}
-
-        rank_scores = np.asarray(
-            [it2rel.get(it, 0.0) for it in ranked_list[:at]], dtype=np.float32
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        hits = relevance > 0
+        return average_precision_at(
+            hits, np.cumsum(hits, axis=1), pos_items.n_relevant(users), ats
         )
-        ideal_dcg = cls.__dcg(np.sort(relevance)[::-1][:at])
-        rank_dcg = cls.__dcg(rank_scores)
 
-        if rank_dcg == 0:
-            return 0
 
-        ndcg_ = rank_dcg / ideal_dcg
+class MRR(AccuracyMetric):
+
+    """
+    Mean Reciprocal Rank (MRR@k) evaluator for recommender systems:
+    inverse of the position of the first relevant item within k, 0 if there is none.
+    """
+
+    @classmethod
+    def scores(
+        cls,
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        return reciprocal_rank_at(relevance > 0, ats)
+
+
+class HitRate(AccuracyMetric):
+
+    """
+    HitRate@k evaluator for recommender systems: whether at least one of the first k recommendations is relevant.
+    """
+
+    @classmethod
+    def scores(
+        cls,
+        pos_items: RelevanceIndex,
+        users: np.ndarray,
+        ats: list,
+        relevance: np.ndarray,
+    ) -> dict:
+        return hit_rate_at(np.cumsum(relevance > 0, axis=1), ats)
+
+
+class RankingMetrics:
 
-        return ndcg_
+    """
+    Evaluator computing several ranking accuracy metrics with a single pass over the recommendation lists.
+    """
 
     @classmethod
     def evaluate(
-        cls, top_n: pd.DataFrame, pos_items: pd.DataFrame, ats: tuple = (5, 10)
-    ) -> pd.Series:
-        """Compute the NDCG@k of a model by using its recommendation list.
-        Returns the NDCG averaged over users.
+        cls,
+        top_n: pd.DataFrame | RecommendationLists,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        metrics: tuple = (NDCG, Precision, Recall, MAP, MRR, HitRate),
+        n_jobs: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Compute several metric@k of a model, for every user, by using its recommendation list.
+        The relevance of the recommended items is gathered once and shared by all the metrics.
 
         :param top_n: Top N recommendations' lists for every user. Columns: ['user', 'item', 'rank'].
-        :type top_n: pd.DataFrame
-        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'].
-        :type pos_items: pd.DataFrame
-        :param ats: The tuple of values at which to evaluate NDCG@k.
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metrics.
         :type ats: tuple, default (5, 10)
+        :param metrics: The AccuracyMetric classes to evaluate.
+        :type metrics: tuple, default (NDCG, Precision, Recall, MAP, MRR, HitRate)
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
         :raises ColumnsNotExistException: If top_n does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
         :raises RecListTooShortException: If the top_n list does not contain enough items.
-        :return: The NDCG@n averaged over users, in the form ('NDCG@k_0', ..., 'NDCG@k_n')
-        :rtype: pd.Series
+        :return: The metrics per user, in the form ('user', 'NDCG@k_0', ..., 'HitRate@k_n').
+        :rtype: pd.DataFrame
+        """
+
+        if n_jobs != 1:
+            return cls.accumulator(pos_items, ats, metrics).consume_parallel(
+                top_n, n_jobs
+            )
+
+        top_n, pos_items, users, ats, relevance = ranked_relevance(
+            top_n, pos_items, ats
+        )
+        columns = {"user": top_n.vocabularies["user"].decode(users)}
+        for metric in metrics:
+            columns.update(metric.scores(pos_items, users, ats, relevance))
+        return pd.DataFrame(columns)
+
+    @classmethod
+    def evaluate_chunks(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        metrics: tuple = (NDCG, Precision, Recall, MAP, MRR, HitRate),
+    ) -> pd.DataFrame:
         """
+        Compute several metric@k of a model, for every user, by streaming its recommendation lists in chunks.
+        The rows of every user must be contiguous in the stream. Returns the same values of evaluate.
 
-        check_columns_exist(top_n, ["user", "item", "rank"])
-        check_columns_exist(pos_items, ["user", "pos_items"])
+        :param chunks: Top N recommendations' lists for some users. Columns: ['user', 'item', 'rank'].
+        :type chunks: Iterable[pd.DataFrame]
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metrics.
+        :type ats: tuple, default (5, 10)
+        :param metrics: The AccuracyMetric classes to evaluate.
+        :type metrics: tuple, default (NDCG, Precision, Recall, MAP, MRR, HitRate)
+        :raises ColumnsNotExistException: If a chunk does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
+        :raises RecListTooShortException: If the lists do not contain enough items.
+        :return: The metrics per user, in the form ('user', 'NDCG@k_0', ..., 'HitRate@k_n').
+        :rtype: pd.DataFrame
+        """
 
-        min_calculable_at = top_n.groupby("user").size().min()
-        calculable_ats = [k for k in ats if k <= min_calculable_at]
+        return cls.accumulator(pos_items, ats, metrics).consume(chunks)
 
-        if len(calculable_ats) == 0:
-            raise RecListTooShortException(ats)
+    @classmethod
+    def evaluate_scores(
+        cls,
+        scores,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        metrics: tuple = (NDCG, Precision, Recall, MAP, MRR, HitRate),
+        users=None,
+        items=None,
+        exclude: pd.DataFrame = None,
+        batch_size: int = 1024,
+    ) -> pd.DataFrame:
+        """
+        Compute several metric@k of a model, for every user, directly from its user x item score matrix
+        (see AccuracyMetric.evaluate_scores).
 
-        if len(calculable_ats) != len(ats):
-            non_calulable_ats = list(set(calculable_ats) - set(ats))
-            warnings.warn(non_calulable_ats.join(" ") + " ats won't be calculated")
+        :param scores: Score of every item (column) for every user (row), e.g., the output of a model.
+        :type scores: np.ndarray or sparse matrix
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metrics.
+        :type ats: tuple, default (5, 10)
+        :param metrics: The AccuracyMetric classes to evaluate.
+        :type metrics: tuple, default (NDCG, Precision, Recall, MAP, MRR, HitRate)
+        :param users: User ID of every row, by default the row index.
+        :type users: array-like, default None
+        :param items: Item ID of every column, by default the column index.
+        :type items: array-like, default None
+        :param exclude: Interactions never to be recommended (e.g., the training ones). Columns: ['user', 'item'].
+        :type exclude: pd.DataFrame, default None
+        :param batch_size: Number of rows scored at a time.
+        :type batch_size: int, default 1024
+        :raises ColumnsNotExistException: If pos_items does not contain columns ('user', 'pos_items') or exclude does not contain columns ('user', 'item').
+        :raises RecListTooShortException: If there are not enough items.
+        :return: The metrics per user, in the form ('user', 'NDCG@k_0', ..., 'HitRate@k_n').
+        :rtype: pd.DataFrame
+        """
 
-        top_n = top_n[["user", "item", "rank"]]
-        top_n = (
-            top_n[["user", "item"]]
-            .groupby("user")["item"]
-            .apply(np.asarray)
-            .reset_index()
+        return cls.accumulator(pos_items, ats, metrics).consume_scores(
+            scores, users, items, exclude, batch_size
         )
-        full_df = top_n.merge(pos_items, on="user")
 
-        for k in calculable_ats:
-            full_df.loc[:, f"NDCG@{k}"] = full_df.apply(
-                lambda x: cls.__ndcg(x["item"][:k], x["pos_items"], at=k), axis=1
-            )
+    @classmethod
+    def accumulator(
+        cls,
+        pos_items: pd.DataFrame | RelevanceIndex,
+        ats: tuple = (5, 10),
+        metrics: tuple = (NDCG, Precision, Recall, MAP, MRR, HitRate),
+    ) -> RankingAccumulator:
+        """
+        Create the running state of the metrics, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the metrics with finalize().
 
-        cols_to_be_returned = [
-            col for col in full_df.columns if col not in ["item", "pos_items"]
-        ]
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame or RelevanceIndex
+        :param ats: The tuple of values at which to evaluate the metrics.
+        :type ats: tuple, default (5, 10)
+        :param metrics: The AccuracyMetric classes to evaluate.
+        :type metrics: tuple, default (NDCG, Precision, Recall, MAP, MRR, HitRate)
+        :raises ColumnsNotExistException: If pos_items does not contain columns ('user', 'pos_items').
+        :return: The empty accumulator.
+        :rtype: RankingAccumulator
+        """
 
-        return full_df.loc[:, cols_to_be_returned]
+        return RankingAccumulator(pos_items, ats, metrics)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.dataset.containers import RecommendationLists, RelevanceIndex
+from recsyslearn.errors.errors import RecListTooShortException
+from recsyslearn.utils import check_columns_exist
+
+
+def discounts(k: int) -> np.ndarray:
+    """
+    Logarithmic position discounts used by the DCG, for the first k positions.
+
+    :param k: The number of positions.
+    :type k: int
+    :return: The values log(position + 1) for position in 1..k.
+    :rtype: np.ndarray
+    """
+
+    return np.log(np.arange(k, dtype=np.float32) + 2)
+
+
+def cumulative_dcg(gains: np.ndarray) -> np.ndarray:
+    """
+    Compute the DCG at every cutoff in a single pass.
+
+    :param gains: Matrix of gains (i.e., 2^rel - 1) of shape (n_users, k).
+    :type gains: np.ndarray
+    :return: Matrix whose column j holds the DCG@(j+1) of every user.
+    :rtype: np.ndarray
+    """
+
+    return np.cumsum(
+        np.divide(gains, discounts(gains.shape[1])), axis=1, dtype=np.float32
+    )
+
+
+def gains(relevance: np.ndarray) -> np.ndarray:
+    """
+    Compute the DCG gains of the given relevance values.
+
+    :param relevance: Matrix of relevance values.
+    :type relevance: np.ndarray
+    :return: The gains 2^rel - 1.
+    :rtype: np.ndarray
+    """
+
+    return np.power(np.float32(2), relevance, dtype=np.float32) - 1
+
+
+def ndcg_at(dcg: np.ndarray, ideal_dcg: np.ndarray, ats: list) -> dict:
+    """
+    Read the NDCG@k values off the cumulative DCG matrices.
+
+    :param dcg: Cumulative DCG matrix as returned by cumulative_dcg.
+    :type dcg: np.ndarray
+    :param ideal_dcg: Cumulative ideal DCG matrix with the same shape of dcg.
+    :type ideal_dcg: np.ndarray
+    :param ats: The cutoffs at which to read the NDCG.
+    :type ats: list
+    :return: Mapping from 'NDCG@k' to the per-user values.
+    :rtype: dict
+    """
+
+    ndcg = {}
+    for k in ats:
+        rank_dcg = dcg[:, k - 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ndcg_ = np.where(rank_dcg == 0, 0, rank_dcg / ideal_dcg[:, k - 1])
+        ndcg[f"NDCG@{k}"] = ndcg_.astype(np.float64)
+    return ndcg
+
+
+def calculable_ats(min_length: int, ats: tuple) -> list:
+    """
+    Select the cutoffs that are not longer than the shortest recommendation list.
+
+    :param min_length: Length of the shortest recommendation list.
+    :type min_length: int
+    :param ats: The requested cutoffs.
+    :type ats: tuple
+    :raises RecListTooShortException: If no cutoff can be calculated.
+    :return: The calculable cutoffs.
+    :rtype: list
+    """
+
+    calculable = [k for k in ats if k <= min_length]
+
+    if len(calculable) == 0:
+        raise RecListTooShortException(ats)
+
+    if len(calculable) != len(ats):
+        non_calculable_ats = [str(k) for k in ats if k not in calculable]
+        warnings.warn(" ".join(non_calculable_ats) + " ats won't be calculated")
+
+    return calculable
+
+
+def aligned_inputs(
+    top_n: pd.DataFrame | RecommendationLists,
+    pos_items: pd.DataFrame | RelevanceIndex,
+) -> tuple:
+    """
+    Convert the recommendation lists and the relevant items to containers sharing the same codes.
+
+    :param top_n: Top N recommendations' lists for every user. Columns: ['user', 'item', 'rank'].
+    :type top_n: pd.DataFrame or RecommendationLists
+    :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+    :type pos_items: pd.DataFrame or RelevanceIndex
+    :raises ColumnsNotExistException: If top_n does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
+    :return: The recommendation lists and the relevance index.
+    :rtype: tuple
+    """
+
+    if not isinstance(top_n, RecommendationLists):
+        check_columns_exist(top_n, ["user", "item", "rank"])
+        vocabularies = None
+        if isinstance(pos_items, RelevanceIndex):
+            # The recommended IDs are added to a copy of the vocabularies of the index,
+            # leaving the index of the caller as it is.
+            pos_items = pos_items.copy()
+            vocabularies = pos_items.vocabularies
+        top_n = RecommendationLists.from_frame(
+            top_n[["user", "item", "rank"]], vocabularies
+        )
+
+    if isinstance(pos_items, RelevanceIndex):
+        pos_items = pos_items.encoded_with(top_n.vocabularies)
+    else:
+        pos_items = RelevanceIndex.from_pos_items(
+            pos_items,
+            {col: top_n.vocabularies[col].copy() for col in ("user", "item")},
+        )
+
+    return top_n, pos_items
+
+
+def relevance_matrix(
+    top_n: RecommendationLists, pos_items: RelevanceIndex, max_k: int
+) -> tuple:
+    """
+    Gather the relevance of the first max_k recommended items of every user with relevant items.
+
+    :param top_n: Recommendation lists.
+    :type top_n: RecommendationLists
+    :param pos_items: Relevance index with the same codes of top_n.
+    :type pos_items: RelevanceIndex
+    :param max_k: Number of recommendations per user.
+    :type max_k: int
+    :return: The codes of the evaluated users and the relevance matrix of shape (n_users, max_k).
+    :rtype: tuple
+    """
+
+    rows = np.flatnonzero(pos_items.n_relevant(top_n.users))
+    users = top_n.users[rows]
+    return users, pos_items.lookup(users[:, None], top_n.padded(max_k)[rows])
+
+
+def ranked_relevance(
+    top_n: pd.DataFrame | RecommendationLists,
+    pos_items: pd.DataFrame | RelevanceIndex,
+    ats: tuple,
+) -> tuple:
+    """
+    Gather the relevance of the recommended items of every user with relevant items, once for every cutoff.
+
+    :param top_n: Top N recommendations' lists for every user. Columns: ['user', 'item', 'rank'].
+    :type top_n: pd.DataFrame or RecommendationLists
+    :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+    :type pos_items: pd.DataFrame or RelevanceIndex
+    :param ats: The cutoffs at which the metrics will be evaluated.
+    :type ats: tuple
+    :raises ColumnsNotExistException: If top_n does not contain columns ('user', 'item', 'rank') or pos_items does not contain columns ('user', 'pos_items').
+    :raises RecListTooShortException: If the top_n list does not contain enough items.
+    :return: The recommendation lists, the relevance index with the same codes, the codes of the evaluated users,
+        the calculable cutoffs and the relevance matrix of shape (n_users, max(cutoffs)).
+    :rtype: tuple
+    """
+
+    top_n, pos_items = aligned_inputs(top_n, pos_items)
+    ats = calculable_ats(top_n.lengths.min(), ats)
+    users, relevance = relevance_matrix(top_n, pos_items, max(ats))
+    return top_n, pos_items, users, ats, relevance
+
+
+def precision_at(cumulative_hits: np.ndarray, ats: list) -> dict:
+    """
+    Read the Precision@k values off the cumulative hits.
+
+    :param cumulative_hits: Matrix whose column j holds the number of hits in the first j+1 positions.
+    :type cumulative_hits: np.ndarray
+    :param ats: The cutoffs at which to read the metric.
+    :type ats: list
+    :return: Mapping from 'Precision@k' to the per-user values.
+    :rtype: dict
+    """
+
+    return {f"Precision@{k}": cumulative_hits[:, k - 1] / k for k in ats}
+
+
+def recall_at(cumulative_hits: np.ndarray, n_relevant: np.ndarray, ats: list) -> dict:
+    """
+    Read the Recall@k values off the cumulative hits.
+
+    :param cumulative_hits: Matrix whose column j holds the number of hits in the first j+1 positions.
+    :type cumulative_hits: np.ndarray
+    :param n_relevant: Number of relevant items per user.
+    :type n_relevant: np.ndarray
+    :param ats: The cutoffs at which to read the metric.
+    :type ats: list
+    :return: Mapping from 'Recall@k' to the per-user values.
+    :rtype: dict
+    """
+
+    return {f"Recall@{k}": cumulative_hits[:, k - 1] / n_relevant for k in ats}
+
+
+def average_precision_at(
+    hits: np.ndarray, cumulative_hits: np.ndarray, n_relevant: np.ndarray, ats: list
+) -> dict:
+    """
+    Compute the AP@k values, i.e., the precision at every hit averaged over min(k, n_relevant).
+
+    :param hits: Boolean hit matrix.
+    :type hits: np.ndarray
+    :param cumulative_hits: Matrix whose column j holds the number of hits in the first j+1 positions.
+    :type cumulative_hits: np.ndarray
+    :param n_relevant: Number of relevant items per user.
+    :type n_relevant: np.ndarray
+    :param ats: The cutoffs at which to read the metric.
+    :type ats: list
+    :return: Mapping from 'MAP@k' to the per-user values.
+    :rtype: dict
+    """
+
+    precisions = np.cumsum(
+        hits * cumulative_hits / np.arange(1, hits.shape[1] + 1), axis=1
+    )
+    return {f"MAP@{k}": precisions[:, k - 1] / np.minimum(n_relevant, k) for k in ats}
+
+
+def reciprocal_rank_at(hits: np.ndarray, ats: list) -> dict:
+    """
+    Compute the RR@k values, i.e., the inverse of the position of the first hit within k.
+
+    :param hits: Boolean hit matrix.
+    :type hits: np.ndarray
+    :param ats: The cutoffs at which to read the metric.
+    :type ats: list
+    :return: Mapping from 'MRR@k' to the per-user values.
+    :rtype: dict
+    """
+
+    first_hit = np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, np.inf)
+    return {f"MRR@{k}": np.where(first_hit <= k, 1 / first_hit, 0.0) for k in ats}
+
+
+def hit_rate_at(cumulative_hits: np.ndarray, ats: list) -> dict:
+    """
+    Read the HitRate@k values off the cumulative hits.
+
+    :param cumulative_hits: Matrix whose column j holds the number of hits in the first j+1 positions.
+    :type cumulative_hits: np.ndarray
+    :param ats: The cutoffs at which to read the metric.
+    :type ats: list
+    :return: Mapping from 'HitRate@k' to the per-user values.
+    :rtype: dict
+    """
+
+    return {f"HitRate@{k}": (cumulative_hits[:, k - 1] > 0).astype(float) for k in ats}
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.beyond_accuracy.utils import (
+    count_bits,
+    frame_novelty,
+    hll_estimate,
+    hll_update,
+    popularity_table,
+    set_bits,
+)
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.errors import (
+    IncompatibleAccumulatorsException,
+    InvalidParameterException,
+)
+from recsyslearn.utils import Accumulator, check_columns_exist
+
+
+class CoverageAccumulator(Accumulator):
+
+    """
+    Running set of recommended items, for chunked evaluation of Coverage.
+    The items of the catalog are kept in a bitset over their codes, so that the sets of different chunks
+    (or runs) are united with a bitwise or. With precision, a HyperLogLog sketch of 2 ** precision registers
+    replaces the bitset: its memory does not depend on the catalog, and the coverage is approximate,
+    with a relative standard error of about 1.04 / sqrt(2 ** precision).
+
+    :param items: List of items in the dataset, or their Vocabulary to reuse it across runs.
+    :type items: list, array-like or Vocabulary
+    :param precision: Number of bits of the sketch index (4 to 18), None for the exact coverage.
+    :type precision: int, default None
+    :raises InvalidParameterException: If precision is not None nor between 4 and 18.
+    """
+
+    shared = ("items", "catalog")
+
+    def __init__(self, items: list | Vocabulary, precision: int = None) -> None:
+        if precision is not None and not 4 <= precision <= 18:
+            raise InvalidParameterException(
+                "precision", precision, "None or an integer from 4 to 18"
+            )
+        self.items = items
+        self.n_items = len(items)
+        self.precision = precision
+        if precision is not None:
+            self.catalog = None
+            self.recommended = np.zeros(1 << precision, dtype=np.uint8)
+        else:
+            self.catalog = (
+                items
+                if isinstance(items, Vocabulary)
+                else Vocabulary(pd.unique(np.asarray(items)))
+            )
+            self.recommended = np.zeros((len(self.catalog) + 7) // 8, dtype=np.uint8)
+            # Recommended items missing from the catalog, which count as covered as well.
+            self.uncatalogued = Vocabulary()
+
+    def update(self, chunk: pd.DataFrame | RecommendationLists) -> CoverageAccumulator:
+        if isinstance(chunk, RecommendationLists):
+            items = chunk.vocabularies["item"].decode(np.unique(chunk.items))
+        else:
+            check_columns_exist(chunk, ["user", "item", "rank"])
+            items = chunk["item"].to_numpy()
+
+        if self.precision is not None:
+            hll_update(self.recommended, items)
+            return self
+
+        codes = self.catalog.encode(items)
+        set_bits(self.recommended, codes[codes >= 0])
+        self.uncatalogued.update(items[codes < 0])
+        return self
+
+    def merge(self, other: CoverageAccumulator) -> CoverageAccumulator:
+        if self.precision != other.precision:
+            raise IncompatibleAccumulatorsException(
+                f"Cannot merge coverage with precision {other.precision} into precision {self.precision}"
+            )
+        # The bitsets of the exact coverage are only comparable over the same catalog codes.
+        if (
+            self.precision is None
+            and self.catalog is not other.catalog
+            and not np.array_equal(self.catalog.ids, other.catalog.ids)
+        ):
+            raise IncompatibleAccumulatorsException(
+                "Cannot merge the coverage of different catalogs"
+            )
+
+        if self.precision is not None:
+            np.maximum(self.recommended, other.recommended, out=self.recommended)
+        else:
+            np.bitwise_or(self.recommended, other.recommended, out=self.recommended)
+            self.uncatalogued.update(other.uncatalogued.ids)
+        return self
+
+    def finalize(self) -> float:
+        if self.precision is not None:
+            return hll_estimate(self.recommended) / self.n_items
+        return (count_bits(self.recommended) + len(self.uncatalogued)) / self.n_items
+
+
+class NoveltyAccumulator(Accumulator):
+
+    """
+    Running sum of the novelty of every list, for chunked evaluation of Novelty.
+
+    :param popularity_definition: Either 'group' or 'percentage' (see Novelty).
+    :type popularity_definition: str, default 'group'
+    :param popularity: The popularity of every item (see Novelty), None to read it from the chunks.
+    :type popularity: pd.DataFrame or tuple, default None
+    :raises ColumnsNotExistException: If popularity not in the form ('item', popularity_definition).
+    """
+
+    shared = ("table",)
+
+    def __init__(
+        self,
+        popularity_definition: str = "group",
+        popularity: pd.DataFrame | tuple = None,
+    ) -> None:
+        self.popularity_definition = popularity_definition
+        self.table = (
+            popularity_table(popularity, popularity_definition)
+            if popularity is not None
+            else None
+        )
+        self.total = 0.0
+        self.n_lists = 0
+
+    def update(self, chunk: pd.DataFrame) -> NoveltyAccumulator:
+        novelty = frame_novelty(chunk, self.popularity_definition, self.table)
+        self.total += novelty.sum()
+        self.n_lists += len(novelty)
+        return self
+
+    def merge(self, other: NoveltyAccumulator) -> NoveltyAccumulator:
+        self.total += other.total
+        self.n_lists += other.n_lists
+        return self
+
+    def finalize(self) -> float:
+        return self.total / self.n_lists
@@ -1,8 +1,22 @@
+from __future__ import annotations
+
 from abc import ABC
+from typing import Iterable
 
 import numpy as np
 import pandas as pd
 
+from recsyslearn.beyond_accuracy.accumulators import (
+    CoverageAccumulator,
+    NoveltyAccumulator,
+)
+from recsyslearn.beyond_accuracy.utils import (
+    frame_novelty,
+    lists_novelty,
+    popularity_table,
+)
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.vocabulary import Vocabulary
 from recsyslearn.utils import check_columns_exist
 
 
@@ -24,21 +38,89 @@ class Coverage(BeyondAccuracyMetric):
     """
 
     @classmethod
-    def evaluate(cls, top_n: pd.DataFrame, items: list) -> float:
+    def evaluate(
+        cls,
+        top_n: pd.DataFrame | RecommendationLists,
+        items: list | Vocabulary,
+        n_jobs: int = 1,
+        precision: int = None,
+    ) -> float:
         """
         Compute the coverage of a model by using its recommendation list.
 
         :param top_n: Top-N recommendations' lists for every user with items or users already segmented.
-        :type top_n: pd.DataFrame
-        :param items: List of items in the dataset.
-        :type items: list or array-like
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param items: List of items in the dataset, or their Vocabulary.
+        :type items: list, array-like or Vocabulary
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :param precision: Number of bits of the index of a HyperLogLog sketch of the recommended items (see CoverageAccumulator),
+            None for the exact coverage.
+        :type precision: int, default None
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises InvalidParameterException: If precision is not None nor between 4 and 18.
         :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group').
         :return: The computed coverage.
         :rtype: float
         """
 
+        if n_jobs != 1 or precision is not None:
+            accumulator = cls.accumulator(items, precision)
+            if n_jobs != 1:
+                return accumulator.consume_parallel(top_n, n_jobs)
+            return accumulator.update(top_n).finalize()
+
+        if isinstance(top_n, RecommendationLists):
+            return np.count_nonzero(np.bincount(top_n.items)) / len(items)
+
         check_columns_exist(top_n, ["user", "item", "rank"])
-        return len(top_n.item.unique().tolist()) / len(items)
+        return top_n["item"].nunique(dropna=False) / len(items)
+
+    @classmethod
+    def evaluate_chunks(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        items: list | Vocabulary,
+        precision: int = None,
+    ) -> float:
+        """
+        Compute the coverage of a model by streaming its recommendation lists in chunks
+        (e.g., from pd.read_csv(chunksize=...)). Returns the same value of evaluate.
+
+        :param chunks: Top-N recommendations' lists for some users.
+        :type chunks: Iterable[pd.DataFrame]
+        :param items: List of items in the dataset, or their Vocabulary.
+        :type items: list, array-like or Vocabulary
+        :param precision: Number of bits of the index of a HyperLogLog sketch (see evaluate), None for the exact coverage.
+        :type precision: int, default None
+        :raises InvalidParameterException: If precision is not None nor between 4 and 18.
+        :raises ColumnsNotExistException: If a chunk not in the form ('user', 'item', 'rank').
+        :return: The computed coverage.
+        :rtype: float
+        """
+
+        return cls.accumulator(items, precision).consume(chunks)
+
+    @classmethod
+    def accumulator(
+        cls, items: list | Vocabulary, precision: int = None
+    ) -> CoverageAccumulator:
+        """
+        Create the running state of the coverage, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the coverage with finalize().
+        Accumulators of different runs over the same items can be merged as well, to compute the coverage of their union;
+        merge raises IncompatibleAccumulatorsException if the two differ in precision or (exact coverage) in catalog.
+
+        :param items: List of items in the dataset, or their Vocabulary.
+        :type items: list, array-like or Vocabulary
+        :param precision: Number of bits of the index of a HyperLogLog sketch (see evaluate), None for the exact coverage.
+        :type precision: int, default None
+        :raises InvalidParameterException: If precision is not None nor between 4 and 18.
+        :return: The empty accumulator.
+        :rtype: CoverageAccumulator
+        """
+
+        return CoverageAccumulator(items, precision)
 
 
 class Novelty(BeyondAccuracyMetric):
@@ -52,26 +134,92 @@ class Novelty(BeyondAccuracyMetric):
     """
 
     @classmethod
-    def evaluate(cls, top_n: pd.DataFrame, popularity_definition="group") -> float:
+    def evaluate(
+        cls,
+        top_n: pd.DataFrame | RecommendationLists,
+        popularity_definition="group",
+        n_jobs: int = 1,
+        popularity: pd.DataFrame | tuple = None,
+    ) -> float:
         """
         Compute the novelty of a model by using its recommendation list and the segmented item groups.
+        The input is not modified.
 
-        :param top_n: Top-N recommendations' lists for every user with items or users already segmented.
-        :type top_n: pd.DataFrame
+        :param top_n: Top-N recommendations' lists for every user, with items already segmented if popularity is None.
+        :type top_n: pd.DataFrame or RecommendationLists
         :param popularity_definition: Either 'group' or 'percentage', to choose whether popularity is computed in terms of
             segmenting items/users according to the distribution of user-item interactions
             or if it is defined as the percentage of user-item interactions.
         :type popularity_definition: str
-        :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', popularity_definition).
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :param popularity: The popularity of every item in the form ('item', popularity_definition),
+            e.g. the output of PopularityPercentage.segment, so that top_n needs not be merged with it.
+            It can also be given as a (Vocabulary, popularity) pair, with an array indexed by the item codes or the
+            dict of PopularityPercentage.popularity (whose 'log_percentage' is used directly): when the vocabulary is
+            the one of top_n (a RecommendationLists), the popularity is gathered by code without any lookup.
+            Recommended items without popularity are ignored, as with an inner merge.
+        :type popularity: pd.DataFrame or tuple, default None
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', popularity_definition), without popularity_definition if popularity is given.
         :return: The computed novelty.
         :rtype: float
         """
 
-        check_columns_exist(top_n, ["user", "item", "rank", popularity_definition])
-        top_n.loc[:, popularity_definition] = pd.to_numeric(
-            top_n.loc[:, popularity_definition]
-        )
-        top_n = top_n.groupby("user")[popularity_definition].apply(
-            lambda x: np.mean(-np.log2(x.astype(float)))
+        if n_jobs != 1:
+            return cls.accumulator(popularity_definition, popularity).consume_parallel(
+                top_n, n_jobs
+            )
+
+        table = (
+            popularity_table(popularity, popularity_definition)
+            if popularity is not None
+            else None
         )
-        return top_n.mean()
+        if isinstance(top_n, RecommendationLists):
+            return np.mean(lists_novelty(top_n, popularity_definition, table))
+
+        return np.mean(frame_novelty(top_n, popularity_definition, table))
+
+    @classmethod
+    def evaluate_chunks(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        popularity_definition="group",
+        popularity: pd.DataFrame | tuple = None,
+    ) -> float:
+        """
+        Compute the novelty of a model by streaming its recommendation lists in chunks.
+        Returns the same value of evaluate.
+
+        :param chunks: Top-N recommendations' lists for some users, with items already segmented if popularity is None.
+        :type chunks: Iterable[pd.DataFrame]
+        :param popularity_definition: Either 'group' or 'percentage' (see evaluate).
+        :type popularity_definition: str
+        :param popularity: The popularity of every item in the form ('item', popularity_definition) (see evaluate).
+        :type popularity: pd.DataFrame or tuple, default None
+        :raises ColumnsNotExistException: If a chunk not in the form ('user', 'item', 'rank', popularity_definition), without popularity_definition if popularity is given.
+        :return: The computed novelty.
+        :rtype: float
+        """
+
+        return cls.accumulator(popularity_definition, popularity).consume(chunks)
+
+    @classmethod
+    def accumulator(
+        cls, popularity_definition="group", popularity: pd.DataFrame | tuple = None
+    ) -> NoveltyAccumulator:
+        """
+        Create the running state of the novelty, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the novelty with finalize().
+
+        :param popularity_definition: Either 'group' or 'percentage' (see evaluate).
+        :type popularity_definition: str
+        :param popularity: The popularity of every item in the form ('item', popularity_definition) (see evaluate).
+        :type popularity: pd.DataFrame or tuple, default None
+        :raises ColumnsNotExistException: If popularity not in the form ('item', popularity_definition).
+        :return: The empty accumulator.
+        :rtype: NoveltyAccumulator
+        """
+
+        return NoveltyAccumulator(popularity_definition, popularity)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.errors import ColumnsNotExistException
+from recsyslearn.utils import check_columns_exist
+
+
+def popularity_table(
+    popularity: pd.DataFrame | tuple, popularity_definition: str = "percentage"
+) -> tuple:
+    """
+    Compute the novelty -log2(popularity) of every item once, in an array indexed by item code.
+    Items without a positive popularity (e.g., the codes not in the dataset of PopularityPercentage.popularity)
+    get a NaN novelty, as the items missing from a popularity DataFrame.
+
+    :param popularity: The popularity of every item, either a DataFrame (e.g. the output of PopularityPercentage.segment)
+        or a (Vocabulary, popularity) pair whose popularity is an array indexed by the codes of the vocabulary or
+        the dict of PopularityPercentage.popularity, whose 'log_percentage' is used directly when present.
+    :type popularity: pd.DataFrame or tuple
+    :param popularity_definition: The column of popularity, either 'group' or 'percentage' (see Novelty).
+    :type popularity_definition: str, default 'percentage'
+    :raises ColumnsNotExistException: If popularity not in the form ('item', popularity_definition),
+        or its dict has no popularity_definition.
+    :return: The vocabulary of the items and the novelty of every item code.
+    :rtype: tuple
+    """
+
+    if isinstance(popularity, pd.DataFrame):
+        check_columns_exist(popularity, ["item", popularity_definition])
+
+        vocabulary = Vocabulary.fit(popularity["item"])
+        novelty = np.full(len(vocabulary), np.nan)
+        novelty[vocabulary.encode(popularity["item"])] = -np.log2(
+            pd.to_numeric(popularity[popularity_definition]).to_numpy(float)
+        )
+        return vocabulary, novelty
+
+    vocabulary, values = popularity
+    with np.errstate(divide="ignore"):
+        if not isinstance(values, dict):
+            novelty = -np.log2(np.asarray(values, dtype=float))
+        elif popularity_definition == "percentage" and "log_percentage" in values:
+            novelty = -values["log_percentage"].astype(float)
+        elif popularity_definition in values:
+            novelty = -np.log2(values[popularity_definition].astype(float))
+        else:
+            raise ColumnsNotExistException(
+                [popularity_definition], "Popularity does not contain arrays."
+            )
+    novelty[~np.isfinite(novelty)] = np.nan
+    return vocabulary, novelty
+
+
+def item_novelty(items, table: tuple) -> np.ndarray:
+    """
+    Gather the novelty of the given items from a popularity table.
+
+    :param items: Raw item IDs.
+    :type items: array-like
+    :param table: The popularity table (see popularity_table).
+    :type table: tuple
+    :return: The novelty of every item, NaN for the items not in the table.
+    :rtype: np.ndarray
+    """
+
+    vocabulary, novelty = table
+    return np.append(novelty, np.nan)[vocabulary.encode(items)]
+
+
+def segmented_novelty(
+    lists: np.ndarray, novelty: np.ndarray, n_lists: int, skip_unknown: bool = False
+) -> np.ndarray:
+    """
+    Compute the mean novelty of every list with one segmented sum.
+
+    :param lists: Index of the list of every recommendation.
+    :type lists: np.ndarray
+    :param novelty: Novelty of every recommendation.
+    :type novelty: np.ndarray
+    :param n_lists: Number of lists.
+    :type n_lists: int
+    :param skip_unknown: Whether to skip the recommendations with NaN novelty, as an inner merge with the popularity would.
+    :type skip_unknown: bool, default False
+    :return: The novelty of every list with some recommendation.
+    :rtype: np.ndarray
+    """
+
+    if skip_unknown:
+        known = ~np.isnan(novelty)
+        lists, novelty = lists[known], novelty[known]
+    counts = np.bincount(lists, minlength=n_lists)
+    sums = np.bincount(lists, weights=novelty, minlength=n_lists)
+    listed = counts > 0
+    return sums[listed] / counts[listed]
+
+
+def lists_novelty(
+    top_n: RecommendationLists, popularity_definition: str = "group", table=None
+) -> np.ndarray:
+    """
+    Compute the novelty of every recommendation list, i.e. the mean -log2(popularity) of its items.
+
+    :param top_n: Top-N recommendations' lists for every user, with items already segmented if table is None.
+    :type top_n: RecommendationLists
+    :param popularity_definition: Either 'group' or 'percentage' (see Novelty).
+    :type popularity_definition: str, default 'group'
+    :param table: The popularity table of the items (see popularity_table), None to read the popularity_definition column.
+    :type table: tuple, default None
+    :raises ColumnsNotExistException: If table is None and top_n has no popularity_definition column.
+    :return: The novelty of every list (with some item in the table).
+    :rtype: np.ndarray
+    """
+
+    if table is not None:
+        vocabulary, codes_novelty = table
+        if vocabulary is top_n.vocabularies["item"]:
+            # Same codes: one gather per recommendation, NaN for the codes added after the table.
+            novelty = np.append(
+                codes_novelty, np.full(len(vocabulary) - len(codes_novelty), np.nan)
+            )[top_n.items]
+        else:
+            # One lookup per item of the vocabulary, then one gather per recommendation.
+            novelty = item_novelty(top_n.vocabularies["item"].ids, table)[top_n.items]
+        return segmented_novelty(
+            top_n.list_index, novelty, top_n.n_lists, skip_unknown=True
+        )
+
+    check_columns_exist(top_n, [popularity_definition])
+
+    popularity = top_n.columns[popularity_definition]
+    if popularity_definition in top_n.vocabularies:
+        popularity = top_n.vocabularies[popularity_definition].decode(popularity)
+    novelty = -np.log2(popularity.astype(float))
+    return segmented_novelty(top_n.list_index, novelty, top_n.n_lists)
+
+
+def frame_novelty(
+    top_n: pd.DataFrame, popularity_definition: str = "group", table=None
+) -> np.ndarray:
+    """
+    Compute the novelty of the recommendation list of every user of a long-format DataFrame, without modifying it.
+
+    :param top_n: Top-N recommendations' lists for every user, with items already segmented if table is None.
+    :type top_n: pd.DataFrame
+    :param popularity_definition: Either 'group' or 'percentage' (see Novelty).
+    :type popularity_definition: str, default 'group'
+    :param table: The popularity table of the items (see popularity_table), None to read the popularity_definition column.
+    :type table: tuple, default None
+    :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank'), with popularity_definition if table is None.
+    :return: The novelty of every list (with some item in the table).
+    :rtype: np.ndarray
+    """
+
+    if table is not None:
+        check_columns_exist(top_n, ["user", "item", "rank"])
+        novelty = item_novelty(top_n["item"], table)
+    else:
+        check_columns_exist(top_n, ["user", "item", "rank", popularity_definition])
+        novelty = -np.log2(pd.to_numeric(top_n[popularity_definition]).to_numpy(float))
+
+    users, uniques = pd.factorize(top_n["user"])
+    return segmented_novelty(
+        users, novelty, len(uniques), skip_unknown=table is not None
+    )
+
+
+#: Number of set bits of every byte.
+POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def set_bits(bitset: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """
+    Set the bits of the given codes in a packed bitset, in place.
+
+    :param bitset: The bitset, 8 codes per byte.
+    :type bitset: np.ndarray
+    :param codes: Non-negative codes, each below 8 * len(bitset).
+    :type codes: np.ndarray
+    :return: The bitset.
+    :rtype: np.ndarray
+    """
+
+    codes = np.unique(codes)
+    np.bitwise_or.at(bitset, codes >> 3, (1 << (codes & 7)).astype(np.uint8))
+    return bitset
+
+
+def count_bits(bitset: np.ndarray) -> int:
+    """
+    Count the set bits of a packed bitset.
+
+    :param bitset: The bitset.
+    :type bitset: np.ndarray
+    :return: The number of set bits.
+    :rtype: int
+    """
+
+    return int(POPCOUNT[bitset].sum(dtype=np.int64))
+
+
+def hll_update(registers: np.ndarray, values) -> np.ndarray:
+    """
+    Add values to a HyperLogLog sketch, in place. The values are hashed with pd.util.hash_array,
+    which is stable across processes, so that sketches of different runs can be merged.
+
+    :param registers: The 2 ** precision registers of the sketch.
+    :type registers: np.ndarray
+    :param values: Raw values (e.g., item IDs).
+    :type values: array-like
+    :return: The registers.
+    :rtype: np.ndarray
+    """
+
+    precision = int(len(registers)).bit_length() - 1
+    hashes = pd.util.hash_array(np.asarray(values))
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    # Position of the first set bit among the 32 bits following the index bits.
+    rest = ((hashes >> np.uint64(32 - precision)) & np.uint64(0xFFFFFFFF)).astype(float)
+    with np.errstate(divide="ignore"):
+        ranks = np.where(rest > 0, 32 - np.floor(np.log2(rest)), 33).astype(np.uint8)
+    np.maximum.at(registers, index, ranks)
+    return registers
+
+
+def hll_estimate(registers: np.ndarray) -> float:
+    """
+    Estimate the number of distinct values added to a HyperLogLog sketch,
+    with the linear counting correction for small cardinalities.
+
+    :param registers: The 2 ** precision registers of the sketch.
+    :type registers: np.ndarray
+    :return: The estimated number of distinct values.
+    :rtype: float
+    """
+
+    m = len(registers)
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros > 0:
+        return m * np.log(m / zeros)
+    return estimate
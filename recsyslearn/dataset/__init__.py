@@ -1,19 +1,28 @@
 from __future__ import annotations
 
+from .containers import RecommendationLists, RelevanceIndex
 from .segmentations import (
     ActivitySegmentation,
     DiscreteFeatureSegmentation,
+    IncrementalSegmentation,
     InteractionSegmentation,
     PopularityPercentage,
     Segmentation,
 )
-from .utils import find_relevant_items
+from .utils import find_relevant_items, top_k_lists
+from .vocabulary import Interactions, Vocabulary
 
 __all__ = [
     "Segmentation",
     "ActivitySegmentation",
     "DiscreteFeatureSegmentation",
+    "IncrementalSegmentation",
     "InteractionSegmentation",
     "PopularityPercentage",
     "find_relevant_items",
+    "top_k_lists",
+    "Interactions",
+    "Vocabulary",
+    "RecommendationLists",
+    "RelevanceIndex",
 ]
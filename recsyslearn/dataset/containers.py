@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.utils import check_columns_exist
+
+
+class RecommendationLists:
+
+    """
+    Recommendation lists of every user, stored as flat arrays sorted by (user, rank)
+    with the offsets of every list (i.e., in CSR layout).
+    Build it once with from_frame and pass it to every metric to avoid repeating the
+    per-user groupby and sort work.
+
+    :param users: Code of the user of every list.
+    :type users: np.ndarray
+    :param items: Code of every recommended item, list after list.
+    :type items: np.ndarray
+    :param ranks: Rank of every recommended item.
+    :type ranks: np.ndarray
+    :param offsets: The recommendations of list i are in the slice offsets[i]:offsets[i + 1].
+    :type offsets: np.ndarray
+    :param vocabularies: Vocabularies of the encoded columns ('user', 'item' and, optionally, 'group').
+    :type vocabularies: dict
+    :param columns: Further per-recommendation arrays (e.g., the encoded 'group').
+    :type columns: dict, default None
+    """
+
+    def __init__(
+        self,
+        users: np.ndarray,
+        items: np.ndarray,
+        ranks: np.ndarray,
+        offsets: np.ndarray,
+        vocabularies: dict,
+        columns: dict = None,
+    ) -> None:
+        self.users = users
+        self.items = items
+        self.ranks = ranks
+        self.offsets = offsets
+        self.vocabularies = vocabularies
+        self.columns = {} if columns is None else columns
+
+    @classmethod
+    def from_frame(
+        cls, top_n: pd.DataFrame, vocabularies: dict = None
+    ) -> RecommendationLists:
+        """
+        Build the recommendation lists from a long-format DataFrame.
+        The 'user', 'item' and 'group' columns are encoded, every other column is kept as an array.
+
+        :param top_n: Top-N recommendations' lists for every user. Columns: ['user', 'item', 'rank', ...].
+        :type top_n: pd.DataFrame
+        :param vocabularies: Vocabularies to reuse (and update with unseen IDs), per column.
+        :type vocabularies: dict, default None
+        :raises ColumnsNotExistException: If top_n does not contain columns ('user', 'item', 'rank').
+        :return: The recommendation lists.
+        :rtype: RecommendationLists
+        """
+
+        check_columns_exist(top_n, ["user", "item", "rank"])
+
+        vocabularies = {} if vocabularies is None else vocabularies
+        encoded = {}
+        for col in ("user", "item", "group"):
+            if col not in top_n.columns:
+                continue
+            if col not in vocabularies:
+                vocabularies[col] = Vocabulary.fit(top_n[col])
+            encoded[col] = vocabularies[col].encode(top_n[col], update=True)
+
+        ranks = top_n["rank"].to_numpy()
+        order = np.lexsort((ranks, encoded["user"]))
+        user_codes = encoded.pop("user")[order]
+        users, counts = np.unique(user_codes, return_counts=True)
+
+        columns = {col: values[order] for col, values in encoded.items()}
+        columns.update(
+            {
+                col: top_n[col].to_numpy()[order]
+                for col in top_n.columns
+                if col not in ("user", "item", "rank", "group")
+            }
+        )
+
+        return cls(
+            users=users,
+            items=columns.pop("item"),
+            ranks=ranks[order],
+            offsets=np.concatenate(([0], np.cumsum(counts))),
+            vocabularies=vocabularies,
+            columns=columns,
+        )
+
+    def __len__(self) -> int:
+        return self.items.shape[0]
+
+    @property
+    def n_lists(self) -> int:
+        """
+        Number of recommendation lists, i.e., of users.
+        """
+
+        return self.users.shape[0]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """
+        Length of every recommendation list.
+        """
+
+        return np.diff(self.offsets)
+
+    @property
+    def list_index(self) -> np.ndarray:
+        """
+        Index of the list (i.e., position in users) of every recommendation.
+        """
+
+        return np.repeat(np.arange(self.n_lists), self.lengths)
+
+    @property
+    def user_codes(self) -> np.ndarray:
+        """
+        User code of every recommendation.
+        """
+
+        return np.repeat(self.users, self.lengths)
+
+    def padded(self, max_k: int, fill: int = -1) -> np.ndarray:
+        """
+        Pack the lists in a 2D matrix of item codes, truncated or padded to max_k columns.
+
+        :param max_k: Number of columns of the matrix.
+        :type max_k: int
+        :param fill: Value for the positions after the end of shorter lists.
+        :type fill: int, default -1
+        :return: Matrix of shape (n_lists, max_k).
+        :rtype: np.ndarray
+        """
+
+        list_index = self.list_index
+        positions = np.arange(len(self)) - self.offsets[list_index]
+        keep = positions < max_k
+
+        matrix = np.full((self.n_lists, max_k), fill, dtype=np.int64)
+        matrix[list_index[keep], positions[keep]] = self.items[keep]
+        return matrix
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Decode the lists back to a long-format DataFrame.
+
+        :return: The recommendations in the form ('user', 'item', 'rank', ...).
+        :rtype: pd.DataFrame
+        """
+
+        frame = pd.DataFrame(
+            {
+                "user": self.vocabularies["user"].decode(self.user_codes),
+                "item": self.vocabularies["item"].decode(self.items),
+                "rank": self.ranks,
+            }
+        )
+        for col, values in self.columns.items():
+            frame[col] = (
+                self.vocabularies[col].decode(values)
+                if col in self.vocabularies
+                else values
+            )
+        return frame
+
+
+class RelevanceIndex:
+
+    """
+    Relevant items of every user, sorted per user in a flat array with the offsets
+    of every user (i.e., in CSR layout), with optional graded relevance values.
+
+    :param users: Sorted codes of the users with at least one relevant item.
+    :type users: np.ndarray
+    :param items: Codes of the relevant items, sorted within every user.
+    :type items: np.ndarray
+    :param offsets: The relevant items of users[i] are in the slice offsets[i]:offsets[i + 1].
+    :type offsets: np.ndarray
+    :param vocabularies: Vocabularies of the encoded columns ('user' and 'item').
+    :type vocabularies: dict
+    :param relevance: Graded relevance of every relevant item, None for binary relevance.
+    :type relevance: np.ndarray, default None
+    """
+
+    def __init__(
+        self,
+        users: np.ndarray,
+        items: np.ndarray,
+        offsets: np.ndarray,
+        vocabularies: dict,
+        relevance: np.ndarray = None,
+    ) -> None:
+        self.users = users
+        self.items = items
+        self.offsets = offsets
+        self.vocabularies = vocabularies
+        self.relevance = relevance
+        # Relevance sorted in descending order within every user, computed on the first top_relevance.
+        self._descending = None
+        # Sorted (row, item) keys of the entries, computed on the first positions.
+        self._keys = None
+
+    @classmethod
+    def from_frame(
+        cls, target_df: pd.DataFrame, relevance: str = None, vocabularies: dict = None
+    ) -> RelevanceIndex:
+        """
+        Build the relevance index from the target interactions.
+
+        :param target_df: Target Interaction dataframe of, i.e., items to be recommended. Columns: ['user', 'item'].
+        :type target_df: pd.DataFrame
+        :param relevance: Column of target_df with the graded relevance (e.g., 'rating'), None for binary relevance.
+        :type relevance: str, default None
+        :param vocabularies: Vocabularies to reuse (and update with unseen IDs), per column.
+        :type vocabularies: dict, default None
+        :raises ColumnsNotExistException: If target_df does not contain columns ('user', 'item') and relevance.
+        :return: The relevance index.
+        :rtype: RelevanceIndex
+        """
+
+        check_columns_exist(
+            target_df, ["user", "item"] + ([relevance] if relevance else [])
+        )
+
+        vocabularies = {} if vocabularies is None else vocabularies
+        for col in ("user", "item"):
+            if col not in vocabularies:
+                vocabularies[col] = Vocabulary.fit(target_df[col])
+
+        user_codes = vocabularies["user"].encode(target_df["user"], update=True)
+        item_codes = vocabularies["item"].encode(target_df["item"], update=True)
+        values = (
+            target_df[relevance].to_numpy(dtype=np.float32)
+            if relevance is not None
+            else None
+        )
+        return cls.from_codes(user_codes, item_codes, vocabularies, values)
+
+    @classmethod
+    def from_pos_items(
+        cls, pos_items: pd.DataFrame, vocabularies: dict = None
+    ) -> RelevanceIndex:
+        """
+        Build the relevance index from the output of find_relevant_items.
+        If pos_items has a 'relevance' column, it is used as graded relevance.
+
+        :param pos_items: Relevant items per user. Columns: ['user', 'pos_items'] or ['user', 'pos_items', 'relevance'].
+        :type pos_items: pd.DataFrame
+        :param vocabularies: Vocabularies to reuse (and update with unseen IDs), per column.
+        :type vocabularies: dict, default None
+        :raises ColumnsNotExistException: If pos_items does not contain columns ('user', 'pos_items').
+        :return: The relevance index.
+        :rtype: RelevanceIndex
+        """
+
+        check_columns_exist(pos_items, ["user", "pos_items"])
+
+        lengths = pos_items["pos_items"].map(len).to_numpy()
+        items = (
+            np.concatenate(pos_items["pos_items"].to_numpy())
+            if len(pos_items)
+            else np.array([])
+        )
+        target_df = pd.DataFrame(
+            {"user": np.repeat(pos_items["user"].to_numpy(), lengths), "item": items}
+        )
+        if "relevance" in pos_items.columns:
+            target_df["relevance"] = (
+                np.concatenate(pos_items["relevance"].to_numpy())
+                if len(pos_items)
+                else np.array([])
+            )
+            return cls.from_frame(target_df, "relevance", vocabularies)
+
+        return cls.from_frame(target_df, vocabularies=vocabularies)
+
+    @classmethod
+    def from_codes(
+        cls,
+        user_codes: np.ndarray,
+        item_codes: np.ndarray,
+        vocabularies: dict,
+        relevance: np.ndarray = None,
+    ) -> RelevanceIndex:
+        """
+        Build the relevance index from already encoded (user, item) pairs.
+
+        :param user_codes: User code of every relevant interaction.
+        :type user_codes: np.ndarray
+        :param item_codes: Item code of every relevant interaction.
+        :type item_codes: np.ndarray
+        :param vocabularies: Vocabularies of the codes.
+        :type vocabularies: dict
+        :param relevance: Graded relevance of every relevant interaction.
+        :type relevance: np.ndarray, default None
+        :return: The relevance index.
+        :rtype: RelevanceIndex
+        """
+
+        order = np.lexsort((item_codes, user_codes))
+        users, counts = np.unique(user_codes[order], return_counts=True)
+        return cls(
+            users=users,
+            items=item_codes[order],
+            offsets=np.concatenate(([0], np.cumsum(counts))),
+            vocabularies=vocabularies,
+            relevance=relevance[order] if relevance is not None else None,
+        )
+
+    def __len__(self) -> int:
+        return self.items.shape[0]
+
+    def copy(self) -> RelevanceIndex:
+        """
+        Copy the index, so that its vocabularies can be updated (e.g., with the IDs of the recommendation lists)
+        without affecting the original. The arrays, which are never modified, are shared.
+
+        :return: The copy.
+        :rtype: RelevanceIndex
+        """
+
+        index = RelevanceIndex(
+            self.users,
+            self.items,
+            self.offsets,
+            {col: vocabulary.copy() for col, vocabulary in self.vocabularies.items()},
+            self.relevance,
+        )
+        index._descending = self._descending
+        index._keys = self._keys
+        return index
+
+    def encoded_with(self, vocabularies: dict) -> RelevanceIndex:
+        """
+        Get the index with the codes of the given vocabularies (e.g., the ones of the recommendation lists).
+        The vocabularies are copied before adding the IDs they miss.
+
+        :param vocabularies: The vocabularies of the 'user' and 'item' codes.
+        :type vocabularies: dict
+        :return: The index itself if it already uses the given vocabularies, an encoded copy otherwise.
+        :rtype: RelevanceIndex
+        """
+
+        if all(self.vocabularies[col] is vocabularies[col] for col in ("user", "item")):
+            return self
+
+        return RelevanceIndex.from_frame(
+            self.to_frame(),
+            relevance="relevance" if self.relevance is not None else None,
+            vocabularies={col: vocabularies[col].copy() for col in ("user", "item")},
+        )
+
+    def rows(self, user_codes: np.ndarray) -> np.ndarray:
+        """
+        Find the position in users of the given user codes.
+
+        :param user_codes: User codes.
+        :type user_codes: np.ndarray
+        :return: The positions, with -1 for users without relevant items.
+        :rtype: np.ndarray
+        """
+
+        if len(self.users) == 0:
+            return np.full(np.shape(user_codes), -1)
+        rows = np.minimum(np.searchsorted(self.users, user_codes), len(self.users) - 1)
+        return np.where(self.users[rows] == user_codes, rows, -1)
+
+    def n_relevant(self, user_codes: np.ndarray) -> np.ndarray:
+        """
+        Count the relevant items of the given users.
+
+        :param user_codes: User codes.
+        :type user_codes: np.ndarray
+        :return: The number of relevant items of every user.
+        :rtype: np.ndarray
+        """
+
+        rows = self.rows(user_codes)
+        return np.where(rows >= 0, np.diff(self.offsets)[rows], 0)
+
+    def positions(self, user_codes: np.ndarray, item_codes: np.ndarray) -> np.ndarray:
+        """
+        Find the position in items of the given (user, item) pairs, with a binary search (np.searchsorted)
+        among the (row, item) keys of the index, which are globally sorted since the rows are sorted
+        and the items are sorted within every row.
+        user_codes is broadcast against item_codes, so that, e.g., a column of user codes
+        can be searched against a matrix of recommended items.
+
+        :param user_codes: User codes.
+        :type user_codes: np.ndarray
+        :param item_codes: Item codes.
+        :type item_codes: np.ndarray
+        :return: The positions, with -1 for pairs that are not relevant.
+        :rtype: np.ndarray
+        """
+
+        rows = self.rows(np.asarray(user_codes))
+        rows, item_codes = np.broadcast_arrays(rows, np.asarray(item_codes))
+        if len(self.items) == 0:
+            return np.full(item_codes.shape, -1)
+
+        if self._keys is None:
+            entry_rows = np.repeat(np.arange(len(self.users)), np.diff(self.offsets))
+            self._keys = (entry_rows.astype(np.int64) << 32) | self.items
+        valid = (rows >= 0) & (item_codes >= 0)
+        keys = np.where(
+            valid, (rows.astype(np.int64) << 32) | item_codes.astype(np.int64), -1
+        )
+        positions = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return np.where(valid & (self._keys[positions] == keys), positions, -1)
+
+    def lookup(self, user_codes: np.ndarray, item_codes: np.ndarray) -> np.ndarray:
+        """
+        Get the relevance of the given items for the given users.
+
+        :param user_codes: User codes, broadcast against item_codes.
+        :type user_codes: np.ndarray
+        :param item_codes: Item codes.
+        :type item_codes: np.ndarray
+        :return: The relevance (1 for binary relevance) of every pair, 0 for pairs that are not relevant.
+        :rtype: np.ndarray
+        """
+
+        positions = self.positions(user_codes, item_codes)
+        if self.relevance is None:
+            return (positions >= 0).astype(np.float32)
+        return np.where(positions >= 0, self.relevance[positions], 0).astype(np.float32)
+
+    def top_relevance(self, user_codes: np.ndarray, k: int) -> np.ndarray:
+        """
+        Get the k highest relevance values of the given users, i.e., their ideal ranking.
+        The relevance is sorted within every user once, on the first call, and then sliced.
+
+        :param user_codes: User codes.
+        :type user_codes: np.ndarray
+        :param k: Number of values per user.
+        :type k: int
+        :return: Matrix of shape (len(user_codes), k) with the relevance values sorted in descending order,
+            padded with 0.
+        :rtype: np.ndarray
+        """
+
+        rows = self.rows(user_codes)
+        counts = np.where(rows >= 0, np.minimum(np.diff(self.offsets)[rows], k), 0)
+        query_index = np.repeat(np.arange(len(rows)), counts)
+        positions = np.arange(counts.sum()) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+
+        matrix = np.zeros((len(rows), k), dtype=np.float32)
+        if self.relevance is None:
+            matrix[query_index, positions] = 1
+            return matrix
+
+        if self._descending is None:
+            entry_rows = np.repeat(np.arange(len(self.users)), np.diff(self.offsets))
+            self._descending = self.relevance[np.lexsort((-self.relevance, entry_rows))]
+        matrix[query_index, positions] = self._descending[
+            self.offsets[rows[query_index]] + positions
+        ]
+        return matrix
+
+    def contains(self, user_codes: np.ndarray, item_codes: np.ndarray) -> np.ndarray:
+        """
+        Check whether the given items are relevant for the given users.
+
+        :param user_codes: User codes, broadcast against item_codes.
+        :type user_codes: np.ndarray
+        :param item_codes: Item codes.
+        :type item_codes: np.ndarray
+        :return: Boolean array with the shape of item_codes.
+        :rtype: np.ndarray
+        """
+
+        return self.positions(user_codes, item_codes) >= 0
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Decode the index back to a long-format DataFrame.
+
+        :return: The relevant interactions in the form ('user', 'item') or ('user', 'item', 'relevance').
+        :rtype: pd.DataFrame
+        """
+
+        frame = pd.DataFrame(
+            {
+                "user": self.vocabularies["user"].decode(
+                    np.repeat(self.users, np.diff(self.offsets))
+                ),
+                "item": self.vocabularies["item"].decode(self.items),
+            }
+        )
+        if self.relevance is not None:
+            frame["relevance"] = self.relevance
+        return frame
@@ -1,15 +1,138 @@
+from __future__ import annotations
+
 from abc import ABC
-from collections import Counter
+from collections import deque
+from typing import Iterable
 
 import numpy as np
 import pandas as pd
 
+from recsyslearn.dataset.vocabulary import Vocabulary
 from recsyslearn.errors.errors import (
     InvalidGroupException,
+    InvalidParameterException,
     InvalidValueException,
     SegmentationNotSupportedException,
     WrongProportionsException,
 )
+from recsyslearn.utils import check_columns_exist
+
+
+def _check_proportions(proportions) -> None:
+    """
+    Raise if the proportions of a segmentation are not supported.
+    """
+
+    if not 1 <= len(proportions) <= np.iinfo(np.int8).max:
+        raise SegmentationNotSupportedException(
+            "Number of supported group is between 1 and 127."
+        )
+
+    if not np.isclose(np.sum(proportions), 1):
+        raise WrongProportionsException()
+
+
+def _tiers(counts: np.ndarray, proportions, min_interaction: int = 0) -> np.ndarray:
+    """
+    Assign every entity to a group by its number of interactions, so that the groups get the given
+    proportions of the interactions, from the most popular entities. The counts are sorted once
+    and the groups are found with a binary search of the cumulative sums among the group thresholds.
+    The entities with min_interaction interactions at most are put in the last group.
+    """
+
+    order = np.argsort(-counts, kind="stable")
+    kept = order[counts[order] > min_interaction]
+    cumulative_sum = np.cumsum(counts[kept])
+    n_int = cumulative_sum[-1] if len(kept) > 0 else 0
+
+    # An entity is in group k + 1 if its cumulative sum is below the k-th threshold and not the previous ones.
+    thresholds = np.cumsum(np.rint(np.asarray(proportions[:-1], dtype=float) * n_int))
+    tiers = np.full(len(counts), len(proportions), dtype=np.int8)
+    tiers[kept] = np.minimum(
+        np.searchsorted(thresholds, cumulative_sum, side="right") + 1,
+        len(proportions),
+    )
+    return tiers
+
+
+def _rank_tiers(n: int, proportions) -> np.ndarray:
+    """
+    Assign n ranked entities to groups, so that the groups get the given proportions of the entities,
+    from the first rank. The first group has one entity at least.
+    """
+
+    thresholds = np.cumsum(np.rint(np.asarray(proportions[:-1], dtype=float) * n))
+    thresholds[0] = max(thresholds[0], 1)
+    # The entity at (1-based) rank r is in group k + 1 if r is above the first k thresholds only.
+    return np.minimum(
+        np.searchsorted(thresholds, np.arange(1, n + 1), side="left") + 1,
+        len(proportions),
+    ).astype(np.int8)
+
+
+def _code_counts(values, vocabulary: Vocabulary) -> np.ndarray:
+    """
+    Number of occurrences of every code of the vocabulary, which is updated with the unseen values.
+    """
+
+    codes = vocabulary.encode(values, update=True)
+    return np.bincount(codes[codes >= 0], minlength=len(vocabulary))
+
+
+def _chunk_counts(chunks: Iterable[pd.DataFrame], column: str) -> tuple:
+    """
+    Count the occurrences of every value of a column over a stream of chunks, keeping only
+    a vocabulary of the values and an array of counts in memory. The array grows geometrically,
+    and every chunk only touches the counts of its own values.
+    """
+
+    vocabulary = Vocabulary()
+    counts = np.zeros(0, dtype=np.int64)
+    for chunk in chunks:
+        check_columns_exist(chunk, [column])
+        codes = vocabulary.encode(chunk[column], update=True)
+        codes, chunk_counts = np.unique(codes[codes >= 0], return_counts=True)
+        if len(vocabulary) > len(counts):
+            counts = np.concatenate(
+                (
+                    counts,
+                    np.zeros(
+                        max(len(vocabulary), 2 * len(counts)) - len(counts),
+                        dtype=np.int64,
+                    ),
+                )
+            )
+        counts[codes] += chunk_counts
+    return vocabulary, counts[: len(vocabulary)]
+
+
+def _interaction_frame(
+    ids: np.ndarray, counts: np.ndarray, proportions, min_interaction: int, group: str
+) -> pd.DataFrame:
+    """
+    Groups of InteractionSegmentation from the number of interactions of every entity.
+    """
+
+    tiers = _tiers(counts, proportions, min_interaction)
+    order = np.argsort(-counts, kind="stable")
+    return pd.DataFrame({group: ids[order], "group": tiers[order].astype(str)})
+
+
+def _activity_frame(
+    ids: np.ndarray, counts: np.ndarray, proportions, min_interaction: int, seed
+) -> pd.DataFrame:
+    """
+    Groups of ActivitySegmentation from the number of interactions of every user, with ids sorted.
+    """
+
+    kept = np.flatnonzero(counts >= min_interaction)
+
+    # Sort by decreasing count, then by a random key, in a single pass.
+    keys = np.random.default_rng(seed).random(len(kept))
+    order = kept[np.lexsort((keys, -counts[kept]))]
+    tiers = _rank_tiers(len(order), proportions)
+
+    return pd.DataFrame({"user": ids[order], "group": tiers.astype(str)})
 
 
 class Segmentation(ABC):
@@ -41,16 +164,16 @@ class InteractionSegmentation(Segmentation):
 
         :param dataset: The complete dataset.
         :type dataset: pd.DataFrame
-        :param proportions: The proportion of interactions wanted for every group.
+        :param proportions: The proportion of interactions wanted for every group, from the most popular one.
         :type proportions: list, default [0.8, 0.2]
-        :param min_interaction: The minimum number of interaction allowed for items. Items below this threshold will be removed.
+        :param min_interaction: The minimum number of interaction allowed for items. Items below this threshold will be put in the last group.
         :type min_interaction: int, default 0
         :param group: The group which has to be segmented based on their number of interaction.
         :type group: str, default 'item'
-        :raises SegmentationNotSupportedException: If len(proportions) not in (1, 2, 3).
+        :raises SegmentationNotSupportedException: If len(proportions) not between 1 and 127.
         :raises WrongProportionsException: If sum(proportions) is not 1, which means it doesn't cover all the items/users.
         :raises InvalidGroupException: If group is not equal to 'user' or 'item'.
-        :return: DataFrame with items and belonging group.
+        :return: DataFrame with items and belonging group, from the most popular item.
         :rtype: pd.DataFrame
         """
 
@@ -60,43 +183,105 @@ class InteractionSegmentation(Segmentation):
         if len(proportions) == 1:
             return dataset
 
-        if len(proportions) not in (2, 3):
-            raise SegmentationNotSupportedException(
-                "Number of supported group is between 1 and 3."
-            )
+        _check_proportions(proportions)
 
-        if np.sum(proportions * 10) / 10 != 1:
-            raise WrongProportionsException()
+        if group not in ["user", "item"]:
+            raise InvalidGroupException(group)
+
+        entities, uniques = pd.factorize(dataset[group])
+        counts = np.bincount(entities[entities >= 0], minlength=len(uniques))
+        return _interaction_frame(
+            np.asarray(uniques), counts, proportions, min_interaction, group
+        )
+
+    @classmethod
+    def segment_chunks(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        proportions=None,
+        min_interaction: int = 0,
+        group="item",
+    ) -> pd.DataFrame:
+        """
+        Segmentation of items based on their cumulative interactions, streaming the dataset in chunks
+        (e.g., from pd.read_csv(chunksize=..., usecols=[group]) or one pd.read_parquet per part).
+        Only the number of interactions of every item is kept in memory, so the counts, the thresholds
+        and the groups are exact: returns the same groups of segment on the concatenated chunks.
+
+        :param chunks: The complete dataset, in chunks.
+        :type chunks: Iterable[pd.DataFrame]
+        :param proportions: The proportion of interactions wanted for every group, from the most popular one.
+        :type proportions: list, default [0.8, 0.2]
+        :param min_interaction: The minimum number of interaction allowed for items. Items below this threshold will be put in the last group.
+        :type min_interaction: int, default 0
+        :param group: The group which has to be segmented based on their number of interaction.
+        :type group: str, default 'item'
+        :raises SegmentationNotSupportedException: If len(proportions) not between 1 and 127.
+        :raises WrongProportionsException: If sum(proportions) is not 1, which means it doesn't cover all the items/users.
+        :raises InvalidGroupException: If group is not equal to 'user' or 'item'.
+        :raises ColumnsNotExistException: If a chunk has no group column.
+        :return: DataFrame with items and belonging group, from the most popular item.
+        :rtype: pd.DataFrame
+        """
+
+        if proportions is None:
+            proportions = [0.8, 0.2]
+
+        _check_proportions(proportions)
 
         if group not in ["user", "item"]:
             raise InvalidGroupException(group)
 
-        item_groups = (
-            dataset.groupby(group)
-            .size()
-            .reset_index(name="count")
-            .sort_values("count", ascending=False)
+        vocabulary, counts = _chunk_counts(chunks, group)
+        return _interaction_frame(
+            vocabulary.ids, counts, proportions, min_interaction, group
         )
 
-        tmp = item_groups[item_groups["count"] > min_interaction]
-        n_int = tmp["count"].sum()
+    @classmethod
+    def segment_codes(
+        cls,
+        dataset: pd.DataFrame,
+        proportions=None,
+        min_interaction: int = 0,
+        group="item",
+        vocabulary: Vocabulary = None,
+    ) -> np.ndarray:
+        """
+        Segmentation of items based on their cumulative interactions with different users, as an array of group numbers
+        aligned with the codes of a vocabulary. The groups are the ones of segment, without building the string-typed frame.
+
+        :param dataset: The complete dataset.
+        :type dataset: pd.DataFrame
+        :param proportions: The proportion of interactions wanted for every group, from the most popular one.
+        :type proportions: list, default [0.8, 0.2]
+        :param min_interaction: The minimum number of interaction allowed for items. Items below this threshold will be put in the last group.
+        :type min_interaction: int, default 0
+        :param group: The group which has to be segmented based on their number of interaction.
+        :type group: str, default 'item'
+        :param vocabulary: The vocabulary of the items (e.g., of the recommendation lists), updated with the unseen ones of dataset.
+            None for Vocabulary.fit(dataset[group]).
+        :type vocabulary: Vocabulary, default None
+        :raises SegmentationNotSupportedException: If len(proportions) not between 1 and 127.
+        :raises WrongProportionsException: If sum(proportions) is not 1, which means it doesn't cover all the items/users.
+        :raises InvalidGroupException: If group is not equal to 'user' or 'item'.
+        :return: The int8 group (from 1, the most popular one) of every code, -1 for the codes not in dataset.
+        :rtype: np.ndarray
+        """
+
+        if proportions is None:
+            proportions = [0.8, 0.2]
+
+        _check_proportions(proportions)
 
-        short_thr = np.rint(proportions[0] * n_int)
-        mid_thr = np.rint(proportions[1] * n_int) + short_thr
-        tmp.loc[:, "cumulative_sum"] = tmp["count"].cumsum()
+        if group not in ["user", "item"]:
+            raise InvalidGroupException(group)
 
-        short_head = tmp.loc[tmp["cumulative_sum"].lt(short_thr), group]
-        mid_tail = tmp.loc[
-            tmp["cumulative_sum"].lt(mid_thr) & ~tmp[group].isin(short_head), group
-        ]
-        conditions = [
-            item_groups[group].isin(short_head),
-            item_groups[group].isin(mid_tail),
-        ]
-        choices = (1, 2)
-        default = len(proportions)
-        item_groups.loc[:, "group"] = np.select(conditions, choices, default=default)
-        return item_groups[[group, "group"]].astype({f"{group}": str, "group": str})
+        if vocabulary is None:
+            vocabulary = Vocabulary.fit(dataset[group])
+        counts = _code_counts(dataset[group], vocabulary)
+        tiers = _tiers(counts, proportions, min_interaction)
+        tiers[counts == 0] = -1
+        return tiers
 
 
 class PopularityPercentage(Segmentation):
@@ -114,23 +299,59 @@ class PopularityPercentage(Segmentation):
         :type dataset: pd.DataFrame
         :param group: Whether to calculate the popularity of users or items.
         :type group: str, default 'item'
-        :return: DataFrame with items/user and corresponding popularity.
+        :return: DataFrame with items/user and corresponding popularity, in order of first interaction.
         :rtype: pd.DataFrame
         """
 
-        item_interactions = dataset[group].values
-        total_interactions = len(item_interactions)
-        inter_counter = Counter(item_interactions)
-        inter_counter = {
-            item: counts / total_interactions for item, counts in inter_counter.items()
-        }
+        # An empty vocabulary gets the codes in order of appearance.
+        vocabulary = Vocabulary()
+        counts = _code_counts(dataset[group], vocabulary)
+        return pd.DataFrame(
+            {group: vocabulary.ids, "percentage": counts / max(counts.sum(), 1)}
+        )
 
-        popularity_dataframe = pd.DataFrame.from_dict(
-            inter_counter, orient="index"
-        ).reset_index()
-        popularity_dataframe.columns = [group, "percentage"]
+    @classmethod
+    def popularity(
+        cls,
+        dataset: pd.DataFrame,
+        group: str = "item",
+        vocabulary: Vocabulary = None,
+        log: bool = False,
+        rank: bool = False,
+    ) -> dict:
+        """
+        Calculate item or user popularity based on the percentage of interaction they have, as arrays indexed by
+        the codes of a vocabulary. The log-popularity and the popularity rank are computed from the same counts.
 
-        return popularity_dataframe
+        :param dataset: The complete dataset.
+        :type dataset: pd.DataFrame
+        :param group: Whether to calculate the popularity of users or items.
+        :type group: str, default 'item'
+        :param vocabulary: The vocabulary of the items/users, updated with the unseen ones of dataset.
+            None for Vocabulary.fit(dataset[group]).
+        :type vocabulary: Vocabulary, default None
+        :param log: Whether to also return the log2 of the popularity (i.e., minus the novelty of every item).
+        :type log: bool, default False
+        :param rank: Whether to also return the popularity rank (1 for the most popular item/user).
+        :type rank: bool, default False
+        :return: The float32 'percentage' of every code (0 for the codes not in dataset),
+            with the float32 'log_percentage' (-inf for the codes not in dataset) and the int32 'rank' if requested.
+        :rtype: dict
+        """
+
+        if vocabulary is None:
+            vocabulary = Vocabulary.fit(dataset[group])
+        counts = _code_counts(dataset[group], vocabulary)
+
+        popularity = {"percentage": (counts / max(counts.sum(), 1)).astype(np.float32)}
+        if log:
+            with np.errstate(divide="ignore"):
+                popularity["log_percentage"] = np.log2(popularity["percentage"])
+        if rank:
+            ranks = np.empty(len(counts), dtype=np.int32)
+            ranks[np.argsort(-counts, kind="stable")] = np.arange(1, len(counts) + 1)
+            popularity["rank"] = ranks
+        return popularity
 
 
 class ActivitySegmentation(Segmentation):
@@ -141,20 +362,30 @@ class ActivitySegmentation(Segmentation):
 
     @classmethod
     def segment(
-        cls, dataset: pd.DataFrame, proportions=None, min_interaction: int = 0
+        cls,
+        dataset: pd.DataFrame,
+        proportions=None,
+        min_interaction: int = 0,
+        seed=None,
     ) -> pd.DataFrame:
         """
         Segmentation of users based on their interactions with different items.
+        The users are ranked by their number of interactions, from the most active one, and the first
+        proportions[0] of them are put in the first group, the next proportions[1] in the second, and so on.
+        Users with the same number of interactions are ordered at random.
 
         :param dataset: The complete dataset.
         :type dataset: pd.DataFrame
-        :param proportions: The proportion of interactions wanted for every group.
-        :type proportions: list, default [0.8, 0.2]
+        :param proportions: The proportion of users wanted for every group, from the most active one.
+        :type proportions: list, default [0.1, 0.9]
         :param min_interaction: The minimum number of interaction allowed per user. Users below this threshold will be removed.
         :type min_interaction: int, default 0
-        :raises SegmentationNotSupportedException: If len(proportion) not in (1, 2, 3).
+        :param seed: The seed (or generator) of the random order of the users with the same number of interactions.
+            The same seed gives the same groups, whatever the order of the rows of dataset.
+        :type seed: int or np.random.Generator, default None
+        :raises SegmentationNotSupportedException: If len(proportions) not between 1 and 127.
         :raises WrongProportionsException: If sum(proportion) is not 1, which means it doesn't cover all the items/users.
-        :return: DataFrame with users and belonging group.
+        :return: DataFrame with users and belonging group, from the most active user.
         :rtype: pd.DataFrame
         """
 
@@ -164,37 +395,54 @@ class ActivitySegmentation(Segmentation):
         if len(proportions) == 1:
             return dataset
 
-        if len(proportions) not in (2, 3):
-            raise SegmentationNotSupportedException(
-                "Number of supported group is between 1 and 3."
-            )
+        _check_proportions(proportions)
 
-        if np.sum(proportions * 10) / 10 != 1:
-            raise WrongProportionsException()
+        users, uniques = pd.factorize(dataset["user"], sort=True)
+        counts = np.bincount(users[users >= 0], minlength=len(uniques))
+        return _activity_frame(
+            np.asarray(uniques), counts, proportions, min_interaction, seed
+        )
 
-        user_groups = dataset.groupby("user").size().reset_index(name="count")
-        user_groups = user_groups.loc[user_groups["count"] >= min_interaction, :]
+    @classmethod
+    def segment_chunks(
+        cls,
+        chunks: Iterable[pd.DataFrame],
+        proportions=None,
+        min_interaction: int = 0,
+        seed=None,
+    ) -> pd.DataFrame:
+        """
+        Segmentation of users based on their interactions, streaming the dataset in chunks
+        (e.g., from pd.read_csv(chunksize=..., usecols=['user']) or one pd.read_parquet per part).
+        Only the number of interactions of every user is kept in memory, so the counts, the thresholds
+        and the groups are exact: returns the same groups of segment on the concatenated chunks, with the same seed.
+
+        :param chunks: The complete dataset, in chunks.
+        :type chunks: Iterable[pd.DataFrame]
+        :param proportions: The proportion of users wanted for every group, from the most active one.
+        :type proportions: list, default [0.1, 0.9]
+        :param min_interaction: The minimum number of interaction allowed per user. Users below this threshold will be removed.
+        :type min_interaction: int, default 0
+        :param seed: The seed (or generator) of the random order of the users with the same number of interactions.
+        :type seed: int or np.random.Generator, default None
+        :raises SegmentationNotSupportedException: If len(proportions) not between 1 and 127.
+        :raises WrongProportionsException: If sum(proportion) is not 1, which means it doesn't cover all the items/users.
+        :raises ColumnsNotExistException: If a chunk has no 'user' column.
+        :return: DataFrame with users and belonging group, from the most active user.
+        :rtype: pd.DataFrame
+        """
 
-        user_groups.loc[:, "count"] = user_groups.loc[:, "count"].apply(
-            lambda x: x + np.random.choice(list(range(10)))
-        )
-        user_groups = user_groups.sort_values("count", ascending=False)
-        user_groups.loc[:, "count"] = np.arange(user_groups.shape[0]) + 1
-        first_thr = np.rint(proportions[0] * user_groups.shape[0])
-        second_thr = np.rint(proportions[1] * user_groups.shape[0]) + first_thr
-        first_thr = first_thr if first_thr > 0 else 1
-        first_group = user_groups.loc[user_groups["count"] <= first_thr, "user"]
-        second_group = user_groups.loc[user_groups["count"].lt(second_thr), "user"]
+        if proportions is None:
+            proportions = [0.1, 0.9]
 
-        conditions = [
-            user_groups["user"].isin(first_group),
-            user_groups["user"].isin(second_group),
-        ]
-        choices = (1, 2)
-        default = len(proportions)
-        user_groups.loc[:, "group"] = np.select(conditions, choices, default=default)
+        _check_proportions(proportions)
 
-        return user_groups[["user", "group"]].astype({"user": str, "group": str})
+        vocabulary, counts = _chunk_counts(chunks, "user")
+        # The random keys are drawn in the order of the sorted users, as in segment.
+        order = pd.Index(vocabulary.ids).argsort()
+        return _activity_frame(
+            vocabulary.ids[order], counts[order], proportions, min_interaction, seed
+        )
 
 
 class DiscreteFeatureSegmentation(Segmentation):
@@ -230,3 +478,150 @@ class DiscreteFeatureSegmentation(Segmentation):
         )
         feature = feature.rename({str(feature.columns[1]): "group"}, axis="columns")
         return feature
+
+
+class IncrementalSegmentation(Segmentation):
+
+    """
+    Segmentation of users or items kept up to date as new interactions arrive, without rescanning the whole log.
+    The number of interactions of every entity is maintained, and the groups are recomputed from these counts
+    as in InteractionSegmentation (by cumulative interactions) or ActivitySegmentation (by rank).
+
+    With decay, the counts are multiplied by decay at every update, so that older interactions weigh less.
+    With window, only the interactions of the last window updates are counted: the sparse counts of every update
+    in the window are kept, to be removed once the update expires.
+
+    :param method: Either 'interaction', for the groups of InteractionSegmentation, or 'activity', for the ones of ActivitySegmentation.
+    :type method: str, default 'interaction'
+    :param proportions: The proportion of interactions (or entities, for 'activity') wanted for every group, from the most popular one.
+    :type proportions: list, default [0.8, 0.2] for 'interaction', [0.1, 0.9] for 'activity'
+    :param min_interaction: The minimum number of interaction allowed (see InteractionSegmentation and ActivitySegmentation).
+    :type min_interaction: int, default 0
+    :param group: The entity to segment, either 'user' or 'item'.
+    :type group: str, default 'item' for 'interaction', 'user' for 'activity'
+    :param decay: The factor in (0, 1] by which the counts are multiplied at every update, None for no decay.
+    :type decay: float, default None
+    :param window: Number of updates counted, None for every update since the start.
+    :type window: int, default None
+    :param seed: The seed (or generator) of the random order of the entities with the same count, for 'activity'.
+    :type seed: int or np.random.Generator, default None
+    :raises SegmentationNotSupportedException: If method is not 'interaction' or 'activity', or len(proportions) not between 1 and 127.
+    :raises WrongProportionsException: If sum(proportions) is not 1, which means it doesn't cover all the items/users.
+    :raises InvalidGroupException: If group is not equal to 'user' or 'item'.
+    :raises InvalidParameterException: If decay is not in (0, 1] or window is lower than 1.
+    """
+
+    DEFAULTS = {"interaction": ("item", [0.8, 0.2]), "activity": ("user", [0.1, 0.9])}
+
+    def __init__(
+        self,
+        method: str = "interaction",
+        proportions=None,
+        min_interaction: int = 0,
+        group: str = None,
+        decay: float = None,
+        window: int = None,
+        seed=None,
+    ) -> None:
+        super().__init__()
+        if method not in self.DEFAULTS:
+            raise SegmentationNotSupportedException(
+                f"{method} segmentation is not supported."
+            )
+        default_group, default_proportions = self.DEFAULTS[method]
+        self.method = method
+        self.group = default_group if group is None else group
+        self.proportions = default_proportions if proportions is None else proportions
+        _check_proportions(self.proportions)
+        if self.group not in ["user", "item"]:
+            raise InvalidGroupException(self.group)
+        if decay is not None and not 0 < decay <= 1:
+            raise InvalidParameterException("decay", decay, "None or a float in (0, 1]")
+        if window is not None and window < 1:
+            raise InvalidParameterException("window", window, "None or an integer >= 1")
+
+        self.min_interaction = min_interaction
+        self.decay = decay
+        self.window = window
+        self.rng = np.random.default_rng(seed)
+        self.vocabulary = Vocabulary()
+        self.counts = np.zeros(0, dtype=float if decay is not None else np.int64)
+        # Random key of every entity, to order the ones with the same count for 'activity'.
+        self.keys = np.zeros(0)
+        self.batches = deque()
+
+    def update(self, dataset: pd.DataFrame) -> IncrementalSegmentation:
+        """
+        Add new interactions to the counts, removing the expired ones.
+
+        :param dataset: The new interactions.
+        :type dataset: pd.DataFrame
+        :raises ColumnsNotExistException: If dataset has no group column.
+        :return: The segmentation itself.
+        :rtype: IncrementalSegmentation
+        """
+
+        check_columns_exist(dataset, [self.group])
+
+        codes = self.vocabulary.encode(dataset[self.group], update=True)
+        n_new = len(self.vocabulary) - len(self.counts)
+        self.counts = np.concatenate((self.counts, np.zeros(n_new, self.counts.dtype)))
+        self.keys = np.concatenate((self.keys, self.rng.random(n_new)))
+
+        if self.decay is not None:
+            self.counts *= self.decay
+        if self.window is not None and len(self.batches) == self.window:
+            expired, expired_counts = self.batches.popleft()
+            if self.decay is not None:
+                expired_counts = expired_counts * self.decay**self.window
+            after = self.counts[expired] - expired_counts
+            # The decayed counts of an expired update may leave rounding residues.
+            after[np.isclose(after, 0)] = 0
+            self.counts[expired] = after
+
+        codes, counts = np.unique(codes[codes >= 0], return_counts=True)
+        self.counts[codes] += counts
+        if self.window is not None:
+            self.batches.append((codes, counts))
+        return self
+
+    def segment_codes(self) -> np.ndarray:
+        """
+        The current group of every code of the vocabulary.
+
+        :return: The int8 group (from 1, the most popular one) of every code,
+            -1 for the codes without interactions (or removed, for 'activity').
+        :rtype: np.ndarray
+        """
+
+        if self.method == "interaction":
+            tiers = _tiers(self.counts, self.proportions, self.min_interaction)
+            tiers[self.counts == 0] = -1
+            return tiers
+
+        tiers = np.full(len(self.counts), -1, dtype=np.int8)
+        kept = np.flatnonzero((self.counts > 0) & (self.counts >= self.min_interaction))
+        order = kept[np.lexsort((self.keys[kept], -self.counts[kept]))]
+        tiers[order] = _rank_tiers(len(order), self.proportions)
+        return tiers
+
+    def segment(self) -> pd.DataFrame:
+        """
+        The current groups, in the form of the output of InteractionSegmentation or ActivitySegmentation.
+
+        :return: DataFrame with entities and belonging group, from the most popular one.
+        :rtype: pd.DataFrame
+        """
+
+        tiers = self.segment_codes()
+        listed = np.flatnonzero(tiers > 0)
+        if self.method == "interaction":
+            order = listed[np.argsort(-self.counts[listed], kind="stable")]
+        else:
+            order = listed[np.lexsort((self.keys[listed], -self.counts[listed]))]
+        return pd.DataFrame(
+            {
+                self.group: self.vocabulary.decode(order),
+                "group": tiers[order].astype(str),
+            }
+        )
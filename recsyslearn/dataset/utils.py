@@ -1,22 +1,150 @@
+from __future__ import annotations
+
+from typing import Iterator
+
 import numpy as np
 import pandas as pd
 
+from recsyslearn.dataset.containers import RecommendationLists, RelevanceIndex
+from recsyslearn.dataset.vocabulary import Vocabulary
 from recsyslearn.utils import check_columns_exist
 
 
-def find_relevant_items(target_df: pd.DataFrame) -> pd.DataFrame:
+def find_relevant_items(
+    target_df: pd.DataFrame, *, relevance: str = None, as_index: bool = False
+) -> pd.DataFrame | RelevanceIndex:
     """
     Find relevant items for every user in the dataset.
 
     :param target_df: Target Interaction dataframe of, i.e., items to be recommended. Columns: ['user', 'item'].
     :type target_df: pd.DataFrame
-    :raises ColumnsNotExistException: If target_df does not contain columns ('user', 'item').
-    :return: The DataFrame containing all the relevant items per user in the form ('user', 'pos_items').
-    :rtype: pd.DataFrame
+    :param relevance: Column of target_df with the graded relevance of the items (e.g., 'rating'),
+        None for binary relevance.
+    :type relevance: str, default None
+    :param as_index: Whether to return a RelevanceIndex, which stores the relevant items in flat arrays
+        instead of one array per user.
+    :type as_index: bool, default False
+    :raises ColumnsNotExistException: If target_df does not contain columns ('user', 'item') and relevance.
+    :return: The DataFrame containing all the relevant items per user in the form ('user', 'pos_items'),
+        or ('user', 'pos_items', 'relevance') for graded relevance, or the corresponding RelevanceIndex.
+    :rtype: pd.DataFrame or RelevanceIndex
     """
 
-    check_columns_exist(target_df, ["user", "item"])
+    check_columns_exist(
+        target_df, ["user", "item"] + ([relevance] if relevance else [])
+    )
+
+    if as_index:
+        return RelevanceIndex.from_frame(target_df, relevance)
+
+    if relevance is not None:
+        grouped = target_df.groupby("user")
+        pos_items = pd.DataFrame(
+            {
+                "pos_items": grouped["item"].apply(np.asarray),
+                "relevance": grouped[relevance].apply(np.asarray),
+            }
+        ).reset_index()
+        pos_items.columns = ["user", "pos_items", "relevance"]
+        return pos_items
+
     target_df = target_df[["user", "item"]]
     pos_items = target_df.groupby("user")["item"].apply(np.asarray).reset_index()
     pos_items.columns = ["user", "pos_items"]
     return pos_items
+
+
+def top_k_lists(
+    scores,
+    k: int,
+    users=None,
+    items=None,
+    exclude: pd.DataFrame = None,
+    vocabularies: dict = None,
+    batch_size: int = 1024,
+) -> Iterator[RecommendationLists]:
+    """
+    Extract the top-k recommendation lists from a user x item score matrix, batch of rows after batch of rows,
+    without building a long-format DataFrame.
+
+    :param scores: Score of every item (column) for every user (row), e.g., the output of a model.
+        Sparse matrices are supported through their toarray method, applied to one batch at a time.
+    :type scores: np.ndarray or sparse matrix
+    :param k: Length of the lists, shorter for the users with fewer than k items left after exclude.
+    :type k: int
+    :param users: User ID of every row, by default the row index.
+    :type users: array-like, default None
+    :param items: Item ID of every column, by default the column index.
+    :type items: array-like, default None
+    :param exclude: Interactions never to be recommended (e.g., the training ones). Columns: ['user', 'item'].
+    :type exclude: pd.DataFrame, default None
+    :param vocabularies: Vocabularies to reuse (and update with unseen IDs), e.g. the ones of a RelevanceIndex.
+    :type vocabularies: dict, default None
+    :param batch_size: Number of rows scored at a time.
+    :type batch_size: int, default 1024
+    :raises ColumnsNotExistException: If exclude does not contain columns ('user', 'item').
+    :return: The recommendation lists of every batch of rows.
+    :rtype: Iterator[RecommendationLists]
+    """
+
+    n_users, n_items = scores.shape
+    k = min(k, n_items)
+    users = np.arange(n_users) if users is None else np.asarray(users)
+    items = np.arange(n_items) if items is None else np.asarray(items)
+
+    vocabularies = {} if vocabularies is None else vocabularies
+    user_codes = vocabularies.setdefault("user", Vocabulary()).encode(
+        users, update=True
+    )
+    item_codes = vocabularies.setdefault("item", Vocabulary()).encode(
+        items, update=True
+    )
+
+    if exclude is not None:
+        check_columns_exist(exclude, ["user", "item"])
+        # Codes of the excluded interactions are row and column positions.
+        positions = {"user": Vocabulary(users), "item": Vocabulary(items)}
+        known = (positions["user"].encode(exclude["user"]) >= 0) & (
+            positions["item"].encode(exclude["item"]) >= 0
+        )
+        exclude = RelevanceIndex.from_frame(exclude[known], vocabularies=positions)
+
+    for start in range(0, n_users, batch_size):
+        stop = min(start + batch_size, n_users)
+        batch = scores[start:stop]
+        batch = batch.toarray() if hasattr(batch, "toarray") else np.asarray(batch)
+        costs = np.negative(batch, dtype=np.promote_types(batch.dtype, np.float32))
+        excluded = np.zeros(costs.shape, dtype=bool)
+
+        if exclude is not None:
+            lo, hi = np.searchsorted(exclude.users, [start, stop])
+            rows = np.repeat(
+                exclude.users[lo:hi], np.diff(exclude.offsets[lo : hi + 1])
+            )
+            excluded[
+                rows - start, exclude.items[exclude.offsets[lo] : exclude.offsets[hi]]
+            ] = True
+            costs[excluded] = np.inf
+
+        top = (
+            np.argpartition(costs, k - 1, axis=1)[:, :k]
+            if k < n_items
+            else np.tile(np.arange(n_items), (stop - start, 1))
+        )
+        order = np.argsort(
+            np.take_along_axis(costs, top, axis=1), axis=1, kind="stable"
+        )
+        top = np.take_along_axis(top, order, axis=1)
+
+        rows = np.argsort(user_codes[start:stop], kind="stable")
+        # Excluded items are dropped rather than ranked last, which shortens the lists of the users
+        # with fewer than k items left; users with none left have no list.
+        kept = ~np.take_along_axis(excluded, top, axis=1)[rows]
+        lengths = kept.sum(axis=1)
+        yield RecommendationLists(
+            users=user_codes[start:stop][rows][lengths > 0],
+            items=item_codes[top[rows][kept]],
+            ranks=np.cumsum(kept, axis=1)[kept],
+            offsets=np.concatenate(([0], np.cumsum(lengths[lengths > 0]))),
+            vocabularies=vocabularies,
+        )
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.utils import check_columns_exist
+
+
+class Vocabulary:
+
+    """
+    Bidirectional mapping between raw identifiers (e.g., user or item IDs) and dense int32 codes.
+    """
+
+    def __init__(self, ids=None) -> None:
+        # The identifiers are split in levels of decreasing size, each with its own hash table,
+        # so that adding identifiers never rebuilds the hash table of the whole vocabulary.
+        self._levels = [pd.Index([] if ids is None else ids)]
+        self._ids = None
+
+    @classmethod
+    def fit(cls, values) -> Vocabulary:
+        """
+        Build a vocabulary from the sorted unique values of the input.
+
+        :param values: Raw identifiers.
+        :type values: array-like
+        :return: The fitted vocabulary.
+        :rtype: Vocabulary
+        """
+
+        return cls(pd.Index(pd.unique(np.asarray(values))).sort_values())
+
+    def __len__(self) -> int:
+        return sum(len(level) for level in self._levels)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """
+        The raw identifiers, where the position of every identifier is its code.
+        """
+
+        if self._ids is None:
+            self._ids = self._levels[0].append(self._levels[1:]).to_numpy()
+        return self._ids
+
+    def copy(self) -> Vocabulary:
+        """
+        Copy the vocabulary, so that the copy can be updated without affecting the original.
+
+        :return: The copy.
+        :rtype: Vocabulary
+        """
+
+        vocabulary = Vocabulary()
+        vocabulary._levels = list(self._levels)
+        return vocabulary
+
+    def update(self, values) -> Vocabulary:
+        """
+        Add unseen identifiers at the end of the vocabulary, so that existing codes are preserved.
+        The unseen identifiers form a new level, and the last two levels are merged until every level
+        is at least twice as large as the next one: there are O(log n) levels, and an identifier is
+        hashed again only when its level grows by half, so O(log n) times in total.
+
+        :param values: Raw identifiers.
+        :type values: array-like
+        :return: The vocabulary itself.
+        :rtype: Vocabulary
+        """
+
+        values = pd.unique(np.asarray(values))
+        self._add(values[self._get_indexer(values) < 0])
+        return self
+
+    def _add(self, unseen: np.ndarray) -> None:
+        """
+        Add identifiers known to be unseen as a new level, merging the last levels.
+        """
+
+        if len(self) == 0:
+            self._levels = [pd.Index(unseen)]
+        elif len(unseen) > 0:
+            self._levels.append(pd.Index(unseen))
+            while len(self._levels) > 1 and 2 * len(self._levels[-1]) > len(
+                self._levels[-2]
+            ):
+                last = self._levels.pop()
+                self._levels[-1] = self._levels[-1].append(last)
+        else:
+            return
+        self._ids = None
+
+    def _get_indexer(self, values: np.ndarray) -> np.ndarray:
+        """
+        Codes of the given identifiers, looked up level by level, -1 for the ones not in the vocabulary.
+        """
+
+        codes = self._levels[0].get_indexer(values)
+        offset = len(self._levels[0])
+        for level in self._levels[1:]:
+            missing = np.flatnonzero(codes < 0)
+            if len(missing) == 0:
+                break
+            found = level.get_indexer(values[missing])
+            codes[missing] = np.where(found >= 0, found + offset, -1)
+            offset += len(level)
+        return codes
+
+    def encode(self, values, update: bool = False) -> np.ndarray:
+        """
+        Map raw identifiers to their codes.
+
+        :param values: Raw identifiers.
+        :type values: array-like
+        :param update: Whether to add unseen identifiers to the vocabulary.
+        :type update: bool, default False
+        :return: The int32 codes, with -1 for identifiers not in the vocabulary.
+        :rtype: np.ndarray
+        """
+
+        # Every distinct identifier is looked up once.
+        inverse, uniques = pd.factorize(np.asarray(values), use_na_sentinel=False)
+        codes = self._get_indexer(np.asarray(uniques))
+        if update and np.any(codes < 0):
+            unseen = codes < 0
+            codes[unseen] = len(self) + np.arange(np.count_nonzero(unseen))
+            self._add(np.asarray(uniques)[unseen])
+        return codes[inverse].astype(np.int32)
+
+    def decode(self, codes) -> np.ndarray:
+        """
+        Map codes back to the raw identifiers.
+
+        :param codes: Codes returned by encode.
+        :type codes: array-like
+        :return: The raw identifiers.
+        :rtype: np.ndarray
+        """
+
+        return self.ids[np.asarray(codes)]
+
+
+class Interactions:
+
+    """
+    Interactions (or recommendations) with user, item and group IDs encoded as dense int32 codes.
+    The encoded DataFrame can be passed to every metric and segmentation in place of the raw one.
+    """
+
+    ENCODED_COLUMNS = ("user", "item", "group")
+
+    def __init__(self, frame: pd.DataFrame, vocabularies: dict) -> None:
+        self.frame = frame
+        self.vocabularies = vocabularies
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, vocabularies: dict = None) -> Interactions:
+        """
+        Encode the 'user', 'item' and 'group' columns of a DataFrame.
+        Passing the vocabularies of other Interactions (e.g., of the test set when encoding the
+        recommendation lists) makes the codes of the two comparable.
+
+        :param df: Interactions in the form ('user', 'item', ...).
+        :type df: pd.DataFrame
+        :param vocabularies: Vocabularies to reuse (and update with unseen IDs), per column.
+        :type vocabularies: dict, default None
+        :raises ColumnsNotExistException: If df does not contain columns ('user', 'item').
+        :return: The encoded interactions.
+        :rtype: Interactions
+        """
+
+        check_columns_exist(df, ["user", "item"])
+
+        vocabularies = {} if vocabularies is None else vocabularies
+        frame = df.copy()
+        for col in cls.ENCODED_COLUMNS:
+            if col not in frame.columns:
+                continue
+            if col not in vocabularies:
+                vocabularies[col] = Vocabulary.fit(frame[col])
+            frame[col] = vocabularies[col].encode(frame[col], update=True)
+
+        return cls(frame, vocabularies)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def decode(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Map the encoded columns of a DataFrame (by default, the interactions) back to the raw IDs.
+
+        :param df: DataFrame with encoded columns, e.g. the output of a metric.
+        :type df: pd.DataFrame, default None
+        :return: A copy of the DataFrame with raw IDs.
+        :rtype: pd.DataFrame
+        """
+
+        df = self.frame if df is None else df
+        return df.assign(
+            **{
+                col: vocabulary.decode(df[col])
+                for col, vocabulary in self.vocabularies.items()
+                if col in df.columns
+            }
+        )
@@ -2,18 +2,28 @@ from __future__ import annotations
 
 from .errors import (
     ColumnsNotExistException,
+    IncompatibleAccumulatorsException,
+    InvalidDiscountException,
     InvalidGroupException,
+    InvalidParameterException,
     InvalidValueException,
+    MetricNotTrackedException,
     RecListTooShortException,
     SegmentationNotSupportedException,
+    TargetGroupsNotFoundException,
     WrongProportionsException,
 )
 
 __all__ = [
     "ColumnsNotExistException",
+    "IncompatibleAccumulatorsException",
+    "InvalidDiscountException",
     "InvalidGroupException",
+    "InvalidParameterException",
     "InvalidValueException",
+    "MetricNotTrackedException",
     "RecListTooShortException",
     "SegmentationNotSupportedException",
+    "TargetGroupsNotFoundException",
     "WrongProportionsException",
 ]
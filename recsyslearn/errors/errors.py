@@ -55,3 +55,45 @@ class InvalidGroupException(Exception):
 
     def __init__(self, user_group) -> None:
         super().__init__(f"{user_group} is not a valid group")
+
+
+class InvalidDiscountException(Exception):
+
+    """Exception raised when user wants to compute the exposure with a non valid discount"""
+
+    def __init__(self, discount) -> None:
+        super().__init__(f"{discount} is not a valid discount")
+
+
+class MetricNotTrackedException(Exception):
+
+    """Exception raised when user asks a monitor for a metric it has not been set up to track"""
+
+    def __init__(self, metric) -> None:
+        super().__init__(f"{metric} is not tracked")
+
+
+class TargetGroupsNotFoundException(Exception):
+
+    """Exception raised when none of the groups of a target representation is a group of the recommendations"""
+
+    def __init__(self, n_groups) -> None:
+        super().__init__(
+            f"None of the {n_groups} target groups is a group of the recommendations, check that their dtypes match"
+        )
+
+
+class IncompatibleAccumulatorsException(Exception):
+
+    """Exception raised when user merges accumulators whose running states cannot be combined"""
+
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+
+class InvalidParameterException(ValueError):
+
+    """Exception raised when user passes a parameter outside of its valid range"""
+
+    def __init__(self, name: str, value, expected: str) -> None:
+        super().__init__(f"{name}={value} is not valid, expected {expected}")
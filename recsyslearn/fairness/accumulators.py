@@ -0,0 +1,497 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.fairness.utils import (
+    cell_keys,
+    entropy,
+    kullback_leibler,
+    lists_weights,
+    mutual_information,
+    relevance_table,
+    segmentation_frames,
+)
+from recsyslearn.utils import Accumulator, check_columns_exist
+
+
+def _encoded(
+    chunk: pd.DataFrame | RecommendationLists, vocabularies: dict, columns: list
+) -> RecommendationLists:
+    """
+    Encode a chunk of recommendations, with the given further columns, with the vocabularies of an accumulator.
+    """
+
+    if isinstance(chunk, RecommendationLists):
+        check_columns_exist(chunk, columns)
+        if chunk.vocabularies is vocabularies:
+            return chunk
+        return RecommendationLists.from_frame(chunk.to_frame(), vocabularies)
+
+    check_columns_exist(chunk, ["user", "item", "rank", *columns])
+    return RecommendationLists.from_frame(chunk, vocabularies)
+
+
+class GroupExposureAccumulator(Accumulator):
+
+    """
+    Running exposure (or effectiveness, if rel_matrix is given) of every group, for chunked evaluation
+    of the fairness metrics. The chunks share the vocabularies, so that only one total per group
+    (and per (entity, group) pair, if entity is given) is kept between chunks.
+
+    :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+    :type rel_matrix: pd.DataFrame, default None
+    :param entity: Whether to also keep the totals per ('user' or 'item', group) pair.
+    :type entity: str, default None
+    :param raw_ranks: Whether to also keep the total rank of every group, which Entropy uses without rel_matrix.
+    :type raw_ranks: bool, default False
+    :param vocabularies: Vocabularies of the recommendation lists that will be passed to update.
+    :type vocabularies: dict, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    """
+
+    shared = ("relevance",)
+
+    def __init__(
+        self,
+        rel_matrix: pd.DataFrame = None,
+        entity: str = None,
+        raw_ranks: bool = False,
+        vocabularies: dict = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        self.vocabularies = {} if vocabularies is None else vocabularies
+        self.relevance = (
+            relevance_table(rel_matrix, self.vocabularies, update=True)
+            if rel_matrix is not None
+            else None
+        )
+        self.entity = entity
+        self.raw_ranks = raw_ranks
+        self.discount = discount
+        self.persistence = persistence
+        self.group_weights = np.zeros(0)
+        self.group_ranks = np.zeros(0)
+        self.cells = np.zeros(0, dtype=np.int64)
+        self.cell_weights = np.zeros(0)
+        # (keys, weights) of the cells added since the last compaction.
+        self.pending_cells = []
+        self.n_pending = 0
+
+    def update(
+        self, chunk: pd.DataFrame | RecommendationLists
+    ) -> GroupExposureAccumulator:
+        top_n = _encoded(chunk, self.vocabularies, ["group"])
+        weights = lists_weights(top_n, self.relevance, self.discount, self.persistence)
+        return self._accumulate(
+            top_n.columns["group"], weights, top_n.ranks, top_n.user_codes, top_n.items
+        )
+
+    def _accumulate(
+        self,
+        groups: np.ndarray,
+        weights: np.ndarray,
+        ranks: np.ndarray,
+        users: np.ndarray,
+        items: np.ndarray,
+    ) -> GroupExposureAccumulator:
+        """
+        Add the weights of some recommendations, given their group, rank, user and item codes, to the totals.
+        """
+
+        self.group_weights = self._add(self.group_weights, groups, weights)
+        if self.raw_ranks:
+            self.group_ranks = self._add(self.group_ranks, groups, ranks)
+        if self.entity is not None:
+            entities = {"item": items, "user": users}[self.entity]
+            self._add_cells(cell_keys(entities, groups), weights)
+        return self
+
+    def merge(self, other: GroupExposureAccumulator) -> GroupExposureAccumulator:
+        if len(other.group_weights) == 0:
+            return self
+
+        groups = self._recode("group", other, np.arange(len(other.group_weights)))
+        self.group_weights = self._add(self.group_weights, groups, other.group_weights)
+        if self.raw_ranks:
+            self.group_ranks = self._add(self.group_ranks, groups, other.group_ranks)
+        if self.entity is not None:
+            entities, groups, weights = other._cell_totals()
+            cells = cell_keys(
+                self._recode(self.entity, other, entities),
+                self._recode("group", other, groups),
+            )
+            self._add_cells(cells, weights)
+        return self
+
+    def _recode(
+        self, col: str, other: GroupExposureAccumulator, codes: np.ndarray
+    ) -> np.ndarray:
+        """
+        Map codes of other to the ones of this accumulator.
+        """
+
+        vocabulary = self.vocabularies.setdefault(col, Vocabulary())
+        if other.vocabularies[col] is vocabulary:
+            return codes
+        return vocabulary.encode(other.vocabularies[col].decode(codes), update=True)
+
+    def _add(
+        self, totals: np.ndarray, groups: np.ndarray, weights: np.ndarray
+    ) -> np.ndarray:
+        """
+        Add weights to the per-group totals of the given group codes.
+        """
+
+        added = np.bincount(
+            groups, weights=weights, minlength=len(self.vocabularies["group"])
+        )
+        added[: len(totals)] += totals
+        return added
+
+    def _add_cells(self, cells: np.ndarray, weights: np.ndarray) -> None:
+        """
+        Add weights to the totals of the given (entity, group) keys. The keys are buffered and
+        compacted only once the buffer outgrows the totals, so that the cost of the compactions
+        is amortized over the updates instead of paid on every chunk.
+        """
+
+        self.pending_cells.append((cells, weights))
+        self.n_pending += len(cells)
+        if self.n_pending > max(len(self.cells), 1 << 16):
+            self._compact_cells()
+
+    def _compact_cells(self) -> None:
+        """
+        Sum the buffered weights into the totals of the distinct (entity, group) keys.
+        """
+
+        if not self.pending_cells:
+            return
+        cells, weights = zip(*self.pending_cells)
+        self.cells, cell_index = np.unique(
+            np.concatenate((self.cells, *cells)), return_inverse=True
+        )
+        self.cell_weights = np.bincount(
+            cell_index.ravel(), weights=np.concatenate((self.cell_weights, *weights))
+        )
+        self.pending_cells = []
+        self.n_pending = 0
+
+    def _cell_totals(self) -> tuple:
+        """
+        The entity codes, group codes and totals of the distinct (entity, group) pairs.
+        """
+
+        self._compact_cells()
+        return self.cells >> 32, self.cells & 0xFFFFFFFF, self.cell_weights
+
+    @abstractmethod
+    def finalize(self) -> float:
+        """
+        Compute the metric from the totals.
+
+        :return: The same value returned by the evaluate method of the metric.
+        :rtype: float
+        """
+
+
+class EntropyAccumulator(GroupExposureAccumulator):
+
+    """
+    Running totals of Entropy (see GroupExposureAccumulator).
+
+    :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+    :type rel_matrix: pd.DataFrame, default None
+    :param vocabularies: Vocabularies of the recommendation lists that will be passed to update.
+    :type vocabularies: dict, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    """
+
+    def __init__(
+        self,
+        rel_matrix: pd.DataFrame = None,
+        vocabularies: dict = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        super().__init__(
+            rel_matrix,
+            raw_ranks=rel_matrix is None,
+            vocabularies=vocabularies,
+            discount=discount,
+            persistence=persistence,
+        )
+
+    def finalize(self) -> float:
+        return entropy(self.group_ranks if self.raw_ranks else self.group_weights)
+
+
+class KullbackLeiblerAccumulator(GroupExposureAccumulator):
+
+    """
+    Running totals of KullbackLeibler (see GroupExposureAccumulator).
+
+    :param target_representation: The target representation desired for each group.
+    :type target_representation: pd.DataFrame
+    :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+    :type rel_matrix: pd.DataFrame, default None
+    :param vocabularies: Vocabularies of the recommendation lists that will be passed to update.
+    :type vocabularies: dict, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :raises ColumnsNotExistException: If target_representation not in the form ('group', 'target_representation').
+    """
+
+    shared = ("relevance", "target_representation")
+
+    def __init__(
+        self,
+        target_representation: pd.DataFrame,
+        rel_matrix: pd.DataFrame = None,
+        vocabularies: dict = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        check_columns_exist(target_representation, ["group", "target_representation"])
+        super().__init__(
+            rel_matrix,
+            vocabularies=vocabularies,
+            discount=discount,
+            persistence=persistence,
+        )
+        self.target_representation = target_representation
+
+    def finalize(self) -> float:
+        return kullback_leibler(
+            self.group_weights,
+            self.target_representation,
+            self.vocabularies["group"],
+        )
+
+
+class MutualInformationAccumulator(GroupExposureAccumulator):
+
+    """
+    Running totals of MutualInformation (see GroupExposureAccumulator).
+
+    :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+    :type flag: str
+    :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+    :type rel_matrix: pd.DataFrame, default None
+    :param vocabularies: Vocabularies of the recommendation lists that will be passed to update.
+    :type vocabularies: dict, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    """
+
+    NOT_FLAGGED = {"user": "item", "item": "user"}
+
+    def __init__(
+        self,
+        flag: str,
+        rel_matrix: pd.DataFrame = None,
+        vocabularies: dict = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        super().__init__(
+            rel_matrix,
+            entity=self.NOT_FLAGGED[flag],
+            vocabularies=vocabularies,
+            discount=discount,
+            persistence=persistence,
+        )
+
+    def finalize(self) -> float:
+        return mutual_information(*self._cell_totals())
+
+
+class FairnessAccumulator(GroupExposureAccumulator):
+
+    """
+    Running totals of Entropy, KullbackLeibler and MutualInformation at once (see FairnessMetrics).
+
+    :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+    :type flag: str
+    :param target_representation: The target representation desired for each group, None to skip the KL divergence.
+    :type target_representation: pd.DataFrame, default None
+    :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+    :type rel_matrix: pd.DataFrame, default None
+    :param vocabularies: Vocabularies of the recommendation lists that will be passed to update.
+    :type vocabularies: dict, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :raises ColumnsNotExistException: If target_representation not in the form ('group', 'target_representation').
+    """
+
+    shared = ("relevance", "target_representation")
+
+    def __init__(
+        self,
+        flag: str,
+        target_representation: pd.DataFrame = None,
+        rel_matrix: pd.DataFrame = None,
+        vocabularies: dict = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        if target_representation is not None:
+            check_columns_exist(
+                target_representation, ["group", "target_representation"]
+            )
+        super().__init__(
+            rel_matrix,
+            entity=MutualInformationAccumulator.NOT_FLAGGED[flag],
+            raw_ranks=rel_matrix is None,
+            vocabularies=vocabularies,
+            discount=discount,
+            persistence=persistence,
+        )
+        self.target_representation = target_representation
+
+    def finalize(self) -> pd.Series:
+        metrics = {
+            "Entropy": entropy(
+                self.group_ranks if self.raw_ranks else self.group_weights
+            )
+        }
+        if self.target_representation is not None:
+            metrics["KullbackLeibler"] = kullback_leibler(
+                self.group_weights,
+                self.target_representation,
+                self.vocabularies["group"],
+            )
+        metrics["MutualInformation"] = mutual_information(*self._cell_totals())
+        return pd.Series(metrics)
+
+
+class SegmentationsAccumulator(Accumulator):
+
+    """
+    Running totals of FairnessMetrics for several segmentations of the same recommendations at once
+    (see FairnessBySegmentation). The exposure (or effectiveness) of every recommendation is computed once
+    per chunk and scattered into the totals of every segmentation, through a table from user or item codes to group codes.
+
+    :param segmentations: The segmentations by name, or a group matrix (see segmentation_frames).
+    :type segmentations: dict or pd.DataFrame
+    :param target_representations: The target representation desired for each group, by segmentation name.
+        The KL divergence is only computed for the segmentations with a target representation.
+    :type target_representations: dict, default None
+    :param rel_matrix: Relevant items for users, in the form ('user', 'item', 'rank'). Any 'group' column is ignored.
+    :type rel_matrix: pd.DataFrame, default None
+    :param vocabularies: Vocabularies of the recommendation lists that will be passed to update.
+    :type vocabularies: dict, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :raises ColumnsNotExistException: If a segmentation is not in the form ('item' or 'user', 'group'),
+        or a target representation not in the form ('group', 'target_representation').
+    """
+
+    shared = ("relevance", "lookups")
+
+    def __init__(
+        self,
+        segmentations: dict | pd.DataFrame,
+        target_representations: dict = None,
+        rel_matrix: pd.DataFrame = None,
+        vocabularies: dict = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        target_representations = (
+            {} if target_representations is None else target_representations
+        )
+        self.vocabularies = {} if vocabularies is None else vocabularies
+        for col in ("user", "item"):
+            self.vocabularies.setdefault(col, Vocabulary())
+        self.relevance = (
+            relevance_table(rel_matrix, self.vocabularies, update=True, grouped=False)
+            if rel_matrix is not None
+            else None
+        )
+        self.discount = discount
+        self.persistence = persistence
+
+        self.accumulators = {}
+        self.lookups = {}
+        for name, segmentation in segmentation_frames(segmentations).items():
+            entity = segmentation.columns[0]
+            # The users and items are encoded once for every segmentation, only the groups are not shared.
+            accumulator = FairnessAccumulator(
+                entity,
+                target_representations.get(name),
+                vocabularies={
+                    "user": self.vocabularies["user"],
+                    "item": self.vocabularies["item"],
+                    "group": Vocabulary(),
+                },
+                discount=discount,
+                persistence=persistence,
+            )
+            accumulator.raw_ranks = rel_matrix is None
+            codes = self.vocabularies[entity].encode(segmentation[entity], update=True)
+            # The last entry is -1 for the users or items added to the vocabularies later on.
+            lookup = np.full(len(self.vocabularies[entity]) + 1, -1, dtype=np.int32)
+            lookup[codes] = accumulator.vocabularies["group"].encode(
+                segmentation["group"], update=True
+            )
+            self.accumulators[name] = accumulator
+            self.lookups[name] = (entity, lookup)
+
+    def update(
+        self, chunk: pd.DataFrame | RecommendationLists
+    ) -> SegmentationsAccumulator:
+        top_n = _encoded(chunk, self.vocabularies, [])
+        weights = lists_weights(top_n, self.relevance, self.discount, self.persistence)
+        entities = {"user": top_n.user_codes, "item": top_n.items}
+
+        for name, accumulator in self.accumulators.items():
+            entity, lookup = self.lookups[name]
+            groups = lookup[np.minimum(entities[entity], len(lookup) - 1)]
+            rows = groups >= 0
+            accumulator._accumulate(
+                groups[rows],
+                weights[rows],
+                top_n.ranks[rows],
+                entities["user"][rows],
+                entities["item"][rows],
+            )
+        return self
+
+    def merge(self, other: SegmentationsAccumulator) -> SegmentationsAccumulator:
+        for name, accumulator in self.accumulators.items():
+            accumulator.merge(other.accumulators[name])
+        return self
+
+    def finalize(self) -> pd.DataFrame:
+        metrics = pd.DataFrame(
+            [accumulator.finalize() for accumulator in self.accumulators.values()],
+            index=list(self.accumulators),
+        )
+        return metrics[
+            [
+                col
+                for col in ("Entropy", "KullbackLeibler", "MutualInformation")
+                if col in metrics.columns
+            ]
+        ]
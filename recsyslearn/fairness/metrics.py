@@ -1,9 +1,32 @@
+from __future__ import annotations
+
 from abc import ABC
+from typing import Iterable
 
 import numpy as np
 import pandas as pd
 
-from recsyslearn.fairness.utils import eff_matrix, exp_matrix, prob_matrix
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.fairness.accumulators import (
+    EntropyAccumulator,
+    FairnessAccumulator,
+    KullbackLeiblerAccumulator,
+    MutualInformationAccumulator,
+    SegmentationsAccumulator,
+)
+from recsyslearn.errors.errors import InvalidGroupException
+from recsyslearn.fairness.utils import (
+    eff_matrix,
+    entity_exposure,
+    exp_matrix,
+    group_totals,
+    kullback_leibler,
+    lists_weights,
+    mutual_information,
+    prob_matrix,
+    relevance_table,
+    target_array,
+)
 from recsyslearn.utils import check_columns_exist
 
 
@@ -11,39 +34,164 @@ class FairnessMetric(ABC):
 
     """
     Abstract Class for Metrics.
+
+    :param discount: The model of the exposure of every rank: 'log', 'rbp', 'cascade' or 'uniform' (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
     """
 
-    def __init__(self) -> None:
-        return
+    def __init__(self, discount: str = "log", persistence: float = 0.5) -> None:
+        self.discount = discount
+        self.persistence = persistence
+
+    def _discount(self) -> dict:
+        """
+        Discount arguments of the accumulators of the metric.
+        """
+
+        return {"discount": self.discount, "persistence": self.persistence}
+
+    def group_exposure(
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        entity: str = "user",
+        rel_matrix: pd.DataFrame = None,
+    ) -> pd.DataFrame:
+        """
+        Compute how the exposure (or the effectiveness, if rel_matrix is given) received by every user or item
+        is distributed over the groups, with one segmented reduction over top_n instead of one evaluation per entity.
+        The shares of an entity add up to 1, so they can be pivoted into one group-exposure vector per entity.
+
+        :param top_n: Top N recommendations' lists for every user with items or users already segmented.
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param entity: Whether to distribute the exposure of every 'user' or of every 'item'.
+        :type entity: str, default 'user'
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group').
+        :raises InvalidGroupException: If entity is not 'user' or 'item'.
+        :return: The share of every (entity, group) pair with some recommendation, in the form (entity, 'group', 'exposure').
+        :rtype: pd.DataFrame
+        """
+
+        top_n, (entities, groups, shares) = self._entity_exposure(
+            top_n, entity, rel_matrix
+        )
+        return pd.DataFrame(
+            {
+                entity: top_n.vocabularies[entity].decode(entities),
+                "group": top_n.vocabularies["group"].decode(groups),
+                "exposure": shares,
+            }
+        )
+
+    def _entity_exposure(
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        entity: str,
+        rel_matrix: pd.DataFrame = None,
+    ) -> tuple:
+        """
+        Encoded lists of top_n and the (entity, group, share) arrays of entity_exposure.
+        """
+
+        if entity not in ("user", "item"):
+            raise InvalidGroupException(entity)
+        check_columns_exist(top_n, ["group"])
+        if not isinstance(top_n, RecommendationLists):
+            top_n = RecommendationLists.from_frame(top_n)
+
+        relevance = (
+            relevance_table(rel_matrix, top_n.vocabularies)
+            if rel_matrix is not None
+            else None
+        )
+        weights = lists_weights(top_n, relevance, self.discount, self.persistence)
+        return top_n, entity_exposure(top_n, entity, weights)
 
 
 class Entropy(FairnessMetric):
 
     """
     Entropy evaluator for recommender systems.
+    Without rel_matrix the recommendations are weighted by their rank, so the discount only applies with rel_matrix.
     """
 
-    def evaluate(self, top_n: pd.DataFrame, rel_matrix: pd.DataFrame = None) -> float:
+    def evaluate(
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        rel_matrix: pd.DataFrame = None,
+        n_jobs: int = 1,
+    ) -> float:
         """
         Compute the entropy of a model by using its recommendation list.
 
         :param top_n: Top N recommendations' lists for every user with items or users already segmented.
-        :type top_n: pd.DataFrame
+        :type top_n: pd.DataFrame or RecommendationLists
         :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
         :type rel_matrix: pd.DataFrame, default None
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
         :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group').
         :return: The computed entropy.
         :rtype: float
         """
 
+        if n_jobs != 1:
+            return self.accumulator(rel_matrix).consume_parallel(top_n, n_jobs)
+
+        if isinstance(top_n, RecommendationLists):
+            accumulator = EntropyAccumulator(
+                rel_matrix, top_n.vocabularies, **self._discount()
+            )
+            return accumulator.update(top_n).finalize()
+
         check_columns_exist(top_n, ["user", "item", "rank", "group"])
 
-        top_n = eff_matrix(top_n, rel_matrix) if rel_matrix is not None else top_n
+        top_n = (
+            eff_matrix(top_n, rel_matrix, self.discount, self.persistence)
+            if rel_matrix is not None
+            else top_n
+        )
         top_n = prob_matrix(top_n)
         top_n = top_n[["group", "rank"]].groupby("group", as_index=False).sum()
         top_n["rank"] = top_n["rank"] * np.log2(top_n["rank"])
         return -top_n["rank"].sum()
 
+    def evaluate_chunks(
+        self, chunks: Iterable[pd.DataFrame], rel_matrix: pd.DataFrame = None
+    ) -> float:
+        """
+        Compute the entropy of a model by streaming its recommendation lists in chunks
+        (e.g., from pd.read_csv(chunksize=...)). Returns the same value of evaluate.
+
+        :param chunks: Top N recommendations' lists for some users with items or users already segmented.
+        :type chunks: Iterable[pd.DataFrame]
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If a chunk is not in the form ('user', 'item', 'rank', 'group').
+        :return: The computed entropy.
+        :rtype: float
+        """
+
+        return self.accumulator(rel_matrix).consume(chunks)
+
+    def accumulator(self, rel_matrix: pd.DataFrame = None) -> EntropyAccumulator:
+        """
+        Create the running state of the entropy, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the entropy with finalize().
+
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If rel_matrix not in the form ('user', 'item', 'rank', 'group').
+        :return: The empty accumulator.
+        :rtype: EntropyAccumulator
+        """
+
+        return EntropyAccumulator(rel_matrix, **self._discount())
+
 
 class KullbackLeibler(FairnessMetric):
 
@@ -53,39 +201,153 @@ class KullbackLeibler(FairnessMetric):
 
     def evaluate(
         self,
-        top_n: pd.DataFrame,
+        top_n: pd.DataFrame | RecommendationLists,
         target_representation: pd.DataFrame,
         rel_matrix: pd.DataFrame = None,
+        n_jobs: int = 1,
     ) -> float:
         """
         Compute the Kullback-Leibler divergence of a model, for a given target representation, by using its recommendation list.
 
         :param top_n: Top N recommendations' lists for every user with items or users already segmented.
-        :type top_n: pd.DataFrame
+        :type top_n: pd.DataFrame or RecommendationLists
         :param target_representation: The target representation desired for each group.
         :type target_representation: pd.DataFrame
         :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
         :type rel_matrix: pd.DataFrame, default None
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
         :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group') or if target_representation not in the form ('group', 'target_representation').
+        :raises TargetGroupsNotFoundException: If none of the target groups is a group of top_n.
         :return: The computed KL Divergence for the given target representation.
         :rtype: float
         """
 
-        check_columns_exist(top_n, ["user", "item", "rank", "group"])
         check_columns_exist(target_representation, ["group", "target_representation"])
 
+        if n_jobs != 1:
+            return self.accumulator(target_representation, rel_matrix).consume_parallel(
+                top_n, n_jobs
+            )
+
+        if isinstance(top_n, RecommendationLists):
+            accumulator = KullbackLeiblerAccumulator(
+                target_representation,
+                rel_matrix,
+                top_n.vocabularies,
+                **self._discount(),
+            )
+            return accumulator.update(top_n).finalize()
+
+        check_columns_exist(top_n, ["user", "item", "rank", "group"])
+
         top_n = (
-            eff_matrix(top_n, rel_matrix)
+            eff_matrix(top_n, rel_matrix, self.discount, self.persistence)
             if rel_matrix is not None
-            else exp_matrix(top_n)
+            else exp_matrix(top_n, self.discount, self.persistence)
         )
-        top_n = prob_matrix(top_n)
-        top_n = top_n[["group", "rank"]].groupby("group", as_index=False).sum()
-        top_n = top_n.merge(target_representation, on="group")
-        top_n["rank"] = top_n["rank"] * np.log2(
-            top_n["rank"] / top_n["target_representation"]
+        # Integer group codes and array-indexed targets, which scale to many groups (e.g., providers).
+        group_weights, vocabulary = group_totals(
+            top_n["group"], top_n["rank"].to_numpy(dtype=float)
+        )
+        return kullback_leibler(group_weights, target_representation, vocabulary)
+
+    def evaluate_entities(
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        target_representation: pd.DataFrame,
+        entity: str = "user",
+        rel_matrix: pd.DataFrame = None,
+    ) -> pd.Series:
+        """
+        Compute the Kullback-Leibler divergence of the exposure received by every user or item from the target representation,
+        with one segmented reduction over top_n (see group_exposure). The value of an entity is the one of evaluate
+        on its recommendations alone, e.g. the divergence of the list of a user. Use the quantiles or the largest values
+        of the result to find where the disparity concentrates.
+
+        :param top_n: Top N recommendations' lists for every user with items or users already segmented.
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param target_representation: The target representation desired for each group.
+        :type target_representation: pd.DataFrame
+        :param entity: Whether to compute the divergence of every 'user' or of every 'item'.
+        :type entity: str, default 'user'
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group') or if target_representation not in the form ('group', 'target_representation').
+        :raises TargetGroupsNotFoundException: If none of the target groups is a group of top_n.
+        :raises InvalidGroupException: If entity is not 'user' or 'item'.
+        :return: The divergence of every entity with some recommendation, NaN for the ones with no effectiveness at all.
+        :rtype: pd.Series
+        """
+
+        check_columns_exist(target_representation, ["group", "target_representation"])
+
+        top_n, (entities, groups, shares) = self._entity_exposure(
+            top_n, entity, rel_matrix
+        )
+        vocabulary = top_n.vocabularies["group"]
+        target = target_array(target_representation, vocabulary, len(vocabulary))[
+            groups
+        ]
+        represented = (shares > 0) & ~np.isnan(target)
+        terms = np.zeros(len(shares))
+        terms[represented] = shares[represented] * np.log2(
+            shares[represented] / target[represented]
+        )
+        terms[np.isnan(shares)] = np.nan
+
+        codes, starts = np.unique(entities, return_index=True)
+        return pd.Series(
+            np.add.reduceat(terms, starts) if len(terms) else [],
+            index=pd.Index(top_n.vocabularies[entity].decode(codes), name=entity),
+            name="KullbackLeibler",
+            dtype=float,
+        )
+
+    def evaluate_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        target_representation: pd.DataFrame,
+        rel_matrix: pd.DataFrame = None,
+    ) -> float:
+        """
+        Compute the Kullback-Leibler divergence of a model, for a given target representation,
+        by streaming its recommendation lists in chunks. Returns the same value of evaluate.
+
+        :param chunks: Top N recommendations' lists for some users with items or users already segmented.
+        :type chunks: Iterable[pd.DataFrame]
+        :param target_representation: The target representation desired for each group.
+        :type target_representation: pd.DataFrame
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If a chunk not in the form ('user', 'item', 'rank', 'group') or if target_representation not in the form ('group', 'target_representation').
+        :raises TargetGroupsNotFoundException: If none of the target groups is a group of the chunks.
+        :return: The computed KL Divergence for the given target representation.
+        :rtype: float
+        """
+
+        return self.accumulator(target_representation, rel_matrix).consume(chunks)
+
+    def accumulator(
+        self, target_representation: pd.DataFrame, rel_matrix: pd.DataFrame = None
+    ) -> KullbackLeiblerAccumulator:
+        """
+        Create the running state of the divergence, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the divergence with finalize().
+
+        :param target_representation: The target representation desired for each group.
+        :type target_representation: pd.DataFrame
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If target_representation not in the form ('group', 'target_representation').
+        :return: The empty accumulator.
+        :rtype: KullbackLeiblerAccumulator
+        """
+
+        return KullbackLeiblerAccumulator(
+            target_representation, rel_matrix, **self._discount()
         )
-        return top_n["rank"].sum()
 
 
 class MutualInformation(FairnessMetric):
@@ -95,49 +357,303 @@ class MutualInformation(FairnessMetric):
     """
 
     def evaluate(
-        self, top_n: pd.DataFrame, flag: str, rel_matrix: pd.DataFrame = None
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        flag: str,
+        rel_matrix: pd.DataFrame = None,
+        n_jobs: int = 1,
     ) -> float:
         """
         Compute the Mutual Information of a model by using its recommendation list.
 
         :param top_n: Top N recommendations' lists for every user with items or users already segmented.
-        :type top_n: pd.DataFrame
+        :type top_n: pd.DataFrame or RecommendationLists
         :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
         :type flag: str
         :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
         :type rel_matrix: pd.DataFrame, default None
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
         :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group').
         :return: The computed Mutual Information.
         :rtype: float
         """
 
+        if n_jobs != 1:
+            return self.accumulator(flag, rel_matrix).consume_parallel(top_n, n_jobs)
+
+        if isinstance(top_n, RecommendationLists):
+            accumulator = MutualInformationAccumulator(
+                flag, rel_matrix, top_n.vocabularies, **self._discount()
+            )
+            return accumulator.update(top_n).finalize()
+
         check_columns_exist(top_n, ["user", "item", "rank", "group"])
 
         not_flagged = {"user": "item", "item": "user"}
-
         top_n = (
-            eff_matrix(top_n, rel_matrix)
+            eff_matrix(top_n, rel_matrix, self.discount, self.persistence)
             if rel_matrix is not None
-            else exp_matrix(top_n)
+            else exp_matrix(top_n, self.discount, self.persistence)
+        )
+        # Sparse (entity, group) contingency table over integer codes, see mutual_information.
+        pairs = top_n[[not_flagged.get(flag), "group"]]
+        return mutual_information(
+            pd.factorize(pairs.iloc[:, 0])[0],
+            pd.factorize(pairs.iloc[:, 1])[0],
+            top_n["rank"].to_numpy(dtype=float),
+        )
+
+    def evaluate_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        flag: str,
+        rel_matrix: pd.DataFrame = None,
+    ) -> float:
+        """
+        Compute the Mutual Information of a model by streaming its recommendation lists in chunks.
+        Returns the same value of evaluate.
+
+        :param chunks: Top N recommendations' lists for some users with items or users already segmented.
+        :type chunks: Iterable[pd.DataFrame]
+        :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+        :type flag: str
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If a chunk not in the form ('user', 'item', 'rank', 'group').
+        :return: The computed Mutual Information.
+        :rtype: float
+        """
+
+        return self.accumulator(flag, rel_matrix).consume(chunks)
+
+    def accumulator(
+        self, flag: str, rel_matrix: pd.DataFrame = None
+    ) -> MutualInformationAccumulator:
+        """
+        Create the running state of the Mutual Information, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the Mutual Information with finalize().
+
+        :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+        :type flag: str
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :return: The empty accumulator.
+        :rtype: MutualInformationAccumulator
+        """
+
+        return MutualInformationAccumulator(flag, rel_matrix, **self._discount())
+
+
+class FairnessMetrics(FairnessMetric):
+
+    """
+    Evaluator computing Entropy, Kullback-Leibler divergence and Mutual Information at once,
+    from a single (user or item) x group exposure table built with one pass over the recommendation lists.
+    """
+
+    def evaluate(
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        flag: str,
+        target_representation: pd.DataFrame = None,
+        rel_matrix: pd.DataFrame = None,
+        n_jobs: int = 1,
+    ) -> pd.Series:
+        """
+        Compute the entropy, the Kullback-Leibler divergence and the Mutual Information of a model by using its recommendation list.
+        Every value is the one returned by the evaluate method of the corresponding metric.
+
+        :param top_n: Top N recommendations' lists for every user with items or users already segmented.
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+        :type flag: str
+        :param target_representation: The target representation desired for each group, None to skip the KL divergence.
+        :type target_representation: pd.DataFrame, default None
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank', 'group') or if target_representation not in the form ('group', 'target_representation').
+        :raises TargetGroupsNotFoundException: If none of the target groups is a group of top_n.
+        :return: The metrics, in the form ('Entropy', 'KullbackLeibler', 'MutualInformation').
+        :rtype: pd.Series
+        """
+
+        if n_jobs != 1:
+            return self.accumulator(
+                flag, target_representation, rel_matrix
+            ).consume_parallel(top_n, n_jobs)
+
+        vocabularies = (
+            top_n.vocabularies if isinstance(top_n, RecommendationLists) else None
+        )
+        accumulator = FairnessAccumulator(
+            flag, target_representation, rel_matrix, vocabularies, **self._discount()
+        )
+        return accumulator.update(top_n).finalize()
+
+    def evaluate_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        flag: str,
+        target_representation: pd.DataFrame = None,
+        rel_matrix: pd.DataFrame = None,
+    ) -> pd.Series:
+        """
+        Compute the entropy, the Kullback-Leibler divergence and the Mutual Information of a model
+        by streaming its recommendation lists in chunks. Returns the same values of evaluate.
+
+        :param chunks: Top N recommendations' lists for some users with items or users already segmented.
+        :type chunks: Iterable[pd.DataFrame]
+        :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+        :type flag: str
+        :param target_representation: The target representation desired for each group, None to skip the KL divergence.
+        :type target_representation: pd.DataFrame, default None
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If a chunk not in the form ('user', 'item', 'rank', 'group') or if target_representation not in the form ('group', 'target_representation').
+        :raises TargetGroupsNotFoundException: If none of the target groups is a group of the chunks.
+        :return: The metrics, in the form ('Entropy', 'KullbackLeibler', 'MutualInformation').
+        :rtype: pd.Series
+        """
+
+        return self.accumulator(flag, target_representation, rel_matrix).consume(chunks)
+
+    def accumulator(
+        self,
+        flag: str,
+        target_representation: pd.DataFrame = None,
+        rel_matrix: pd.DataFrame = None,
+    ) -> FairnessAccumulator:
+        """
+        Create the running state of the metrics, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the metrics with finalize().
+
+        :param flag: Which actor of the recommendation scenario has been segmented (i.e. user).
+        :type flag: str
+        :param target_representation: The target representation desired for each group, None to skip the KL divergence.
+        :type target_representation: pd.DataFrame, default None
+        :param rel_matrix: Relevant items for users. It could be, for example, the items with a rating >= threshold.
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If target_representation not in the form ('group', 'target_representation').
+        :return: The empty accumulator.
+        :rtype: FairnessAccumulator
+        """
+
+        return FairnessAccumulator(
+            flag, target_representation, rel_matrix, **self._discount()
+        )
+
+
+class FairnessBySegmentation(FairnessMetric):
+
+    """
+    Evaluator computing the metrics of FairnessMetrics for several segmentations of the same recommendations
+    (e.g., popularity, genre and provider groups of the items, activity groups of the users) at once.
+    The recommendations need no 'group' column: the exposure of every recommendation is computed once
+    and added to the groups of every segmentation.
+    """
+
+    def evaluate(
+        self,
+        top_n: pd.DataFrame | RecommendationLists,
+        segmentations: dict | pd.DataFrame,
+        target_representations: dict = None,
+        rel_matrix: pd.DataFrame = None,
+        n_jobs: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Compute the entropy, the Kullback-Leibler divergence and the Mutual Information of a model for every segmentation.
+        Every row holds the values of FairnessMetrics for top_n merged with the corresponding segmentation.
+        Segmentations of the items are evaluated with flag 'item', the ones of the users with flag 'user'.
+
+        :param top_n: Top N recommendations' lists for every user.
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param segmentations: The output of Segmentation.segment for every segmentation name, or a group matrix
+            with the 'item' (or 'user') column and one column of groups per segmentation. Every entity has one group at most.
+        :type segmentations: dict or pd.DataFrame
+        :param target_representations: The target representation desired for each group, by segmentation name.
+            The KL divergence is only computed for the segmentations with a target representation.
+        :type target_representations: dict, default None
+        :param rel_matrix: Relevant items for users, in the form ('user', 'item', 'rank'). It does not need to be segmented.
+        :type rel_matrix: pd.DataFrame, default None
+        :param n_jobs: Number of processes evaluating shards of the users in parallel, -1 for one per CPU.
+        :type n_jobs: int, default 1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises ColumnsNotExistException: If top_n not in the form ('user', 'item', 'rank'), if a segmentation not in the form ('item' or 'user', 'group') or if a target representation not in the form ('group', 'target_representation').
+        :return: The metrics of every segmentation, with columns ('Entropy', 'KullbackLeibler', 'MutualInformation').
+        :rtype: pd.DataFrame
+        """
+
+        if n_jobs != 1:
+            return self.accumulator(
+                segmentations, target_representations, rel_matrix
+            ).consume_parallel(top_n, n_jobs)
+
+        vocabularies = (
+            top_n.vocabularies if isinstance(top_n, RecommendationLists) else None
+        )
+        accumulator = SegmentationsAccumulator(
+            segmentations,
+            target_representations,
+            rel_matrix,
+            vocabularies,
+            **self._discount(),
+        )
+        return accumulator.update(top_n).finalize()
+
+    def evaluate_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        segmentations: dict | pd.DataFrame,
+        target_representations: dict = None,
+        rel_matrix: pd.DataFrame = None,
+    ) -> pd.DataFrame:
+        """
+        Compute the entropy, the Kullback-Leibler divergence and the Mutual Information of a model for every segmentation
+        by streaming its recommendation lists in chunks. Returns the same values of evaluate.
+
+        :param chunks: Top N recommendations' lists for some users.
+        :type chunks: Iterable[pd.DataFrame]
+        :param segmentations: The segmentations by name, or a group matrix (see evaluate).
+        :type segmentations: dict or pd.DataFrame
+        :param target_representations: The target representation desired for each group, by segmentation name.
+        :type target_representations: dict, default None
+        :param rel_matrix: Relevant items for users, in the form ('user', 'item', 'rank').
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If a chunk not in the form ('user', 'item', 'rank'), if a segmentation not in the form ('item' or 'user', 'group') or if a target representation not in the form ('group', 'target_representation').
+        :return: The metrics of every segmentation, with columns ('Entropy', 'KullbackLeibler', 'MutualInformation').
+        :rtype: pd.DataFrame
+        """
+
+        return self.accumulator(
+            segmentations, target_representations, rel_matrix
+        ).consume(chunks)
+
+    def accumulator(
+        self,
+        segmentations: dict | pd.DataFrame,
+        target_representations: dict = None,
+        rel_matrix: pd.DataFrame = None,
+    ) -> SegmentationsAccumulator:
+        """
+        Create the running state of the metrics, to evaluate users shard by shard (e.g., on separate workers)
+        with update(chunk), combine the shards with merge(other) and compute the metrics with finalize().
+
+        :param segmentations: The segmentations by name, or a group matrix (see evaluate).
+        :type segmentations: dict or pd.DataFrame
+        :param target_representations: The target representation desired for each group, by segmentation name.
+        :type target_representations: dict, default None
+        :param rel_matrix: Relevant items for users, in the form ('user', 'item', 'rank').
+        :type rel_matrix: pd.DataFrame, default None
+        :raises ColumnsNotExistException: If a segmentation not in the form ('item' or 'user', 'group') or if a target representation not in the form ('group', 'target_representation').
+        :return: The empty accumulator.
+        :rtype: SegmentationsAccumulator
+        """
+
+        return SegmentationsAccumulator(
+            segmentations, target_representations, rel_matrix, **self._discount()
         )
-        top_n = prob_matrix(top_n)
-        not_grouped = not_flagged.get(flag)
-        P_xy = (
-            top_n[[not_grouped, "group", "rank"]]
-            .groupby([not_grouped, "group"], as_index=False)
-            .sum()
-        )
-        P_xP_y = (
-            top_n[[not_grouped, "group", "rank"]]
-            .groupby(not_grouped, as_index=False)
-            .agg({"rank": "sum"})
-        )
-        P_xP_y = P_xy[[not_grouped, "group"]].merge(P_xP_y, on=not_grouped)
-        tmp = top_n[["group", "rank"]].groupby("group", as_index=False).sum()
-        P_xP_y = P_xP_y.merge(tmp, on=["group"])
-        P_xP_y["rank"] = P_xP_y["rank_x"] * P_xP_y["rank_y"]
-        tmp = P_xP_y[[not_grouped, "group", "rank"]].merge(
-            P_xy, on=[not_grouped, "group"]
-        )
-        tmp["rank"] = tmp["rank_y"] * np.log2(tmp["rank_y"] / tmp["rank_x"])
-        return tmp["rank"].sum()
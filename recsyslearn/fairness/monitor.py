@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.errors.errors import (
+    InvalidGroupException,
+    MetricNotTrackedException,
+    TargetGroupsNotFoundException,
+)
+from recsyslearn.fairness.utils import cell_keys, exposure
+from recsyslearn.utils import check_columns_exist
+
+
+def _xlogx(values: np.ndarray) -> float:
+    """
+    Sum of x * log2(x) over the positive values.
+    """
+
+    values = values[values > 0]
+    return np.sum(values * np.log2(values))
+
+
+class _RunningTotals:
+
+    """
+    Totals per code, with their sum and their sum of x * log2(x) kept up to date,
+    so that the entropy-like quantities of the totals are computed in constant time.
+    The number of batches of the window with every code is also kept, so that the codes
+    no longer in the window are known exactly, whatever the rounding of their totals.
+    """
+
+    def __init__(self) -> None:
+        self.totals = np.zeros(0)
+        self.batches = np.zeros(0, dtype=np.int64)
+        self.total = 0.0
+        self.xlogx = 0.0
+        self.n_live = 0
+
+    def add(self, codes: np.ndarray, weights: np.ndarray, sign: int = 1) -> None:
+        """
+        Add (or, with sign -1, remove) the weights of the given unique codes.
+        """
+
+        if len(codes) == 0:
+            return
+        if codes.max() >= len(self.totals):
+            size = max(codes.max() + 1, 2 * len(self.totals))
+            self.totals = np.concatenate(
+                (self.totals, np.zeros(size - len(self.totals)))
+            )
+            self.batches = np.concatenate(
+                (self.batches, np.zeros(size - len(self.batches), dtype=np.int64))
+            )
+        before = self.totals[codes]
+        batches = self.batches[codes] + sign
+        # Removing the weights of an expired batch may leave rounding residues.
+        after = np.where(batches > 0, np.maximum(before + sign * weights, 0.0), 0.0)
+        self.totals[codes] = after
+        self.batches[codes] = batches
+        self.total += np.sum(after - before)
+        self.xlogx += _xlogx(after) - _xlogx(before)
+        self.n_live += np.count_nonzero(batches > 0) - np.count_nonzero(
+            batches - sign > 0
+        )
+
+    def compact(self, live: np.ndarray) -> None:
+        """
+        Keep the totals of the live codes only, which become 0, 1, ..., in order.
+        """
+
+        self.totals = self.totals[: len(live)][live]
+        self.batches = self.batches[: len(live)][live]
+        self.total = np.sum(self.totals)
+        self.xlogx = _xlogx(self.totals)
+
+
+class FairnessMonitor:
+
+    """
+    Exposure fairness of a live stream of served recommendation lists, over a window of the last batches.
+    Every batch is added to per-group (and, with flag, per-entity and per-(entity, group)) exposure totals,
+    which are kept together with their sums of x * log2(x), so that every query takes constant time.
+    The exposure of every recommendation is the one of exp_matrix.
+
+    With a sliding window the totals of the last window batches are kept, and the sparse totals of
+    every batch in the window are stored to be removed once the batch expires. With a tumbling window
+    the totals are reset every window batches, so only the totals of the current window are stored.
+    The memory is O(groups) for the Entropy and the KL divergence, while the Mutual Information
+    also keeps one total per entity and per (entity, group) pair in the window: the ones of the expired
+    batches are dropped, with their codes, once they outnumber the ones in the window.
+
+    :param window: Number of batches in the window, None for every batch since the start.
+    :type window: int, default None
+    :param tumbling: Whether the windows are disjoint (tumbling) instead of sliding by one batch.
+    :type tumbling: bool, default False
+    :param flag: Which actor of the recommendation scenario has been segmented (i.e. user), None to skip the Mutual Information.
+    :type flag: str, default None
+    :param target_representation: The target representation desired for each group, None to skip the KL divergence.
+    :type target_representation: pd.DataFrame, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :raises InvalidGroupException: If flag is not None, 'user' or 'item'.
+    :raises ColumnsNotExistException: If target_representation not in the form ('group', 'target_representation').
+    """
+
+    NOT_FLAGGED = {"user": "item", "item": "user"}
+
+    def __init__(
+        self,
+        window: int = None,
+        tumbling: bool = False,
+        flag: str = None,
+        target_representation: pd.DataFrame = None,
+        discount: str = "log",
+        persistence: float = 0.5,
+    ) -> None:
+        if flag is not None and flag not in self.NOT_FLAGGED:
+            raise InvalidGroupException(flag)
+
+        self.window = window
+        self.tumbling = tumbling
+        self.entity = None if flag is None else self.NOT_FLAGGED[flag]
+        self.discount = discount
+        self.persistence = persistence
+        self.vocabularies = {"group": Vocabulary()}
+        if self.entity is not None:
+            self.vocabularies[self.entity] = Vocabulary()
+            self.vocabularies["cell"] = Vocabulary()
+
+        self.target = None
+        if target_representation is not None:
+            check_columns_exist(
+                target_representation, ["group", "target_representation"]
+            )
+            codes = self.vocabularies["group"].encode(
+                target_representation["group"], update=True
+            )
+            self.target = np.full(len(self.vocabularies["group"]), np.nan)
+            self.target[codes] = target_representation[
+                "target_representation"
+            ].to_numpy(float)
+
+        self.batches = deque()
+        self._reset()
+
+    def _reset(self) -> None:
+        """
+        Empty the totals and the batches of the window.
+        """
+
+        self.batches.clear()
+        if self.entity is not None:
+            self.vocabularies[self.entity] = Vocabulary()
+            self.vocabularies["cell"] = Vocabulary()
+        self.n_batches = 0
+        self.groups = _RunningTotals()
+        # Totals of the groups with a target, and sum of their weights times log2 of the target.
+        self.targeted = _RunningTotals()
+        self.target_xlogt = 0.0
+        self.entities = _RunningTotals()
+        self.cells = _RunningTotals()
+
+    def update(self, batch: pd.DataFrame | RecommendationLists) -> FairnessMonitor:
+        """
+        Add a batch of served recommendation lists to the window, removing the expired batches.
+
+        :param batch: Recommendations' lists with items or users already segmented.
+        :type batch: pd.DataFrame or RecommendationLists
+        :raises ColumnsNotExistException: If batch not in the form ('user', 'item', 'rank', 'group').
+        :return: The monitor itself.
+        :rtype: FairnessMonitor
+        """
+
+        if isinstance(batch, RecommendationLists):
+            batch = batch.to_frame()
+        check_columns_exist(batch, ["user", "item", "rank", "group"])
+
+        if self.n_batches == self.window:
+            if self.tumbling:
+                self._reset()
+            else:
+                self._add(self.batches.popleft(), sign=-1)
+                self.n_batches -= 1
+                self._compact()
+
+        weights = exposure(batch["rank"].to_numpy(), self.discount, self.persistence)
+        groups = self.vocabularies["group"].encode(batch["group"], update=True)
+        totals = {"groups": _sparse_totals(groups, weights)}
+        if self.entity is not None:
+            entities = self.vocabularies[self.entity].encode(
+                batch[self.entity], update=True
+            )
+            cells = self.vocabularies["cell"].encode(
+                cell_keys(entities, groups), update=True
+            )
+            totals["entities"] = _sparse_totals(entities, weights)
+            totals["cells"] = _sparse_totals(cells, weights)
+
+        self._add(totals, sign=1)
+        self.n_batches += 1
+        if self.window is not None and not self.tumbling:
+            self.batches.append(totals)
+        return self
+
+    def _add(self, totals: dict, sign: int) -> None:
+        """
+        Add (or remove, with sign -1) the sparse totals of a batch.
+        """
+
+        for name, (codes, weights) in totals.items():
+            getattr(self, name).add(codes, weights, sign)
+
+        if self.target is not None:
+            codes, weights = totals["groups"]
+            known = codes < len(self.target)
+            codes, weights = codes[known], weights[known]
+            known = ~np.isnan(self.target[codes])
+            codes, weights = codes[known], weights[known]
+            self.targeted.add(codes, weights, sign)
+            self.target_xlogt += sign * np.sum(weights * np.log2(self.target[codes]))
+
+    def _compact(self) -> None:
+        """
+        Forget the entities, and the (entity, group) pairs, of the expired batches, once they outnumber
+        the ones in the window, so that the memory is bounded by the traffic of the window.
+        """
+
+        if self.entity is None:
+            return
+        entities, cells = self.vocabularies[self.entity], self.vocabularies["cell"]
+        if (
+            len(entities) <= 2 * self.entities.n_live
+            and len(cells) <= 2 * self.cells.n_live
+        ):
+            return
+
+        live_entities = self.entities.batches[: len(entities)] > 0
+        live_cells = self.cells.batches[: len(cells)] > 0
+        entity_codes = np.cumsum(live_entities) - 1
+        cell_codes = np.cumsum(live_cells) - 1
+
+        # The keys of the live pairs are rebuilt with the new entity codes.
+        keys = cells.ids[live_cells].astype(np.int64)
+        self.vocabularies[self.entity] = Vocabulary(entities.ids[live_entities])
+        self.vocabularies["cell"] = Vocabulary(
+            cell_keys(entity_codes[keys >> 32], keys & 0xFFFFFFFF)
+        )
+        self.entities.compact(live_entities)
+        self.cells.compact(live_cells)
+        for batch in self.batches:
+            for name, new_codes in (("entities", entity_codes), ("cells", cell_codes)):
+                codes, weights = batch[name]
+                batch[name] = (new_codes[codes], weights)
+
+    def entropy(self) -> float:
+        """
+        Entropy of the exposure over the groups in the window.
+
+        :return: The entropy, in bits, or NaN if the window is empty.
+        :rtype: float
+        """
+
+        total = self.groups.total
+        if total <= 0:
+            return np.nan
+        return np.log2(total) - self.groups.xlogx / total
+
+    def kullback_leibler(self) -> float:
+        """
+        Kullback-Leibler divergence of the exposure over the groups in the window from the target representation.
+        As in KullbackLeibler, the groups without a target are ignored.
+
+        :raises MetricNotTrackedException: If the monitor has no target representation.
+        :raises TargetGroupsNotFoundException: If none of the target groups is a group of the window.
+        :return: The divergence, in bits, or NaN if the window is empty.
+        :rtype: float
+        """
+
+        if self.target is None:
+            raise MetricNotTrackedException("KullbackLeibler")
+        total = self.groups.total
+        if total <= 0:
+            return np.nan
+        if self.targeted.total <= 0:
+            raise TargetGroupsNotFoundException(
+                np.count_nonzero(~np.isnan(self.target))
+            )
+        return (
+            self.targeted.xlogx
+            - self.targeted.total * np.log2(total)
+            - self.target_xlogt
+        ) / total
+
+    def mutual_information(self) -> float:
+        """
+        Mutual Information between the entities (users or items) and the groups of the exposure in the window.
+
+        :raises MetricNotTrackedException: If the monitor has no flag.
+        :return: The Mutual Information, in bits, or NaN if the window is empty.
+        :rtype: float
+        """
+
+        if self.entity is None:
+            raise MetricNotTrackedException("MutualInformation")
+        total = self.groups.total
+        if total <= 0:
+            return np.nan
+        return (
+            np.log2(total)
+            + (self.cells.xlogx - self.entities.xlogx - self.groups.xlogx) / total
+        )
+
+    def metrics(self) -> pd.Series:
+        """
+        Every metric the monitor keeps track of.
+        The Entropy is the one of the exposure, i.e. Entropy().evaluate(exp_matrix(window)): it intentionally
+        differs from Entropy().evaluate(window) without rel_matrix, which sums the raw ranks of every group.
+
+        :return: The metrics, in the form ('Entropy', 'KullbackLeibler', 'MutualInformation').
+        :rtype: pd.Series
+        """
+
+        metrics = {"Entropy": self.entropy()}
+        if self.target is not None:
+            metrics["KullbackLeibler"] = self.kullback_leibler()
+        if self.entity is not None:
+            metrics["MutualInformation"] = self.mutual_information()
+        return pd.Series(metrics)
+
+
+def _sparse_totals(codes: np.ndarray, weights: np.ndarray) -> tuple:
+    """
+    Total weight of every distinct code.
+    """
+
+    codes, index = np.unique(codes, return_inverse=True)
+    return codes, np.bincount(index.ravel(), weights=weights)
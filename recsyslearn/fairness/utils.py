@@ -1,24 +1,43 @@
+from __future__ import annotations
+
+import warnings
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.errors.errors import (
+    InvalidDiscountException,
+    TargetGroupsNotFoundException,
+)
 from recsyslearn.utils import check_columns_exist
 
+DISCOUNTS = ("log", "rbp", "cascade", "uniform")
+
 
-def exp_matrix(top_n: pd.DataFrame) -> pd.DataFrame:
+def exp_matrix(
+    top_n: pd.DataFrame, discount: str = "log", persistence: float = 0.5
+) -> pd.DataFrame:
     """
     Compute exposure matrix for given recommendation lists.
 
     :param top_n: Recommendation lists per user in the form (user, item, rank, group).
     :type top_n: pd.DataFrame
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
     :raises ColumnsNotExistException: If top_n is not in the form (user, item, rank, group).
-    :return: The DataFrame with computed exposure.
+    :raises InvalidDiscountException: If discount is not one of DISCOUNTS.
+    :return: A copy of the DataFrame with computed exposure.
     :rtype: pd.DataFrame
     """
 
     check_columns_exist(top_n, ["user", "item", "rank", "group"])
 
-    top_n["rank"] = 1 / np.log2(1 + top_n["rank"])
-    return top_n
+    return top_n.assign(rank=exposure(top_n["rank"].to_numpy(), discount, persistence))
 
 
 def prob_matrix(top_n: pd.DataFrame) -> pd.DataFrame:
@@ -28,17 +47,21 @@ def prob_matrix(top_n: pd.DataFrame) -> pd.DataFrame:
     :param top_n: Recommendation lists per user in the form (user, item, rank, group).
     :type top_n: pd.DataFrame
     :raises ColumnsNotExistException: If top_n is not in the form (user, item, rank, group).
-    :return: The DataFrame with computed probability distribution.
+    :return: A copy of the DataFrame with computed probability distribution.
     :rtype: pd.DataFrame
     """
 
     check_columns_exist(top_n, ["user", "item", "rank", "group"])
 
-    top_n["rank"] = top_n["rank"] / top_n["rank"].sum()
-    return top_n
+    return top_n.assign(rank=top_n["rank"] / top_n["rank"].sum())
 
 
-def eff_matrix(top_n: pd.DataFrame, rel_matrix: pd.DataFrame) -> pd.DataFrame:
+def eff_matrix(
+    top_n: pd.DataFrame,
+    rel_matrix: pd.DataFrame,
+    discount: str = "log",
+    persistence: float = 0.5,
+) -> pd.DataFrame:
     """
     Compute effectiveness matrix for given recommendation lists.
 
@@ -46,17 +69,412 @@ def eff_matrix(top_n: pd.DataFrame, rel_matrix: pd.DataFrame) -> pd.DataFrame:
     :type top_n: pd.DataFrame
     :param rel_matrix: Dataframe containing relevant items for every user.
     :type rel_matrix: pd.DataFrame
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
     :raises ColumnsNotExistException: If top_n header is not in the form (user, item, rank, group)
         of if rel_matrix header is not in the form (user, item, rank).
-    :return: The DataFrame with computed effectiveness.
+    :raises InvalidDiscountException: If discount is not one of DISCOUNTS.
+    :return: The DataFrame with computed effectiveness, i.e. the exposure of every recommendation times the 'rank'
+        of the matching (user, item, group) row of rel_matrix, 0 if there is none. Relevant items that were not
+        recommended have no effectiveness, so they are not included.
     :rtype: pd.DataFrame
     """
 
     check_columns_exist(top_n, ["user", "item", "rank", "group"])
     check_columns_exist(rel_matrix, ["user", "item", "rank", "group"])
 
-    top_n = exp_matrix(top_n)
-    top_n = top_n.merge(rel_matrix, on=["user", "item", "group"], how="outer")
-    top_n.loc[:, ["rank_x", "rank_y"]] = top_n.loc[:, ["rank_x", "rank_y"]].fillna(0)
-    top_n["rank"] = top_n["rank_x"] * top_n["rank_y"]
-    return top_n[["user", "item", "rank", "group"]]
+    # Only the (user, item) keys of top_n are encoded, so that rel_matrix rows never recommended are skipped.
+    vocabularies = {
+        col: Vocabulary.fit(top_n[col]) for col in ("user", "item", "group")
+    }
+    relevance = match_relevance(
+        relevance_table(rel_matrix, vocabularies),
+        *(vocabularies[col].encode(top_n[col]) for col in ("user", "item", "group")),
+    )
+    return pd.DataFrame(
+        {
+            "user": top_n["user"],
+            "item": top_n["item"],
+            "rank": exposure(top_n["rank"].to_numpy(), discount, persistence)
+            * relevance,
+            "group": top_n["group"],
+        }
+    )
+
+
+def exposure(
+    ranks: np.ndarray, discount: str = "log", persistence: float = 0.5
+) -> np.ndarray:
+    """
+    Compute the exposure of recommendations at the given ranks, as a new array.
+    Integer ranks are looked up in a cached discount table (see discount_table).
+    The available discounts are:
+
+    - 'log': 1 / log2(1 + rank), as in DCG.
+    - 'rbp': persistence ** (rank - 1), as in Rank-Biased Precision.
+    - 'cascade': 1 / rank, the probability of reaching the rank for a user who, after rank r, stops with probability 1 / (r + 1).
+    - 'uniform': 1, i.e. every rank gets the same exposure.
+
+    :param ranks: Ranks of the recommendations.
+    :type ranks: np.ndarray
+    :param discount: The model of the exposure of every rank.
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :raises InvalidDiscountException: If discount is not one of DISCOUNTS.
+    :return: The exposure of every recommendation.
+    :rtype: np.ndarray
+    """
+
+    ranks = np.asarray(ranks)
+    if np.issubdtype(ranks.dtype, np.integer) and len(ranks) and ranks.min() >= 0:
+        # Power-of-two table sizes, so that lists of similar length share the table.
+        size = 1 << int(ranks.max()).bit_length()
+        return discount_table(size, discount, persistence)[ranks]
+    return _discount(ranks.astype(float), discount, persistence)
+
+
+@lru_cache(maxsize=None)
+def discount_table(
+    size: int, discount: str = "log", persistence: float = 0.5
+) -> np.ndarray:
+    """
+    Compute the exposure of every integer rank in [0, size), once per arguments.
+
+    :param size: Number of ranks.
+    :type size: int
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :raises InvalidDiscountException: If discount is not one of DISCOUNTS.
+    :return: The read-only table, indexed by rank.
+    :rtype: np.ndarray
+    """
+
+    table = _discount(np.arange(size, dtype=float), discount, persistence)
+    table.flags.writeable = False
+    return table
+
+
+def _discount(ranks: np.ndarray, discount: str, persistence: float) -> np.ndarray:
+    """
+    Exposure of the given float ranks.
+    """
+
+    if discount not in DISCOUNTS:
+        raise InvalidDiscountException(discount)
+
+    with np.errstate(divide="ignore"):
+        if discount == "log":
+            return 1 / np.log2(1 + ranks)
+        if discount == "rbp":
+            return persistence ** (ranks - 1)
+        if discount == "cascade":
+            return 1 / ranks
+    return np.ones_like(ranks)
+
+
+def lists_weights(
+    top_n: RecommendationLists,
+    relevance: tuple = None,
+    discount: str = "log",
+    persistence: float = 0.5,
+) -> np.ndarray:
+    """
+    Compute the exposure, or the effectiveness if the relevance table is given, of every recommendation.
+
+    :param top_n: Recommendation lists with items or users already segmented.
+    :type top_n: RecommendationLists
+    :param relevance: Relevance table encoded as the lists (see relevance_table).
+    :type relevance: tuple, default None
+    :param discount: The model of the exposure of every rank (see exposure).
+    :type discount: str, default 'log'
+    :param persistence: The probability of moving to the next rank, for the 'rbp' discount.
+    :type persistence: float, default 0.5
+    :return: The weight of every recommendation.
+    :rtype: np.ndarray
+    """
+
+    weights = exposure(top_n.ranks, discount, persistence)
+    if relevance is not None:
+        weights = weights * match_relevance(
+            relevance, top_n.user_codes, top_n.items, top_n.columns.get("group")
+        )
+    return weights
+
+
+def relevance_table(
+    rel_matrix: pd.DataFrame,
+    vocabularies: dict,
+    update: bool = False,
+    grouped: bool = True,
+) -> tuple:
+    """
+    Encode a relevance matrix with the vocabularies of the recommendation lists, sorted by (user, item).
+
+    :param rel_matrix: Dataframe containing relevant items for every user.
+    :type rel_matrix: pd.DataFrame
+    :param vocabularies: Vocabularies of the recommendation lists ('user', 'item' and 'group').
+    :type vocabularies: dict
+    :param update: Whether to add the IDs of rel_matrix to the vocabularies, so that lists encoded later
+        (e.g., the following chunks of a stream) can be matched too.
+    :type update: bool, default False
+    :param grouped: Whether rel_matrix is segmented, so that the group of a recommendation must match too.
+    :type grouped: bool, default True
+    :raises ColumnsNotExistException: If rel_matrix header is not in the form (user, item, rank, group), or (user, item, rank) if not grouped.
+    :return: The sorted (user, item) keys, the group codes (None if not grouped) and the 'rank' values of the known rows.
+    :rtype: tuple
+    """
+
+    columns = ("user", "item", "group") if grouped else ("user", "item")
+    check_columns_exist(rel_matrix, [*columns, "rank"])
+
+    if update:
+        for col in columns:
+            vocabularies.setdefault(col, Vocabulary())
+    codes = {
+        col: vocabularies[col].encode(rel_matrix[col], update=update) for col in columns
+    }
+    known = np.logical_and.reduce([codes[col] >= 0 for col in columns])
+
+    keys = cell_keys(codes["user"][known], codes["item"][known])
+    order = np.argsort(keys, kind="stable")
+    return (
+        keys[order],
+        codes["group"][known][order] if grouped else None,
+        rel_matrix["rank"].to_numpy(dtype=float)[known][order],
+    )
+
+
+def match_relevance(
+    relevance: tuple, users: np.ndarray, items: np.ndarray, groups: np.ndarray
+) -> np.ndarray:
+    """
+    Find the relevance of every recommendation with a sorted-key intersection.
+
+    :param relevance: Relevance table encoded as the recommendations (see relevance_table).
+    :type relevance: tuple
+    :param users: User code of every recommendation.
+    :type users: np.ndarray
+    :param items: Item code of every recommendation.
+    :type items: np.ndarray
+    :param groups: Group code of every recommendation, ignored if the table is not grouped.
+    :type groups: np.ndarray
+    :return: The 'rank' value of the matching (user, item, group) row of the table for every recommendation, 0 if there is none.
+    :rtype: np.ndarray
+    """
+
+    rel_keys, rel_groups, rel_values = relevance
+    if len(rel_keys) == 0:
+        return np.zeros(len(users))
+
+    keys = cell_keys(users, items)
+    positions = np.minimum(np.searchsorted(rel_keys, keys), len(rel_keys) - 1)
+    matched = rel_keys[positions] == keys
+    if rel_groups is not None:
+        matched &= rel_groups[positions] == groups
+    return np.where(matched, rel_values[positions], 0.0)
+
+
+def cell_keys(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Pack pairs of int32 codes into sortable int64 keys.
+
+    :param rows: Codes in the high 32 bits.
+    :type rows: np.ndarray
+    :param cols: Codes in the low 32 bits.
+    :type cols: np.ndarray
+    :return: The keys (rows << 32) | cols.
+    :rtype: np.ndarray
+    """
+
+    return (rows.astype(np.int64) << 32) | cols.astype(np.int64)
+
+
+def entropy(group_weights: np.ndarray) -> float:
+    """
+    Compute the entropy of the distribution of the given weights over the groups.
+
+    :param group_weights: Total weight of every group.
+    :type group_weights: np.ndarray
+    :return: The entropy, in bits.
+    :rtype: float
+    """
+
+    distribution = group_weights / group_weights.sum()
+    distribution = distribution[distribution > 0]
+    return -np.sum(distribution * np.log2(distribution))
+
+
+def kullback_leibler(
+    group_weights: np.ndarray,
+    target_representation: pd.DataFrame,
+    vocabulary: Vocabulary,
+) -> float:
+    """
+    Compute the Kullback-Leibler divergence of the distribution of the given weights over the groups
+    from the target one. The targets are placed in an array indexed by group code, so that no merge is needed
+    with many groups. Target groups which are not recommended are ignored, and so are (with a warning)
+    recommended groups without a target.
+
+    :param group_weights: Total weight of every group code.
+    :type group_weights: np.ndarray
+    :param target_representation: The target representation desired for each group.
+    :type target_representation: pd.DataFrame
+    :param vocabulary: The vocabulary of the group codes.
+    :type vocabulary: Vocabulary
+    :raises TargetGroupsNotFoundException: If none of the target groups is a group of the recommendations.
+    :return: The divergence, in bits.
+    :rtype: float
+    """
+
+    distribution = group_weights / group_weights.sum()
+    target = target_array(target_representation, vocabulary, len(distribution))
+    represented = (distribution > 0) & ~np.isnan(target)
+    n_untargeted = np.count_nonzero(distribution > 0) - np.count_nonzero(represented)
+    if n_untargeted > 0:
+        warnings.warn(
+            f"{n_untargeted} groups of the recommendations have no target representation and are ignored"
+        )
+    return np.sum(
+        distribution[represented]
+        * np.log2(distribution[represented] / target[represented])
+    )
+
+
+def target_array(
+    target_representation: pd.DataFrame, vocabulary: Vocabulary, size: int
+) -> np.ndarray:
+    """
+    Place the target representation in an array indexed by group code.
+
+    :param target_representation: The target representation desired for each group.
+    :type target_representation: pd.DataFrame
+    :param vocabulary: The vocabulary of the group codes.
+    :type vocabulary: Vocabulary
+    :param size: Number of group codes.
+    :type size: int
+    :raises TargetGroupsNotFoundException: If there are groups, but none of the target groups is one of them.
+    :return: The target of every group code, NaN for the groups without a target.
+    :rtype: np.ndarray
+    """
+
+    groups = vocabulary.encode(target_representation["group"])
+    known = (groups >= 0) & (groups < size)
+    # e.g., integer groups in the recommendations and string groups in the target.
+    if size > 0 and len(groups) > 0 and not known.any():
+        raise TargetGroupsNotFoundException(len(groups))
+    target = np.full(size, np.nan)
+    target[groups[known]] = target_representation["target_representation"].to_numpy(
+        float
+    )[known]
+    return target
+
+
+def entity_exposure(
+    top_n: RecommendationLists, entity: str, weights: np.ndarray
+) -> tuple:
+    """
+    Distribute the weight received by every entity (user or item) over the groups, with one segmented reduction
+    over the (entity, group) keys of the recommendations.
+
+    :param top_n: Recommendation lists with items or users already segmented.
+    :type top_n: RecommendationLists
+    :param entity: Either 'user' or 'item'.
+    :type entity: str
+    :param weights: Weight (e.g., exposure) of every recommendation.
+    :type weights: np.ndarray
+    :return: The entity codes, the group codes and the share of the weight of the entity of every
+        (entity, group) pair, sorted by entity and group code.
+    :rtype: tuple
+    """
+
+    entities = {"user": top_n.user_codes, "item": top_n.items}[entity]
+    cells, cell_index = np.unique(
+        cell_keys(entities, top_n.columns["group"]), return_inverse=True
+    )
+    totals = np.bincount(cell_index.ravel(), weights=weights)
+    entities, groups = cells >> 32, cells & 0xFFFFFFFF
+    with np.errstate(invalid="ignore"):
+        shares = totals / np.bincount(entities, weights=totals)[entities]
+    return entities, groups, shares
+
+
+def group_totals(groups: pd.Series, weights: np.ndarray) -> tuple:
+    """
+    Sum the weights of every group of a column of raw group IDs, through integer codes instead of a groupby.
+    Rows without a group are summed in a last total that belongs to no group, so that they still count
+    when the totals are normalized.
+
+    :param groups: Group of every row.
+    :type groups: pd.Series
+    :param weights: Weight of every row.
+    :type weights: np.ndarray
+    :return: The total weight of every group code and the vocabulary of the codes.
+    :rtype: tuple
+    """
+
+    codes, uniques = pd.factorize(groups)
+    codes = np.where(codes < 0, len(uniques), codes)
+    totals = np.bincount(codes, weights=weights, minlength=len(uniques) + 1)
+    return totals, Vocabulary(uniques)
+
+
+def mutual_information(
+    entities: np.ndarray, groups: np.ndarray, weights: np.ndarray
+) -> float:
+    """
+    Compute the Mutual Information between entities (users or items) and groups,
+    with the joint distribution given by the weights of (entity, group) pairs. Pairs may repeat.
+
+    :param entities: Entity code of every pair.
+    :type entities: np.ndarray
+    :param groups: Group code of every pair.
+    :type groups: np.ndarray
+    :param weights: Weight of every pair.
+    :type weights: np.ndarray
+    :return: The Mutual Information, in bits.
+    :rtype: float
+    """
+
+    cells, cell_index = np.unique(cell_keys(entities, groups), return_inverse=True)
+    P_xy = np.bincount(cell_index.ravel(), weights=weights)
+    P_xy = P_xy / P_xy.sum()
+    cell_entities, cell_groups = cells >> 32, cells & 0xFFFFFFFF
+    P_x = np.bincount(cell_entities, weights=P_xy)[cell_entities]
+    P_y = np.bincount(cell_groups, weights=P_xy)[cell_groups]
+    joint = P_xy > 0
+    return np.sum(P_xy[joint] * np.log2(P_xy[joint] / (P_x[joint] * P_y[joint])))
+
+
+def segmentation_frames(segmentations: dict | pd.DataFrame) -> dict:
+    """
+    Normalize several segmentations of the same recommendations to one (entity, group) frame per segmentation.
+
+    :param segmentations: Either the output of Segmentation.segment for every segmentation name,
+        or a group matrix with the 'item' (or 'user') column and one column of groups per segmentation.
+    :type segmentations: dict or pd.DataFrame
+    :raises ColumnsNotExistException: If a segmentation is not in the form ('item' or 'user', 'group'),
+        or if the group matrix has neither the 'item' nor the 'user' column.
+    :return: The segmentations in the form ('item' or 'user', 'group'), by name, without missing groups.
+    :rtype: dict
+    """
+
+    if isinstance(segmentations, pd.DataFrame):
+        entity = "user" if "item" not in segmentations.columns else "item"
+        check_columns_exist(segmentations, [entity])
+        segmentations = {
+            col: segmentations[[entity, col]].rename(columns={col: "group"})
+            for col in segmentations.columns
+            if col != entity
+        }
+
+    frames = {}
+    for name, segmentation in segmentations.items():
+        entity = "user" if "item" not in segmentation.columns else "item"
+        check_columns_exist(segmentation, [entity, "group"])
+        frames[name] = segmentation[[entity, "group"]].dropna(subset=["group"])
+    return frames
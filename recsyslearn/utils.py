@@ -1,30 +1,198 @@
+from __future__ import annotations
+
+import copy
+import multiprocessing
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+import numpy as np
 import pandas as pd
 
-from recsyslearn.errors.errors import ColumnsNotExistException
+from recsyslearn.errors.errors import (
+    ColumnsNotExistException,
+    InvalidParameterException,
+)
 
 
 def check_columns_exist(df: pd.DataFrame, columns: list) -> pd.DataFrame:
     """
     Raise ColumnsNotExistException if pd.Dataframe does not contain the expected columns.
+    The DataFrame is neither copied nor cast, so that integer-encoded IDs
+    (see recsyslearn.dataset.Interactions) are kept as they are.
 
     :param df: Input that should be tested.
     :type df: pd.DataFrame
     :param columns: pd.DataFrame columns that should be contained.
     :type columns: list
     :raises ColumnsNotExistException: If input does not contained expected columns.
-    :return: The DataFrame with the expected columns and types.
+    :return: The input DataFrame.
     :rtype: pd.DataFrame
     """
 
     if not set(columns).issubset(set(df.columns)):
         raise ColumnsNotExistException(columns)
 
-    dtypes = {
-        "user": str,
-        "item": str,
-        "rank": float,
-        "group": str,
-        "target_representation": float,
-    }
+    return df
+
+
+def user_aligned(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """
+    Re-chunk a stream of recommendations so that the list of every user is entirely contained in one chunk.
+    The rows of every user must be contiguous in the stream (e.g., a top-N file sorted by user),
+    but a list may be split across the input chunks, as it happens with pd.read_csv(chunksize=...).
+
+    :param chunks: The input chunks, in the form ('user', 'item', 'rank', ...).
+    :type chunks: Iterable[pd.DataFrame]
+    :raises ColumnsNotExistException: If a chunk does not contain the column 'user'.
+    :return: The user-aligned chunks.
+    :rtype: Iterator[pd.DataFrame]
+    """
+
+    carry = None
+    for chunk in chunks:
+        check_columns_exist(chunk, ["user"])
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        if len(chunk) == 0:
+            continue
+
+        users = chunk["user"].to_numpy()
+        changes = np.flatnonzero(users[1:] != users[:-1])
+        boundary = changes[-1] + 1 if len(changes) > 0 else 0
+        carry = chunk.iloc[boundary:]
+        if boundary > 0:
+            yield chunk.iloc[:boundary]
+
+    if carry is not None and len(carry) > 0:
+        yield carry
+
+
+class Accumulator(ABC):
+
+    """
+    Abstract class for the running aggregates of a metric, which is evaluated
+    by updating them chunk after chunk and finalizing them at the end.
+    Accumulators updated on disjoint sets of users (e.g., on separate workers) can be merged,
+    so that the finalized value is the one of a single accumulator updated with every chunk.
+    """
+
+    #: Attributes holding read-only inputs (e.g., the ground truth), which parallel workers
+    #: share with the parent process instead of copying them.
+    shared = ()
+
+    @abstractmethod
+    def update(self, chunk: pd.DataFrame) -> Accumulator:
+        """
+        Add a user-aligned chunk of recommendations to the aggregates.
+
+        :param chunk: Recommendations of some users, in the form ('user', 'item', 'rank', ...).
+        :type chunk: pd.DataFrame
+        :return: The accumulator itself.
+        :rtype: Accumulator
+        """
+
+    @abstractmethod
+    def merge(self, other: Accumulator) -> Accumulator:
+        """
+        Add the aggregates of another accumulator of the same metric, updated on different users.
+        The codes of other are mapped to the ones of this accumulator, so the two need not share vocabularies.
+
+        :param other: The accumulator to merge.
+        :type other: Accumulator
+        :return: The accumulator itself.
+        :rtype: Accumulator
+        """
+
+    @abstractmethod
+    def finalize(self):
+        """
+        Compute the metric from the aggregates.
+
+        :return: The same value returned by the evaluate method of the metric.
+        """
+
+    def consume(self, chunks: Iterable[pd.DataFrame]):
+        """
+        Update the aggregates with every user-aligned chunk of a stream and finalize them.
+
+        :param chunks: The chunks, in the form ('user', 'item', 'rank', ...).
+        :type chunks: Iterable[pd.DataFrame]
+        :return: The same value returned by the evaluate method of the metric.
+        """
+
+        for chunk in user_aligned(chunks):
+            self.update(chunk)
+        return self.finalize()
+
+    def consume_parallel(self, top_n, n_jobs: int = -1):
+        """
+        Update the aggregates with shards of the users of top_n on a process pool, merge them and finalize them.
+        Where processes are forked, the workers read the inputs and the shared attributes from the memory
+        of the parent process, otherwise they are sent once per worker. Only the aggregates are sent back.
+
+        :param top_n: The recommendations, in the form ('user', 'item', 'rank', ...).
+        :type top_n: pd.DataFrame or RecommendationLists
+        :param n_jobs: Number of processes, -1 for one per CPU.
+        :type n_jobs: int, default -1
+        :raises InvalidParameterException: If n_jobs is neither a positive integer nor -1.
+        :raises ColumnsNotExistException: If top_n does not contain the column 'user'.
+        :return: The same value returned by the evaluate method of the metric.
+        """
+
+        global _worker_inputs
+
+        if isinstance(n_jobs, bool) or not (
+            isinstance(n_jobs, (int, np.integer)) and (n_jobs >= 1 or n_jobs == -1)
+        ):
+            raise InvalidParameterException(
+                "n_jobs", n_jobs, "a positive integer or -1"
+            )
+        if not isinstance(top_n, pd.DataFrame):
+            top_n = top_n.to_frame()
+        check_columns_exist(top_n, ["user"])
+        n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        users = np.array_split(top_n["user"].unique(), n_jobs)
+        shards = [top_n[top_n["user"].isin(part)] for part in users if len(part) > 0]
+
+        forked = "fork" in multiprocessing.get_all_start_methods()
+        _worker_inputs = (self, shards)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=len(shards),
+                mp_context=multiprocessing.get_context("fork") if forked else None,
+                initializer=None if forked else _init_worker,
+                initargs=() if forked else (self, shards),
+            ) as pool:
+                for partial in pool.map(_update_shard, range(len(shards))):
+                    for name in self.shared:
+                        setattr(partial, name, getattr(self, name))
+                    self.merge(partial)
+        finally:
+            _worker_inputs = None
+        return self.finalize()
+
+
+_worker_inputs = None
+
+
+def _init_worker(accumulator: Accumulator, shards: list) -> None:
+    global _worker_inputs
+    _worker_inputs = (accumulator, shards)
+
 
-    return df.astype({col: dtypes[col] for col in df.columns if col in dtypes.keys()})
+def _update_shard(index: int) -> Accumulator:
+    accumulator, shards = _worker_inputs
+    # The shared attributes are not copied, neither into the partial nor back to the parent.
+    partial = copy.deepcopy(
+        accumulator,
+        {
+            id(getattr(accumulator, name)): getattr(accumulator, name)
+            for name in accumulator.shared
+        },
+    )
+    partial.update(shards[index])
+    for name in accumulator.shared:
+        setattr(partial, name, None)
+    return partial
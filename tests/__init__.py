@@ -1,9 +1,20 @@
-from .test_accuracy import NDCGTest
+from .test_accuracy import NDCGTest, RankingMetricsTest
 from .test_beyond_accuracy import CoverageTest, NoveltyTest
+from .test_containers import RecommendationListsTest, RelevanceIndexTest
 from .test_errors import ErrorTest
-from .test_fairness import EntropyTest, KullbackLeiblerTest, MutualInformationTest
+from .test_examples import ExamplesTest
+from .test_fairness import (
+    DiscountTest,
+    EntropyTest,
+    FairnessBySegmentationTest,
+    FairnessMetricsTest,
+    KullbackLeiblerTest,
+    MutualInformationTest,
+)
+from .test_monitor import FairnessMonitorTest
 from .test_segmentations import (
     ActivitySegmentationTest,
+    IncrementalSegmentationTest,
     InteractionSegmentationTest,
     ItemDiscreteFeatureSegmentationTest,
     ItemPopularityPercentageTest,
@@ -11,7 +22,9 @@ from .test_segmentations import (
     UserPopularityPercentageTest,
 )
 from .test_utils import EffMatrixTest, ExpMatrixTest, ProbMatrixTest, SmallUtilsTest
+from .test_vocabulary import InteractionsTest, VocabularyTest
 from .utils import (
+    chunked,
     dataset_item_example,
     dataset_popularity,
     first_example,
@@ -24,6 +37,7 @@ from .utils import (
     rel_matrix_3,
     rel_matrix_4,
     second_example,
+    sharded,
     top_n_1,
     user_error_feature,
     user_feature,
@@ -33,13 +47,22 @@ from .utils import (
 
 __all__ = [
     "NDCGTest",
+    "RankingMetricsTest",
     "CoverageTest",
     "NoveltyTest",
+    "RecommendationListsTest",
+    "RelevanceIndexTest",
     "ErrorTest",
+    "ExamplesTest",
     "EntropyTest",
     "KullbackLeiblerTest",
     "MutualInformationTest",
+    "FairnessMetricsTest",
+    "FairnessBySegmentationTest",
+    "DiscountTest",
+    "FairnessMonitorTest",
     "ActivitySegmentationTest",
+    "IncrementalSegmentationTest",
     "InteractionSegmentationTest",
     "ItemDiscreteFeatureSegmentationTest",
     "ItemPopularityPercentageTest",
@@ -49,6 +72,9 @@ __all__ = [
     "ExpMatrixTest",
     "ProbMatrixTest",
     "SmallUtilsTest",
+    "InteractionsTest",
+    "VocabularyTest",
+    "chunked",
     "dataset_item_example",
     "dataset_popularity",
     "first_example",
@@ -61,6 +87,7 @@ __all__ = [
     "rel_matrix_3",
     "rel_matrix_4",
     "second_example",
+    "sharded",
     "top_n_1",
     "user_error_feature",
     "user_feature",
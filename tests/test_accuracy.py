@@ -4,9 +4,23 @@ import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
-from recsyslearn.accuracy.metrics import NDCG
-from recsyslearn.errors.errors import RecListTooShortException
-from tests.utils import pos_items, top_n_1
+from recsyslearn.accuracy.metrics import (
+    MAP,
+    MRR,
+    NDCG,
+    AccuracyMetric,
+    HitRate,
+    Precision,
+    RankingMetrics,
+    Recall,
+)
+from recsyslearn.dataset.containers import RecommendationLists, RelevanceIndex
+from recsyslearn.dataset.utils import find_relevant_items
+from recsyslearn.errors.errors import (
+    InvalidParameterException,
+    RecListTooShortException,
+)
+from tests.utils import chunked, pos_items, rel_matrix_3, sharded, top_n_1
 
 
 class NDCGTest(unittest.TestCase):
@@ -49,6 +63,40 @@ class NDCGTest(unittest.TestCase):
         )
         assert_frame_equal(ndcg_df, ndcg_vals)
 
+    def test_ndcg_multiple_ats(self) -> None:
+        shuffled = top_n_1.sample(frac=1, random_state=42)
+        ndcg_df = NDCG().evaluate(shuffled, pos_items, ats=(1, 3, 5))
+        for k in (1, 3, 5):
+            assert_frame_equal(
+                ndcg_df[["user", f"NDCG@{k}"]],
+                NDCG().evaluate(top_n_1, pos_items, ats=(k,)),
+            )
+
+    def test_ndcg_lists(self) -> None:
+        assert_frame_equal(
+            NDCG().evaluate(RecommendationLists.from_frame(top_n_1), pos_items, (2, 5)),
+            NDCG().evaluate(top_n_1, pos_items, (2, 5)),
+        )
+
+    def test_ndcg_graded(self) -> None:
+        graded_items = find_relevant_items(rel_matrix_3, relevance="rank")
+        ndcg_df = NDCG().evaluate(top_n_1, graded_items, ats=(2,))
+        gain = lambda rel: 2**rel - 1  # noqa: E731
+        self.assertAlmostEqual(
+            ndcg_df.loc[ndcg_df["user"] == "1", "NDCG@2"].item(),
+            (gain(0.143) / np.log(2))
+            / (gain(0.143) / np.log(2) + gain(0.077) / np.log(3)),
+            delta=1e-6,
+        )
+        assert_frame_equal(
+            ndcg_df,
+            NDCG().evaluate(
+                top_n_1,
+                find_relevant_items(rel_matrix_3, relevance="rank", as_index=True),
+                ats=(2,),
+            ),
+        )
+
     def test_ndcg_error(self) -> None:
         with self.assertRaises(RecListTooShortException) as context:
             NDCG().evaluate(top_n_1.iloc[[0, 1]], pos_items, ats=(3,))
@@ -59,5 +107,142 @@ class NDCGTest(unittest.TestCase):
         )
 
 
+class RankingMetricsTest(unittest.TestCase):
+    def test_incomplete_metric(self) -> None:
+        class Incomplete(AccuracyMetric):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    def test_precision(self) -> None:
+        precision = Precision().evaluate(top_n_1, pos_items, ats=(5,))
+        np.testing.assert_allclose(
+            precision["Precision@5"], [1 / 5, 2 / 5, 3 / 5, 3 / 5, 4 / 5, 1 / 5]
+        )
+
+    def test_recall(self) -> None:
+        recall = Recall().evaluate(top_n_1, pos_items, ats=(5,))
+        np.testing.assert_allclose(
+            recall["Recall@5"], [1 / 2, 2 / 2, 3 / 6, 3 / 6, 4 / 6, 1 / 1]
+        )
+
+    def test_map(self) -> None:
+        average_precision = MAP().evaluate(top_n_1, pos_items, ats=(5,))
+        np.testing.assert_allclose(
+            average_precision["MAP@5"],
+            [
+                1 / 2,
+                (1 / 3 + 2 / 4) / 2,
+                (1 / 2 + 2 / 4 + 3 / 5) / 5,
+                (1 / 2 + 2 / 3 + 3 / 5) / 5,
+                (1 / 1 + 2 / 2 + 3 / 4 + 4 / 5) / 5,
+                1,
+            ],
+        )
+
+    def test_mrr(self) -> None:
+        reciprocal_rank = MRR().evaluate(top_n_1, pos_items, ats=(2, 5))
+        np.testing.assert_allclose(reciprocal_rank["MRR@2"], [1, 0, 1 / 2, 1 / 2, 1, 1])
+        np.testing.assert_allclose(
+            reciprocal_rank["MRR@5"], [1, 1 / 3, 1 / 2, 1 / 2, 1, 1]
+        )
+
+    def test_hit_rate(self) -> None:
+        hit_rate = HitRate().evaluate(top_n_1, pos_items, ats=(1, 2))
+        np.testing.assert_allclose(hit_rate["HitRate@1"], [1, 0, 0, 0, 1, 1])
+        np.testing.assert_allclose(hit_rate["HitRate@2"], [1, 0, 1, 1, 1, 1])
+
+    def test_suite(self) -> None:
+        metrics_df = RankingMetrics().evaluate(top_n_1, pos_items, ats=(2, 5))
+        for metric in (NDCG, Precision, Recall, MAP, MRR, HitRate):
+            single_df = metric().evaluate(top_n_1, pos_items, ats=(2, 5))
+            assert_frame_equal(metrics_df[single_df.columns], single_df)
+
+    def test_chunks(self) -> None:
+        metrics_df = RankingMetrics().evaluate(top_n_1, pos_items, ats=(2, 5))
+        for size in (1, 7, len(top_n_1)):
+            chunks_df = RankingMetrics().evaluate_chunks(
+                chunked(top_n_1, size), pos_items, ats=(2, 5)
+            )
+            assert_frame_equal(chunks_df, metrics_df)
+
+        ndcg_df = NDCG().evaluate_chunks(chunked(top_n_1, 4), pos_items, ats=(2, 5))
+        assert_frame_equal(ndcg_df, NDCG().evaluate(top_n_1, pos_items, ats=(2, 5)))
+
+    def test_invalid_n_jobs(self) -> None:
+        for n_jobs in (0, -2, 1.5):
+            with self.assertRaises(InvalidParameterException):
+                NDCG().evaluate(top_n_1, pos_items, ats=(2,), n_jobs=n_jobs)
+
+    def test_shards(self) -> None:
+        metrics_df = RankingMetrics().evaluate(top_n_1, pos_items, ats=(2, 5))
+        for n_shards in (1, 2, 3):
+            accumulator = RankingMetrics().accumulator(pos_items, ats=(2, 5))
+            shards_df = sharded(accumulator, top_n_1, n_shards).finalize()
+            assert_frame_equal(shards_df, metrics_df)
+
+    def test_scores(self) -> None:
+        metrics_df = RankingMetrics().evaluate(top_n_1, pos_items, ats=(2, 5))
+        users, items = np.unique(top_n_1["user"]), np.unique(top_n_1["item"])
+        scores = (
+            top_n_1.assign(score=10 - top_n_1["rank"])
+            .pivot(index="user", columns="item", values="score")
+            .reindex(index=users, columns=items)
+            .fillna(0)
+            .to_numpy()
+        )
+        for batch_size in (1, 4, len(users)):
+            scores_df = RankingMetrics().evaluate_scores(
+                scores,
+                pos_items,
+                (2, 5),
+                users=users,
+                items=items,
+                batch_size=batch_size,
+            )
+            assert_frame_equal(scores_df, metrics_df)
+
+        # Excluded items are never recommended, whatever their score.
+        exclude = pd.DataFrame({"user": users, "item": "4"})
+        scores[:, list(items).index("4")] = 100
+        scores_df = NDCG().evaluate_scores(
+            scores, pos_items, (2, 5), users=users, items=items, exclude=exclude
+        )
+        top_n = top_n_1[top_n_1["item"] != "4"]
+        assert_frame_equal(
+            scores_df[["user", "NDCG@2"]],
+            NDCG().evaluate(top_n, pos_items, ats=(2,)),
+        )
+
+    def test_index_not_modified(self) -> None:
+        # Relevant items of the first users only, so that other users and items are recommended.
+        index = RelevanceIndex.from_pos_items(pos_items.iloc[:2])
+        ids = {
+            col: vocabulary.ids.tolist()
+            for col, vocabulary in index.vocabularies.items()
+        }
+        metrics_df = RankingMetrics().evaluate(top_n_1, index, ats=(2, 5))
+        assert_frame_equal(
+            metrics_df,
+            RankingMetrics().evaluate(top_n_1, pos_items.iloc[:2], ats=(2, 5)),
+        )
+        RankingMetrics().evaluate_chunks(chunked(top_n_1, 4), index, ats=(2, 5))
+        scores = np.ones((3, 4))
+        NDCG().evaluate_scores(scores, index, (2,), users=["a", "b", "c"])
+        for col, vocabulary in index.vocabularies.items():
+            self.assertListEqual(vocabulary.ids.tolist(), ids[col])
+
+    def test_n_jobs(self) -> None:
+        metrics_df = RankingMetrics().evaluate(top_n_1, pos_items, ats=(2, 5))
+        parallel_df = RankingMetrics().evaluate(
+            top_n_1, pos_items, ats=(2, 5), n_jobs=2
+        )
+        assert_frame_equal(parallel_df, metrics_df)
+
+        ndcg_df = NDCG().evaluate(top_n_1, pos_items, ats=(2, 5), n_jobs=3)
+        assert_frame_equal(ndcg_df, NDCG().evaluate(top_n_1, pos_items, ats=(2, 5)))
+
+
 if __name__ == "__main__":
     unittest.main()
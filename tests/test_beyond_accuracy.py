@@ -1,9 +1,25 @@
 import unittest
 
 import numpy as np
+import pandas as pd
 
 from recsyslearn.beyond_accuracy.metrics import Coverage, Novelty
-from tests.utils import first_example, item_groups, item_pop_perc, second_example
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.dataset.segmentations import PopularityPercentage
+from recsyslearn.dataset.vocabulary import Vocabulary
+from recsyslearn.errors import (
+    ColumnsNotExistException,
+    IncompatibleAccumulatorsException,
+    InvalidParameterException,
+)
+from tests.utils import (
+    chunked,
+    first_example,
+    item_groups,
+    item_pop_perc,
+    second_example,
+    sharded,
+)
 
 
 class CoverageTest(unittest.TestCase):
@@ -28,6 +44,103 @@ class CoverageTest(unittest.TestCase):
         cov = Coverage().evaluate(top_n, item_groups.item.tolist())
         self.assertAlmostEqual(cov, 0.4)
 
+    def test_coverage_lists(self) -> None:
+        top_n = RecommendationLists.from_frame(first_example)
+        cov = Coverage().evaluate(top_n, item_groups.item.tolist())
+        self.assertAlmostEqual(cov, 1.0)
+
+    def test_coverage_chunks(self) -> None:
+        top_n = first_example[first_example["item"] != "4"]
+        cov = Coverage().evaluate_chunks(chunked(top_n, 7), item_groups.item.tolist())
+        self.assertAlmostEqual(cov, 0.9)
+
+    def test_coverage_n_jobs(self) -> None:
+        top_n = first_example[first_example["item"] != "4"]
+        cov = Coverage().evaluate(top_n, item_groups.item.tolist(), n_jobs=2)
+        self.assertAlmostEqual(cov, 0.9)
+
+    def test_coverage_shards(self) -> None:
+        top_n = first_example[first_example["item"] != "4"]
+        accumulator = Coverage().accumulator(item_groups.item.tolist())
+        cov = sharded(accumulator, top_n, 3).finalize()
+        self.assertAlmostEqual(cov, 0.9)
+
+    def test_coverage_runs(self) -> None:
+        items = Vocabulary(item_groups["item"])
+        first = (
+            Coverage()
+            .accumulator(items)
+            .update(first_example[first_example["item"].isin(["1", "2", "3"])])
+        )
+        second = (
+            Coverage()
+            .accumulator(items)
+            .update(
+                RecommendationLists.from_frame(
+                    first_example[first_example["item"].isin(["3", "4"])]
+                )
+            )
+        )
+        # Items missing from the catalog count as covered, as in evaluate.
+        third = (
+            Coverage()
+            .accumulator(items)
+            .update(pd.DataFrame([["1", "11", 1]], columns=["user", "item", "rank"]))
+        )
+        self.assertAlmostEqual(first.merge(second).merge(third).finalize(), 0.5)
+
+    def test_coverage_sketch(self) -> None:
+        rng = np.random.default_rng(0)
+        items = np.arange(200_000)
+        top_n = pd.DataFrame(
+            {
+                "user": np.repeat(np.arange(5000), 10),
+                "item": rng.choice(items, 50_000),
+                "rank": np.tile(np.arange(1, 11), 5000),
+            }
+        )
+        expected = Coverage().evaluate(top_n, items)
+        cov = Coverage().evaluate(top_n, items, precision=14)
+        self.assertAlmostEqual(cov, expected, delta=0.03 * expected)
+        cov = Coverage().evaluate_chunks(chunked(top_n, 7000), items, precision=14)
+        self.assertAlmostEqual(cov, expected, delta=0.03 * expected)
+        cov = Coverage().evaluate(top_n, items, n_jobs=2, precision=14)
+        self.assertAlmostEqual(cov, expected, delta=0.03 * expected)
+        cov = Coverage().evaluate(first_example, item_groups["item"], precision=12)
+        self.assertAlmostEqual(cov, 1.0, delta=0.01)
+
+    def test_coverage_invalid_precision(self) -> None:
+        for precision in (0, 3, 19, 40):
+            self.assertRaises(
+                InvalidParameterException,
+                Coverage().evaluate,
+                first_example,
+                item_groups["item"],
+                precision=precision,
+            )
+        self.assertRaises(ValueError, Coverage().accumulator, item_groups["item"], 0)
+
+    def test_coverage_merge_incompatible(self) -> None:
+        items = item_groups["item"]
+        exact = Coverage().accumulator(items)
+        self.assertRaises(
+            IncompatibleAccumulatorsException,
+            exact.merge,
+            Coverage().accumulator(items, precision=12),
+        )
+        self.assertRaises(
+            IncompatibleAccumulatorsException,
+            Coverage().accumulator(items, precision=10).merge,
+            Coverage().accumulator(items, precision=12),
+        )
+        self.assertRaises(
+            IncompatibleAccumulatorsException,
+            exact.merge,
+            Coverage().accumulator(items[::-1]),
+        )
+        # Catalogs with the same IDs in the same order are compatible.
+        exact.merge(Coverage().accumulator(items.copy()))
+
 
 class NoveltyTest(unittest.TestCase):
     def setUp(self):
@@ -37,12 +150,16 @@ class NoveltyTest(unittest.TestCase):
     def test_novelty_one(self) -> None:
         top_n = first_example.merge(item_groups, on="item")
         nov = Novelty().evaluate(top_n)
-        self.assertAlmostEqual(nov, self.novelty(top_n["group"].to_numpy()), delta=1e-5)
+        self.assertAlmostEqual(
+            nov, self.novelty(top_n["group"].to_numpy(float)), delta=1e-5
+        )
 
     def test_novelty_two(self) -> None:
         top_n = second_example.merge(item_groups, on="item")
         nov = Novelty().evaluate(top_n)
-        self.assertAlmostEqual(nov, self.novelty(top_n["group"].to_numpy()), delta=1e-5)
+        self.assertAlmostEqual(
+            nov, self.novelty(top_n["group"].to_numpy(float)), delta=1e-5
+        )
 
     def test_novelty_three(self) -> None:
         top_n = first_example.merge(item_pop_perc, on="item")
@@ -51,6 +168,105 @@ class NoveltyTest(unittest.TestCase):
             nov, self.novelty(top_n["percentage"].to_numpy()), delta=1e-5
         )
 
+    def test_novelty_lists(self) -> None:
+        top_n = second_example.merge(item_groups, on="item")
+        nov = Novelty().evaluate(RecommendationLists.from_frame(top_n))
+        self.assertAlmostEqual(
+            nov, self.novelty(top_n["group"].to_numpy(float)), delta=1e-5
+        )
+
+    def test_novelty_n_jobs(self) -> None:
+        top_n = second_example.merge(item_groups, on="item")
+        nov = Novelty().evaluate(RecommendationLists.from_frame(top_n), n_jobs=2)
+        self.assertAlmostEqual(nov, Novelty().evaluate(top_n.copy()), delta=1e-9)
+
+    def test_novelty_shards(self) -> None:
+        top_n = second_example.merge(item_groups, on="item")
+        nov = sharded(Novelty().accumulator(), top_n, 4).finalize()
+        self.assertAlmostEqual(nov, Novelty().evaluate(top_n.copy()), delta=1e-9)
+
+    def test_novelty_chunks(self) -> None:
+        top_n = first_example.merge(item_pop_perc, on="item", how="left")
+        nov = Novelty().evaluate_chunks(
+            chunked(top_n, 7), popularity_definition="percentage"
+        )
+        self.assertAlmostEqual(
+            nov, self.novelty(top_n["percentage"].to_numpy()), delta=1e-5
+        )
+
+    def test_novelty_unmodified(self) -> None:
+        top_n = first_example.merge(item_groups, on="item")
+        copy = top_n.copy()
+        Novelty().evaluate(top_n)
+        pd.testing.assert_frame_equal(top_n, copy)
+
+    def test_novelty_popularity(self) -> None:
+        top_n = first_example.merge(item_pop_perc, on="item")
+        expected = Novelty().evaluate(top_n, popularity_definition="percentage")
+        for recommendations in (
+            first_example,
+            RecommendationLists.from_frame(first_example),
+        ):
+            nov = Novelty().evaluate(
+                recommendations, "percentage", popularity=item_pop_perc
+            )
+            self.assertAlmostEqual(nov, expected, delta=1e-9)
+        nov = Novelty().evaluate_chunks(
+            chunked(first_example, 7), "percentage", popularity=item_pop_perc
+        )
+        self.assertAlmostEqual(nov, expected, delta=1e-9)
+        nov = Novelty().evaluate(
+            first_example, "percentage", n_jobs=2, popularity=item_pop_perc
+        )
+        self.assertAlmostEqual(nov, expected, delta=1e-9)
+
+    def test_novelty_popularity_missing_items(self) -> None:
+        popularity = item_pop_perc[~item_pop_perc["item"].isin(["3", "6"])]
+        expected = Novelty().evaluate(
+            first_example.merge(popularity, on="item"), "percentage"
+        )
+        nov = Novelty().evaluate(
+            RecommendationLists.from_frame(first_example),
+            "percentage",
+            popularity=popularity,
+        )
+        self.assertAlmostEqual(nov, expected, delta=1e-9)
+
+    def test_novelty_popularity_arrays(self) -> None:
+        # Item '3' has no interactions: it is ignored with every form of the popularity.
+        dataset = first_example[first_example["item"] != "3"]
+        lists = RecommendationLists.from_frame(first_example)
+        vocabulary = lists.vocabularies["item"]
+        expected = Novelty().evaluate(
+            first_example,
+            "percentage",
+            popularity=PopularityPercentage.segment(dataset),
+        )
+        arrays = PopularityPercentage.popularity(
+            dataset, vocabulary=vocabulary, log=True
+        )
+        for popularity in (
+            (vocabulary, arrays),
+            (vocabulary, arrays["percentage"]),
+            (Vocabulary(vocabulary.ids), arrays),
+        ):
+            for recommendations in (first_example, lists):
+                nov = Novelty().evaluate(
+                    recommendations, "percentage", popularity=popularity
+                )
+                self.assertAlmostEqual(nov, expected, delta=1e-6)
+            nov = Novelty().evaluate_chunks(
+                chunked(first_example, 7), "percentage", popularity=popularity
+            )
+            self.assertAlmostEqual(nov, expected, delta=1e-6)
+        self.assertRaises(
+            ColumnsNotExistException,
+            Novelty().evaluate,
+            lists,
+            "group",
+            popularity=(vocabulary, arrays),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from recsyslearn.accuracy.metrics import NDCG
+from recsyslearn.dataset.containers import RecommendationLists, RelevanceIndex
+from recsyslearn.dataset.utils import find_relevant_items, top_k_lists
+from tests.utils import item_groups, pos_items, rel_matrix_4, second_example, top_n_1
+
+
+class RecommendationListsTest(unittest.TestCase):
+
+    """
+    Tester for the RecommendationLists class.
+    """
+
+    def test_from_frame(self) -> None:
+        top_n = second_example.merge(item_groups, on="item")
+        lists = RecommendationLists.from_frame(top_n)
+        self.assertEqual(lists.n_lists, 6)
+        self.assertEqual(len(lists), len(top_n))
+        self.assertListEqual(lists.offsets.tolist(), [0, 6, 12, 18, 24, 30, 36])
+        self.assertTrue(np.all(np.diff(lists.ranks[:6]) > 0))
+        assert_frame_equal(
+            lists.to_frame(),
+            top_n.sort_values(["user", "rank"]).reset_index(drop=True),
+        )
+
+    def test_top_k_lists(self) -> None:
+        scores = np.array([[0.1, 0.9, 0.5, 0.3], [0.8, 0.2, 0.6, 0.7]])
+
+        class Sparse:
+            shape = scores.shape
+
+            def __getitem__(self, rows):
+                return self
+
+            def toarray(self):
+                return scores
+
+        for matrix in (scores, Sparse()):
+            (lists,) = top_k_lists(matrix, 3, users=["b", "a"], items=list("wxyz"))
+            self.assertListEqual(
+                lists.vocabularies["user"].decode(lists.users).tolist(), ["b", "a"]
+            )
+            assert_frame_equal(
+                lists.to_frame(),
+                pd.DataFrame(
+                    {
+                        "user": list("bbbaaa"),
+                        "item": list("xyzwzy"),
+                        "rank": [1, 2, 3, 1, 2, 3],
+                    }
+                ),
+            )
+
+        exclude = pd.DataFrame({"user": ["a", "b", "c"], "item": ["w", "x", "x"]})
+        lists = list(
+            top_k_lists(scores, 2, ["b", "a"], list("wxyz"), exclude, batch_size=1)
+        )
+        self.assertListEqual(
+            [top_n.to_frame()["item"].tolist() for top_n in lists],
+            [["y", "z"], ["z", "y"]],
+        )
+
+        # Excluded items are never recommended, even to users with fewer than k items left.
+        scores = np.arange(12.0).reshape(3, 4)
+        exclude = pd.DataFrame(
+            {"user": [0, 0, 0, 2, 2, 2, 2], "item": [0, 1, 2, 0, 1, 2, 3]}
+        )
+        (lists,) = top_k_lists(scores, 3, exclude=exclude)
+        assert_frame_equal(
+            lists.to_frame(),
+            pd.DataFrame(
+                {"user": [0, 1, 1, 1], "item": [3, 3, 2, 1], "rank": [1, 1, 2, 3]}
+            ),
+        )
+
+    def test_padded(self) -> None:
+        lists = RecommendationLists.from_frame(second_example)
+        padded = lists.padded(8)
+        self.assertEqual(padded.shape, (6, 8))
+        self.assertTrue(np.all(padded[:, 6:] == -1))
+        self.assertListEqual(
+            lists.vocabularies["item"].decode(padded[0, :6]).tolist(),
+            ["1", "9", "4", "5", "8", "3"],
+        )
+
+
+class RelevanceIndexTest(unittest.TestCase):
+
+    """
+    Tester for the RelevanceIndex class.
+    """
+
+    def setUp(self) -> None:
+        self.index = find_relevant_items(rel_matrix_4, as_index=True)
+        self.users = self.index.vocabularies["user"]
+        self.items = self.index.vocabularies["item"]
+
+    def test_layout(self) -> None:
+        self.assertEqual(len(self.index), len(rel_matrix_4))
+        self.assertListEqual(
+            self.index.n_relevant(self.users.encode(["1", "3", "6"])).tolist(),
+            [2, 6, 1],
+        )
+        for start, end in zip(self.index.offsets[:-1], self.index.offsets[1:]):
+            self.assertTrue(np.all(np.diff(self.index.items[start:end]) > 0))
+
+    def test_contains(self) -> None:
+        users = self.users.encode(["1", "1", "3", "6", "6"])
+        items = self.items.encode(["2", "3", "9", "9", "1"])
+        self.assertListEqual(
+            self.index.contains(users, items).tolist(),
+            [True, False, True, True, False],
+        )
+
+    def test_contains_broadcast(self) -> None:
+        users = self.users.encode(["1", "4"])[:, None]
+        items = self.items.encode(["2", "9", "8"])[None, :]
+        self.assertListEqual(
+            self.index.contains(users, items).tolist(),
+            [[True, True, False], [True, True, True]],
+        )
+
+    def test_positions(self) -> None:
+        rng = np.random.default_rng(0)
+        users = rng.integers(0, 50, 500).astype(np.int32)
+        items = rng.integers(0, 80, 500).astype(np.int32)
+        index = RelevanceIndex.from_codes(users, items, {})
+        entries = set(zip(users.tolist(), items.tolist()))
+        query_users = rng.integers(-1, 60, (40, 1)).astype(np.int32)
+        query_items = rng.integers(-1, 90, (40, 30)).astype(np.int32)
+        positions = index.positions(query_users, query_items)
+        for (row, col), position in np.ndenumerate(positions):
+            user, item = query_users[row, 0], query_items[row, col]
+            self.assertEqual(position >= 0, (user, item) in entries)
+            if position >= 0:
+                self.assertEqual(index.items[position], item)
+                self.assertEqual(
+                    index.users[np.searchsorted(index.offsets, position, "right") - 1],
+                    user,
+                )
+
+    def test_keyword_arguments(self) -> None:
+        with self.assertRaises(TypeError):
+            find_relevant_items(rel_matrix_4, None, True)
+
+    def test_top_relevance(self) -> None:
+        graded = rel_matrix_4.assign(rating=np.arange(len(rel_matrix_4)) % 4 + 1.0)
+        index = RelevanceIndex.from_frame(graded, "rating")
+        users = index.vocabularies["user"].encode(["3", "1", "6"])
+        for _ in range(2):
+            matrix = index.top_relevance(users, 3)
+            for user, row in zip(["3", "1", "6"], matrix.tolist()):
+                expected = sorted(graded.loc[graded["user"] == user, "rating"])[::-1]
+                self.assertListEqual(row, (expected + [0.0] * 3)[:3])
+
+    def test_ndcg(self) -> None:
+        assert_frame_equal(
+            NDCG().evaluate(top_n_1, self.index, (2, 5)),
+            NDCG().evaluate(top_n_1, pos_items, (2, 5)),
+        )
+        lists = RecommendationLists.from_frame(top_n_1)
+        assert_frame_equal(
+            NDCG().evaluate(lists, self.index, (2, 5)),
+            NDCG().evaluate(top_n_1, pos_items, (2, 5)),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,9 +2,14 @@ import unittest
 
 from recsyslearn.errors.errors import (
     ColumnsNotExistException,
+    IncompatibleAccumulatorsException,
+    InvalidDiscountException,
+    InvalidParameterException,
     InvalidValueException,
+    MetricNotTrackedException,
     RecListTooShortException,
     SegmentationNotSupportedException,
+    TargetGroupsNotFoundException,
     WrongProportionsException,
 )
 
@@ -21,6 +26,11 @@ class ErrorTest(unittest.TestCase):
         RecListTooShortException(10)
         ColumnsNotExistException(["A", "B", "C"])
         InvalidValueException(-1)
+        InvalidDiscountException("dcg")
+        MetricNotTrackedException("KullbackLeibler")
+        TargetGroupsNotFoundException(2)
+        IncompatibleAccumulatorsException("")
+        InvalidParameterException("n_jobs", 0, "a positive integer or -1")
 
 
 if __name__ == "__main__":
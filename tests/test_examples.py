@@ -0,0 +1,44 @@
+import contextlib
+import io
+import json
+import os
+import runpy
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ExamplesTest(unittest.TestCase):
+    """
+    Run the scripts of the examples folder, which read their assets from the repository root.
+    """
+
+    def run_example(self, name: str) -> dict:
+        cwd = os.getcwd()
+        output = io.StringIO()
+        try:
+            os.chdir(ROOT)
+            with contextlib.redirect_stdout(output):
+                runpy.run_path(os.path.join("examples", f"{name}.py"))
+        finally:
+            os.chdir(cwd)
+        return json.loads(output.getvalue())
+
+    def test_accuracy_evaluation(self) -> None:
+        self.assertSetEqual(
+            set(self.run_example("accuracy_evaluation")), {"NDCG@5", "NDCG@10"}
+        )
+
+    def test_beyond_accuracy_evaluation(self) -> None:
+        results = self.run_example("beyond_accuracy_evaluation")
+        self.assertAlmostEqual(results["coverage"], 0.38200238379022644)
+        self.assertAlmostEqual(results["Novelty"], -0.028207847295864265)
+
+    def test_fairness_evaluation(self) -> None:
+        results = self.run_example("fairness_evaluation")
+        self.assertAlmostEqual(results["KL@[0.5, 0.5]"], 0.8332119607667662)
+        self.assertGreater(results["Users MI"], 0)
+
+    def test_segmentations(self) -> None:
+        results = self.run_example("segmentations")
+        self.assertDictEqual(results["item_groups"], {"1": "1004", "2": "2352"})
@@ -1,13 +1,26 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 
-from recsyslearn.fairness.metrics import Entropy, KullbackLeibler, MutualInformation
+from recsyslearn.dataset.containers import RecommendationLists
+from recsyslearn.errors.errors import TargetGroupsNotFoundException
+from recsyslearn.fairness.metrics import (
+    Entropy,
+    FairnessBySegmentation,
+    FairnessMetrics,
+    KullbackLeibler,
+    MutualInformation,
+)
+from recsyslearn.fairness.utils import exp_matrix
 from tests.utils import (
+    chunked,
     first_example,
     item_groups,
     rel_matrix_1,
+    rel_matrix_3,
     second_example,
+    sharded,
     user_groups,
 )
 
@@ -23,6 +36,32 @@ class EntropyTest(unittest.TestCase):
         entropy = Entropy().evaluate(top_n)
         self.assertAlmostEqual(entropy, 1.48547, delta=1e-5)
 
+    def test_lists(self) -> None:
+        top_n = RecommendationLists.from_frame(first_example.merge(item_groups))
+        entropy = Entropy().evaluate(top_n)
+        self.assertAlmostEqual(entropy, 1.48547, delta=1e-5)
+
+    def test_chunks(self) -> None:
+        top_n = first_example.merge(item_groups, how="left")
+        entropy = Entropy().evaluate_chunks(chunked(top_n, 7))
+        self.assertAlmostEqual(entropy, 1.48547, delta=1e-5)
+
+        top_n = second_example.merge(user_groups, how="left")
+        rel_matrix = rel_matrix_1.merge(user_groups, on="user")
+        entropy = Entropy().evaluate_chunks(chunked(top_n, 4), rel_matrix)
+        expected = Entropy().evaluate(top_n.copy(), rel_matrix)
+        self.assertAlmostEqual(entropy, expected, delta=1e-9)
+
+    def test_shards(self) -> None:
+        top_n = first_example.merge(item_groups, on="item")
+        entropy = sharded(Entropy().accumulator(), top_n, 3).finalize()
+        self.assertAlmostEqual(entropy, 1.48547, delta=1e-5)
+
+    def test_n_jobs(self) -> None:
+        top_n = first_example.merge(item_groups, on="item")
+        entropy = Entropy().evaluate(top_n, n_jobs=2)
+        self.assertAlmostEqual(entropy, 1.48547, delta=1e-5)
+
 
 class KullbackLeiblerTest(unittest.TestCase):
     def test_user_effectiveness(self) -> None:
@@ -45,6 +84,140 @@ class KullbackLeiblerTest(unittest.TestCase):
         divergence = KullbackLeibler().evaluate(top_n, target_representation)
         self.assertAlmostEqual(divergence, 0, delta=1e-5)
 
+    def test_lists(self) -> None:
+        top_n = RecommendationLists.from_frame(second_example.merge(user_groups))
+        rel_matrix = rel_matrix_1.merge(user_groups, on="user")
+        target_representation = pd.DataFrame(
+            [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+        )
+        divergence = KullbackLeibler().evaluate(
+            top_n, target_representation, rel_matrix
+        )
+        self.assertAlmostEqual(divergence, 0.08530, delta=1e-5)
+
+    def test_chunks(self) -> None:
+        top_n = second_example.merge(user_groups, how="left")
+        rel_matrix = rel_matrix_1.merge(user_groups, on="user")
+        target_representation = pd.DataFrame(
+            [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+        )
+        divergence = KullbackLeibler().evaluate_chunks(
+            chunked(top_n, 4), target_representation, rel_matrix
+        )
+        self.assertAlmostEqual(divergence, 0.08530, delta=1e-5)
+
+    def test_shards(self) -> None:
+        top_n = second_example.merge(user_groups, on="user")
+        rel_matrix = rel_matrix_1.merge(user_groups, on="user")
+        target_representation = pd.DataFrame(
+            [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+        )
+        accumulator = KullbackLeibler().accumulator(target_representation, rel_matrix)
+        divergence = sharded(accumulator, top_n, 2).finalize()
+        self.assertAlmostEqual(divergence, 0.08530, delta=1e-5)
+
+    def test_n_jobs(self) -> None:
+        top_n = second_example.merge(user_groups, on="user")
+        rel_matrix = rel_matrix_1.merge(user_groups, on="user")
+        target_representation = pd.DataFrame(
+            [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+        )
+        divergence = KullbackLeibler().evaluate(
+            top_n, target_representation, rel_matrix, n_jobs=3
+        )
+        self.assertAlmostEqual(divergence, 0.08530, delta=1e-5)
+
+    def test_many_groups(self) -> None:
+        rng = np.random.default_rng(0)
+        providers = pd.DataFrame(
+            {"item": np.arange(5000), "group": rng.integers(0, 2000, 5000)}
+        )
+        top_n = pd.DataFrame(
+            {
+                "user": np.repeat(np.arange(300), 10),
+                "item": rng.integers(0, 5000, 3000),
+                "rank": np.tile(np.arange(1, 11), 300),
+            }
+        ).merge(providers)
+        # Half of the targets belong to providers which are never recommended.
+        target_representation = pd.DataFrame(
+            {"group": np.arange(4000), "target_representation": 1 / 4000}
+        )
+        exposure = exp_matrix(top_n)
+        exposure = exposure.groupby("group")["rank"].sum() / exposure["rank"].sum()
+        expected = np.sum(exposure * np.log2(exposure * 4000))
+
+        divergence = KullbackLeibler().evaluate(top_n, target_representation)
+        self.assertAlmostEqual(divergence, expected, delta=1e-9)
+        divergence = KullbackLeibler().evaluate(
+            RecommendationLists.from_frame(top_n), target_representation
+        )
+        self.assertAlmostEqual(divergence, expected, delta=1e-9)
+        metrics = FairnessBySegmentation().evaluate(
+            top_n[["user", "item", "rank"]],
+            {"providers": providers},
+            {"providers": target_representation},
+        )
+        self.assertAlmostEqual(
+            metrics.loc["providers", "KullbackLeibler"], expected, delta=1e-9
+        )
+
+    def test_entities(self) -> None:
+        top_n = second_example.merge(item_groups)
+        rel_matrix = rel_matrix_1.merge(item_groups)
+        target_representation = pd.DataFrame(
+            [["1", 0.2], ["2", 0.3], ["3", 0.5]],
+            columns=["group", "target_representation"],
+        )
+        for rel in (None, rel_matrix):
+            divergences = KullbackLeibler().evaluate_entities(
+                top_n, target_representation, rel_matrix=rel
+            )
+            self.assertListEqual(divergences.index.tolist(), list("123456"))
+            for user, divergence in divergences.items():
+                if np.isnan(divergence):
+                    # No recommendation of the user is relevant.
+                    self.assertIsNotNone(rel)
+                    continue
+                expected = KullbackLeibler().evaluate(
+                    top_n[top_n["user"] == user], target_representation, rel
+                )
+                self.assertAlmostEqual(divergence, expected, delta=1e-9)
+
+    def test_target_groups_not_found(self) -> None:
+        top_n = first_example.merge(user_groups).astype({"group": int})
+        target_representation = pd.DataFrame(
+            [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+        )
+        with self.assertRaises(TargetGroupsNotFoundException):
+            KullbackLeibler().evaluate(top_n, target_representation)
+        with self.assertRaises(TargetGroupsNotFoundException):
+            KullbackLeibler().evaluate_chunks(chunked(top_n, 7), target_representation)
+        with self.assertRaises(TargetGroupsNotFoundException):
+            KullbackLeibler().evaluate_entities(top_n, target_representation)
+
+    def test_untargeted_groups(self) -> None:
+        top_n = first_example.merge(user_groups)
+        target_representation = pd.DataFrame(
+            [["1", 1.0]], columns=["group", "target_representation"]
+        )
+        with self.assertWarns(UserWarning):
+            KullbackLeibler().evaluate(top_n, target_representation)
+
+    def test_group_exposure(self) -> None:
+        top_n = RecommendationLists.from_frame(first_example.merge(item_groups))
+        exposure = KullbackLeibler().group_exposure(top_n, "item")
+        self.assertListEqual(exposure.columns.tolist(), ["item", "group", "exposure"])
+        self.assertTrue(np.allclose(exposure["exposure"], 1))
+        exposure = KullbackLeibler().group_exposure(top_n)
+        self.assertTrue(np.allclose(exposure.groupby("user")["exposure"].sum(), 1))
+        user = exposure[exposure["user"] == "1"].set_index("group")["exposure"]
+        expected = exp_matrix(first_example.merge(item_groups))
+        expected = expected[expected["user"] == "1"].groupby("group")["rank"].sum()
+        pd.testing.assert_series_equal(
+            user, expected / expected.sum(), check_names=False
+        )
+
 
 class MutualInformationTest(unittest.TestCase):
     def test_user_exposure(self) -> None:
@@ -57,6 +230,65 @@ class MutualInformationTest(unittest.TestCase):
         mi = MutualInformation().evaluate(top_n, "item")
         self.assertAlmostEqual(mi, 0.10570, delta=1e-5)
 
+    def test_item_effectiveness(self) -> None:
+        top_n = second_example.merge(item_groups, on="item")
+        rel_matrix = rel_matrix_3.merge(item_groups, on="item")
+        mi = MutualInformation().evaluate(top_n.copy(), "item", rel_matrix)
+        expected = MutualInformation().evaluate(
+            RecommendationLists.from_frame(top_n), "item", rel_matrix
+        )
+        self.assertGreater(mi, 0)
+        self.assertAlmostEqual(mi, expected, delta=1e-9)
+
+    def test_lists(self) -> None:
+        for groups, flag, expected in (
+            (user_groups, "user", 0.25582),
+            (item_groups, "item", 0.10570),
+        ):
+            top_n = RecommendationLists.from_frame(first_example.merge(groups))
+            mi = MutualInformation().evaluate(top_n, flag)
+            self.assertAlmostEqual(mi, expected, delta=1e-5)
+
+    def test_chunks(self) -> None:
+        for groups, flag, expected in (
+            (user_groups, "user", 0.25582),
+            (item_groups, "item", 0.10570),
+        ):
+            top_n = first_example.merge(groups, how="left")
+            mi = MutualInformation().evaluate_chunks(chunked(top_n, 7), flag)
+            self.assertAlmostEqual(mi, expected, delta=1e-5)
+
+    def test_many_chunks(self) -> None:
+        # More cells than the buffer of the accumulator, which is compacted along the way.
+        rng = np.random.default_rng(0)
+        top_n = pd.DataFrame(
+            {
+                "user": np.repeat(np.arange(20000), 10),
+                "item": rng.integers(0, 50000, 200000),
+                "rank": np.tile(np.arange(1, 11), 20000),
+                "group": np.repeat(np.arange(20000) % 5, 10),
+            }
+        )
+        self.assertAlmostEqual(
+            MutualInformation().evaluate_chunks(chunked(top_n, 5000), "user"),
+            MutualInformation().evaluate(top_n, "user"),
+            delta=1e-9,
+        )
+
+    def test_shards(self) -> None:
+        for groups, flag, expected in (
+            (user_groups, "user", 0.25582),
+            (item_groups, "item", 0.10570),
+        ):
+            top_n = first_example.merge(groups)
+            mi = sharded(MutualInformation().accumulator(flag), top_n, 3).finalize()
+            self.assertAlmostEqual(mi, expected, delta=1e-5)
+
+    def test_n_jobs(self) -> None:
+        top_n = first_example.merge(item_groups, on="item")
+        mi = MutualInformation().evaluate(top_n, "item", n_jobs=2)
+        self.assertAlmostEqual(mi, 0.10570, delta=1e-5)
+
     def test_flag_not_valid(self) -> None:
         with self.assertRaises(KeyError) as context:
             top_n = first_example.merge(item_groups, on="item")
@@ -65,5 +297,185 @@ class MutualInformationTest(unittest.TestCase):
         self.assertTrue("[None] not in index" in str(context.exception))
 
 
+class DiscountTest(unittest.TestCase):
+    def test_discounts(self) -> None:
+        top_n = second_example.merge(item_groups, on="item")
+        target_representation = pd.DataFrame(
+            [["1", 0.2], ["2", 0.3], ["3", 0.5]],
+            columns=["group", "target_representation"],
+        )
+        for discount in ("log", "rbp", "cascade", "uniform"):
+            metric = KullbackLeibler(discount, persistence=0.8)
+            divergence = metric.evaluate(top_n, target_representation)
+            lists_divergence = metric.evaluate(
+                RecommendationLists.from_frame(top_n), target_representation
+            )
+            self.assertAlmostEqual(divergence, lists_divergence, delta=1e-9)
+            mi = MutualInformation(discount, persistence=0.8).evaluate(top_n, "item")
+            metrics = FairnessMetrics(discount, persistence=0.8).evaluate(
+                top_n, "item", target_representation
+            )
+            self.assertAlmostEqual(metrics["KullbackLeibler"], divergence, delta=1e-9)
+            self.assertAlmostEqual(metrics["MutualInformation"], mi, delta=1e-9)
+
+        uniform = KullbackLeibler("uniform").evaluate(top_n, target_representation)
+        self.assertNotAlmostEqual(
+            uniform, KullbackLeibler().evaluate(top_n, target_representation)
+        )
+
+
+class FairnessMetricsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.target_representation = pd.DataFrame(
+            [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+        )
+
+    def test_user_exposure(self) -> None:
+        top_n = first_example.merge(user_groups, on="user")
+        metrics = FairnessMetrics().evaluate(top_n, "user", self.target_representation)
+        self.assertListEqual(
+            metrics.index.tolist(), ["Entropy", "KullbackLeibler", "MutualInformation"]
+        )
+        self.assertAlmostEqual(metrics["Entropy"], 0.91830, delta=1e-5)
+        self.assertAlmostEqual(metrics["MutualInformation"], 0.25582, delta=1e-5)
+        self.assertAlmostEqual(
+            metrics["KullbackLeibler"],
+            KullbackLeibler().evaluate(top_n.copy(), self.target_representation),
+            delta=1e-9,
+        )
+
+    def test_user_effectiveness(self) -> None:
+        top_n = second_example.merge(user_groups, on="user")
+        rel_matrix = rel_matrix_1.merge(user_groups, on="user")
+        metrics = FairnessMetrics().evaluate(
+            RecommendationLists.from_frame(top_n),
+            "user",
+            self.target_representation,
+            rel_matrix,
+        )
+        self.assertAlmostEqual(metrics["KullbackLeibler"], 0.08530, delta=1e-5)
+        self.assertAlmostEqual(
+            metrics["Entropy"],
+            Entropy().evaluate(RecommendationLists.from_frame(top_n), rel_matrix),
+            delta=1e-9,
+        )
+        self.assertAlmostEqual(
+            metrics["MutualInformation"],
+            MutualInformation().evaluate(
+                RecommendationLists.from_frame(top_n), "user", rel_matrix
+            ),
+            delta=1e-9,
+        )
+
+    def test_item_exposure_chunks(self) -> None:
+        top_n = first_example.merge(item_groups, how="left")
+        metrics = FairnessMetrics().evaluate_chunks(chunked(top_n, 7), "item")
+        self.assertListEqual(metrics.index.tolist(), ["Entropy", "MutualInformation"])
+        self.assertAlmostEqual(metrics["Entropy"], 1.48547, delta=1e-5)
+        self.assertAlmostEqual(metrics["MutualInformation"], 0.10570, delta=1e-5)
+
+
+class FairnessBySegmentationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.segmentations = {"users": user_groups, "items": item_groups}
+        self.target_representations = {
+            "users": pd.DataFrame(
+                [["1", 0.5], ["2", 0.5]], columns=["group", "target_representation"]
+            )
+        }
+
+    def assertMatchesFairnessMetrics(
+        self,
+        metrics: pd.DataFrame,
+        top_n: pd.DataFrame,
+        rel_matrix: pd.DataFrame = None,
+        discount: str = "log",
+    ) -> None:
+        for name, flag in (("users", "user"), ("items", "item")):
+            segmentation = self.segmentations[name]
+            expected = FairnessMetrics(discount).evaluate(
+                top_n.merge(segmentation),
+                flag,
+                self.target_representations.get(name),
+                None if rel_matrix is None else rel_matrix.merge(segmentation),
+            )
+            for metric, value in expected.items():
+                self.assertAlmostEqual(metrics.loc[name, metric], value, delta=1e-9)
+
+    def test_exposure(self) -> None:
+        metrics = FairnessBySegmentation().evaluate(
+            first_example, self.segmentations, self.target_representations
+        )
+        self.assertListEqual(metrics.index.tolist(), ["users", "items"])
+        self.assertListEqual(
+            metrics.columns.tolist(),
+            ["Entropy", "KullbackLeibler", "MutualInformation"],
+        )
+        self.assertTrue(pd.isna(metrics.loc["items", "KullbackLeibler"]))
+        self.assertAlmostEqual(metrics.loc["users", "Entropy"], 0.91830, delta=1e-5)
+        self.assertAlmostEqual(metrics.loc["items", "Entropy"], 1.48547, delta=1e-5)
+        self.assertMatchesFairnessMetrics(metrics, first_example)
+
+    def test_effectiveness(self) -> None:
+        metrics = FairnessBySegmentation(discount="rbp").evaluate(
+            RecommendationLists.from_frame(second_example),
+            self.segmentations,
+            self.target_representations,
+            rel_matrix_1,
+        )
+        self.assertMatchesFairnessMetrics(metrics, second_example, rel_matrix_1, "rbp")
+
+    def test_group_matrix(self) -> None:
+        groups = item_groups.assign(parity=item_groups["item"].astype(int) % 2)
+        metrics = FairnessBySegmentation().evaluate(
+            first_example, groups.rename(columns={"group": "popularity"})
+        )
+        self.assertListEqual(metrics.index.tolist(), ["popularity", "parity"])
+        self.assertAlmostEqual(
+            metrics.loc["popularity", "Entropy"], 1.48547, delta=1e-5
+        )
+        parity = FairnessMetrics().evaluate(
+            first_example.merge(groups[["item", "parity"]]).rename(
+                columns={"parity": "group"}
+            ),
+            "item",
+        )
+        self.assertAlmostEqual(
+            metrics.loc["parity", "MutualInformation"],
+            parity["MutualInformation"],
+            delta=1e-9,
+        )
+
+    def test_unsegmented_entities(self) -> None:
+        segmentations = {"items": item_groups[item_groups["group"] != "3"]}
+        metrics = FairnessBySegmentation().evaluate(first_example, segmentations)
+        expected = FairnessMetrics().evaluate(
+            first_example.merge(segmentations["items"]), "item"
+        )
+        self.assertAlmostEqual(
+            metrics.loc["items", "Entropy"], expected["Entropy"], delta=1e-9
+        )
+
+    def test_chunks_and_shards(self) -> None:
+        evaluator = FairnessBySegmentation()
+        expected = evaluator.evaluate(
+            second_example, self.segmentations, self.target_representations
+        )
+        chunks = evaluator.evaluate_chunks(
+            chunked(second_example, 5), self.segmentations, self.target_representations
+        )
+        shards = sharded(
+            evaluator.accumulator(self.segmentations, self.target_representations),
+            second_example,
+            3,
+        ).finalize()
+        parallel = evaluator.evaluate(
+            second_example, self.segmentations, self.target_representations, n_jobs=2
+        )
+        pd.testing.assert_frame_equal(chunks, expected)
+        pd.testing.assert_frame_equal(shards, expected)
+        pd.testing.assert_frame_equal(parallel, expected)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from recsyslearn.errors.errors import (
+    InvalidGroupException,
+    MetricNotTrackedException,
+    TargetGroupsNotFoundException,
+)
+from recsyslearn.fairness.metrics import Entropy, KullbackLeibler, MutualInformation
+from recsyslearn.fairness.monitor import FairnessMonitor
+from recsyslearn.fairness.utils import exp_matrix
+from tests.utils import chunked, first_example, second_example, user_groups
+
+
+class FairnessMonitorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.target_representation = pd.DataFrame(
+            [["1", 0.3], ["2", 0.7]], columns=["group", "target_representation"]
+        )
+        self.log = pd.concat(
+            [first_example, second_example, first_example], ignore_index=True
+        ).merge(user_groups)
+        self.batches = chunked(self.log, 10)
+
+    def monitor(self, **kwargs) -> FairnessMonitor:
+        return FairnessMonitor(
+            flag="user", target_representation=self.target_representation, **kwargs
+        )
+
+    def assertMatchesMetrics(self, monitor: FairnessMonitor, window: list) -> None:
+        window = pd.concat(window)
+        self.assertAlmostEqual(
+            monitor.entropy(), Entropy().evaluate(exp_matrix(window)), delta=1e-9
+        )
+        self.assertAlmostEqual(
+            monitor.kullback_leibler(),
+            KullbackLeibler().evaluate(window, self.target_representation),
+            delta=1e-9,
+        )
+        self.assertAlmostEqual(
+            monitor.mutual_information(),
+            MutualInformation().evaluate(window, "user"),
+            delta=1e-9,
+        )
+
+    def test_every_batch(self) -> None:
+        monitor = self.monitor()
+        for batch in self.batches:
+            monitor.update(batch)
+        self.assertMatchesMetrics(monitor, self.batches)
+
+    def test_sliding_window(self) -> None:
+        monitor = self.monitor(window=3)
+        for i, batch in enumerate(self.batches):
+            monitor.update(batch)
+            self.assertMatchesMetrics(monitor, self.batches[max(0, i - 2) : i + 1])
+
+    def test_tumbling_window(self) -> None:
+        monitor = self.monitor(window=3, tumbling=True)
+        for i, batch in enumerate(self.batches):
+            monitor.update(batch)
+            self.assertMatchesMetrics(monitor, self.batches[i - i % 3 : i + 1])
+
+    def test_bounded_memory(self) -> None:
+        # New items in every batch, whose totals expire with the batch.
+        batches = [
+            batch.assign(item=batch["item"] + f"-{i}")
+            for i, batch in enumerate(self.batches * 20)
+        ]
+        monitor = self.monitor(window=3)
+        for i, batch in enumerate(batches):
+            monitor.update(batch)
+            self.assertLessEqual(
+                len(monitor.vocabularies["item"]), 2 * monitor.entities.n_live + 10
+            )
+        self.assertMatchesMetrics(monitor, batches[-3:])
+
+        monitor = self.monitor(window=3, tumbling=True)
+        for batch in batches:
+            monitor.update(batch)
+        self.assertLessEqual(len(monitor.vocabularies["cell"]), 30)
+
+    def test_metrics(self) -> None:
+        monitor = FairnessMonitor(window=2)
+        self.assertTrue(np.isnan(monitor.entropy()))
+        metrics = monitor.update(self.batches[0]).metrics()
+        self.assertListEqual(metrics.index.tolist(), ["Entropy"])
+        with self.assertRaises(MetricNotTrackedException):
+            monitor.kullback_leibler()
+        with self.assertRaises(MetricNotTrackedException):
+            monitor.mutual_information()
+        with self.assertRaises(InvalidGroupException):
+            FairnessMonitor(flag="provider")
+
+    def test_target_groups_not_found(self) -> None:
+        monitor = self.monitor()
+        monitor.update(self.batches[0].astype({"group": int}))
+        with self.assertRaises(TargetGroupsNotFoundException):
+            monitor.kullback_leibler()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,16 +1,20 @@
 import unittest
 
 import numpy as np
+import pandas as pd
 from pandas.testing import assert_frame_equal
 
 from recsyslearn.dataset.segmentations import (
     ActivitySegmentation,
     DiscreteFeatureSegmentation,
+    IncrementalSegmentation,
     InteractionSegmentation,
     PopularityPercentage,
 )
+from recsyslearn.dataset.vocabulary import Vocabulary
 from recsyslearn.errors.errors import (
     InvalidGroupException,
+    InvalidParameterException,
     InvalidValueException,
     SegmentationNotSupportedException,
     WrongProportionsException,
@@ -64,9 +68,34 @@ class InteractionSegmentationTest(unittest.TestCase):
 
     def test_segmentation_not_supported(self) -> None:
         with self.assertRaises(SegmentationNotSupportedException):
-            InteractionSegmentation().segment(
-                dataset_item_example, [0.7, 0.1, 0.1, 0.1]
+            InteractionSegmentation().segment(dataset_item_example, [1 / 128] * 128)
+
+    def test_segmentation_many_groups(self) -> None:
+        dataset = pd.DataFrame(
+            {"item": np.repeat(np.arange(10), np.arange(10, 0, -1)), "user": 1}
+        )
+        segmented_groups = InteractionSegmentation().segment(dataset, [0.2] * 5)
+        self.assertListEqual(
+            segmented_groups["group"].tolist(),
+            ["1", "2", "3", "4", "4", "5", "5", "5", "5", "5"],
+        )
+        vocabulary = Vocabulary(np.arange(12)[::-1])
+        codes = InteractionSegmentation().segment_codes(
+            dataset, [0.2] * 5, vocabulary=vocabulary
+        )
+        self.assertEqual(codes.dtype, np.int8)
+        self.assertListEqual(codes.tolist(), [-1, -1, 5, 5, 5, 5, 5, 4, 4, 3, 2, 1])
+
+    def test_segmentation_chunks(self) -> None:
+        chunks = [dataset_item_example.iloc[i : i + 2] for i in range(0, 5, 2)]
+        self.assertIsNone(
+            assert_frame_equal(
+                InteractionSegmentation().segment_chunks(chunks, [0.6, 0.3, 0.1]),
+                InteractionSegmentation().segment(
+                    dataset_item_example, [0.6, 0.3, 0.1]
+                ),
             )
+        )
 
     def test_segmentation_wrong_proportion(self) -> None:
         with self.assertRaises(WrongProportionsException):
@@ -106,6 +135,20 @@ class ItemPopularityPercentageTest(unittest.TestCase):
             .all()
         )
 
+    def test_popularity_codes(self) -> None:
+        vocabulary = Vocabulary(["4", "3", "2", "1"])
+        popularity = PopularityPercentage().popularity(
+            dataset_popularity, vocabulary=vocabulary, log=True, rank=True
+        )
+        self.assertEqual(popularity["percentage"].dtype, np.float32)
+        np.testing.assert_allclose(popularity["percentage"], [0.0, 0.1, 0.3, 0.6])
+        np.testing.assert_allclose(
+            popularity["log_percentage"],
+            [-np.inf, *np.log2([0.1, 0.3, 0.6])],
+            rtol=1e-6,
+        )
+        self.assertListEqual(popularity["rank"].tolist(), [4, 3, 2, 1])
+
 
 class UserPopularityPercentageTest(unittest.TestCase):
     """
@@ -164,15 +207,131 @@ class ActivitySegmentationTest(unittest.TestCase):
 
     def test_segmentation_not_supported(self) -> None:
         with self.assertRaises(SegmentationNotSupportedException):
-            InteractionSegmentation().segment(
-                dataset_item_example, [0.7, 0.1, 0.1, 0.1]
+            ActivitySegmentation().segment(dataset_user_example, [1 / 128] * 128)
+
+    def test_segmentation_many_groups(self) -> None:
+        dataset = pd.DataFrame(
+            {"user": np.repeat(np.arange(10), np.arange(10, 0, -1)), "item": 1}
+        )
+        segmented_groups = ActivitySegmentation().segment(dataset, [0.2] * 5)
+        self.assertListEqual(segmented_groups["user"].tolist(), list(range(10)))
+        self.assertListEqual(
+            segmented_groups["group"].tolist(),
+            ["1", "1", "2", "2", "3", "3", "4", "4", "5", "5"],
+        )
+
+    def test_segmentation_seed(self) -> None:
+        dataset = pd.DataFrame({"user": np.arange(100) % 20, "item": 1})
+        segmented_groups = ActivitySegmentation().segment(dataset, [0.5, 0.5], seed=42)
+        shuffled = ActivitySegmentation().segment(
+            dataset.sample(frac=1, random_state=0), [0.5, 0.5], seed=42
+        )
+        self.assertIsNone(assert_frame_equal(segmented_groups, shuffled))
+        self.assertListEqual(
+            segmented_groups["group"].value_counts().sort_index().tolist(), [10, 10]
+        )
+
+    def test_segmentation_chunks(self) -> None:
+        dataset = pd.DataFrame(
+            {"user": np.arange(100) % 20 + np.arange(100) // 90, "item": 1}
+        )
+        chunks = [dataset.iloc[i : i + 7] for i in range(0, 100, 7)]
+        self.assertIsNone(
+            assert_frame_equal(
+                ActivitySegmentation().segment_chunks(chunks, [0.3, 0.7], seed=1),
+                ActivitySegmentation().segment(dataset, [0.3, 0.7], seed=1),
             )
+        )
 
     def test_segmentation_wrong_proportion(self) -> None:
         with self.assertRaises(WrongProportionsException):
             ActivitySegmentation().segment(dataset_user_example, [0.7, 0.4])
 
 
+class IncrementalSegmentationTest(unittest.TestCase):
+    """
+    Test for the IncrementalSegmentation class.
+    """
+
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.days = [
+            pd.DataFrame(
+                {
+                    "user": rng.integers(0, 30, 200).astype(str),
+                    "item": rng.zipf(1.5, 200).astype(str),
+                }
+            )
+            for _ in range(4)
+        ]
+
+    def test_interaction(self) -> None:
+        segmentation = IncrementalSegmentation()
+        for day in self.days:
+            segmentation.update(day)
+        self.assertIsNone(
+            assert_frame_equal(
+                segmentation.segment(),
+                InteractionSegmentation().segment(pd.concat(self.days)),
+            )
+        )
+
+    def test_window(self) -> None:
+        segmentation = IncrementalSegmentation(proportions=[0.5, 0.3, 0.2], window=2)
+        for day in self.days:
+            segmentation.update(day)
+        segmented_groups = segmentation.segment()
+        expected = InteractionSegmentation().segment(
+            pd.concat(self.days[-2:]), [0.5, 0.3, 0.2]
+        )
+        # Ties are ordered by first appearance, which may be in an expired day.
+        self.assertListEqual(
+            segmented_groups["group"].tolist(), expected["group"].tolist()
+        )
+        self.assertSetEqual(set(segmented_groups["item"]), set(expected["item"]))
+
+    def test_decay(self) -> None:
+        segmentation = IncrementalSegmentation(decay=0.5)
+        segmentation.update(pd.DataFrame({"item": ["1"] * 4 + ["2"], "user": "1"}))
+        segmentation.update(pd.DataFrame({"item": ["2"] * 3, "user": "1"}))
+        self.assertListEqual(segmentation.counts.tolist(), [2.0, 3.5])
+        self.assertListEqual(segmentation.segment()["item"].tolist(), ["2", "1"])
+
+    def test_activity(self) -> None:
+        segmentation = IncrementalSegmentation("activity", [0.2, 0.8], seed=0)
+        for day in self.days:
+            segmentation.update(day)
+        segmented_groups = segmentation.segment()
+        self.assertListEqual(
+            segmented_groups["group"].value_counts().sort_index().tolist(), [6, 24]
+        )
+        counts = pd.concat(self.days)["user"].value_counts()
+        self.assertGreaterEqual(
+            counts[
+                segmented_groups.loc[segmented_groups["group"] == "1", "user"]
+            ].min(),
+            counts[
+                segmented_groups.loc[segmented_groups["group"] == "2", "user"]
+            ].max(),
+        )
+
+    def test_method_not_supported(self) -> None:
+        with self.assertRaises(SegmentationNotSupportedException):
+            IncrementalSegmentation("popularity")
+
+    def test_invalid_decay(self) -> None:
+        for decay in (-1, 0, 1.5):
+            with self.assertRaises(InvalidParameterException):
+                IncrementalSegmentation(decay=decay)
+        IncrementalSegmentation(decay=1)
+
+    def test_invalid_window(self) -> None:
+        for window in (-1, 0):
+            with self.assertRaises(InvalidParameterException):
+                IncrementalSegmentation(window=window)
+        IncrementalSegmentation(window=1)
+
+
 class UserDiscreteFeatureSegmentationTest(unittest.TestCase):
     """
     Tester for the DiscreteFeatureSegmentation class, on user features.
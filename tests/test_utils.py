@@ -1,12 +1,21 @@
 import unittest
 
+import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
 
 from recsyslearn.errors.errors import ColumnsNotExistException
-from recsyslearn.fairness.utils import eff_matrix, exp_matrix, prob_matrix
-from recsyslearn.utils import check_columns_exist
+from recsyslearn.errors.errors import InvalidDiscountException
+from recsyslearn.fairness.utils import (
+    discount_table,
+    eff_matrix,
+    exp_matrix,
+    exposure,
+    prob_matrix,
+)
+from recsyslearn.utils import check_columns_exist, user_aligned
 from tests.utils import (
+    chunked,
     first_example,
     item_groups,
     rel_matrix_1,
@@ -112,6 +121,30 @@ class ExpMatrixTest(unittest.TestCase):
             rtol=1e-3,
         )
 
+    def test_exp_matrix_copy(self) -> None:
+        top_n = second_example.merge(user_groups, on=["user"])
+        original = top_n.copy()
+        result = exp_matrix(top_n, discount="rbp", persistence=0.8)
+        assert_frame_equal(top_n, original)
+        np.testing.assert_allclose(result["rank"], 0.8 ** (original["rank"] - 1))
+
+    def test_exposure_discounts(self) -> None:
+        ranks = np.array([1, 2, 3, 4])
+        for discount, expected in (
+            ("log", 1 / np.log2(ranks + 1)),
+            ("rbp", 0.5 ** (ranks - 1)),
+            ("cascade", 1 / ranks),
+            ("uniform", np.ones(4)),
+        ):
+            np.testing.assert_allclose(exposure(ranks, discount), expected)
+            np.testing.assert_allclose(
+                exposure(ranks.astype(float), discount), expected
+            )
+        self.assertIs(discount_table(8, "log", 0.5), discount_table(8, "log", 0.5))
+
+        with self.assertRaises(InvalidDiscountException):
+            exposure(ranks, "dcg")
+
 
 class ProbMatrixTest(unittest.TestCase):
 
@@ -273,6 +306,16 @@ class EffMatrixTest(unittest.TestCase):
             rtol=1e-3,
         )
 
+    def test_eff_matrix_rows(self) -> None:
+        top_n = second_example.merge(user_groups, on=["user"])
+        original = top_n.copy()
+        rel_matrix = rel_matrix_1.merge(user_groups, on=["user"])
+        result = eff_matrix(top_n, rel_matrix)
+        assert_frame_equal(top_n, original)
+        assert_frame_equal(
+            result[["user", "item", "group"]], original[["user", "item", "group"]]
+        )
+
 
 class SmallUtilsTest(unittest.TestCase):
     def test_columns_exist_one(self):
@@ -287,6 +330,17 @@ class SmallUtilsTest(unittest.TestCase):
             in str(context.exception)
         )
 
+    def test_user_aligned(self):
+        for size in (1, 3, 7, len(first_example)):
+            chunks = list(user_aligned(chunked(first_example, size)))
+            assert_frame_equal(pd.concat(chunks), first_example)
+            for chunk in chunks[1:]:
+                self.assertNotIn(chunk["user"].iloc[0], chunks[0]["user"].values)
+            self.assertEqual(
+                sum(chunk["user"].nunique() for chunk in chunks),
+                first_example["user"].nunique(),
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
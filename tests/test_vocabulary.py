@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from recsyslearn.accuracy.metrics import NDCG
+from recsyslearn.dataset.utils import find_relevant_items
+from recsyslearn.dataset.vocabulary import Interactions, Vocabulary
+from recsyslearn.fairness.metrics import Entropy
+from tests.utils import first_example, pos_items, rel_matrix_4, top_n_1, user_groups
+
+
+class VocabularyTest(unittest.TestCase):
+
+    """
+    Tester for the Vocabulary class.
+    """
+
+    def test_encode_decode(self) -> None:
+        vocabulary = Vocabulary.fit(["b", "a", "c", "a"])
+        codes = vocabulary.encode(["c", "a", "d"])
+        self.assertEqual(codes.dtype, np.int32)
+        self.assertListEqual(codes.tolist(), [2, 0, -1])
+        self.assertListEqual(vocabulary.decode([2, 0]).tolist(), ["c", "a"])
+
+    def test_update_preserves_codes(self) -> None:
+        vocabulary = Vocabulary.fit([10, 20])
+        codes = vocabulary.encode([30, 10, 30], update=True)
+        self.assertListEqual(codes.tolist(), [2, 0, 2])
+        self.assertEqual(len(vocabulary), 3)
+
+    def test_many_updates(self) -> None:
+        values = np.random.default_rng(0).integers(0, 1000, 5000)
+        vocabulary = Vocabulary()
+        codes = np.concatenate(
+            [
+                vocabulary.encode(chunk, update=True)
+                for chunk in np.array_split(values, 50)
+            ]
+        )
+        self.assertListEqual(vocabulary.ids.tolist(), pd.unique(values).tolist())
+        self.assertListEqual(vocabulary.decode(codes).tolist(), values.tolist())
+        self.assertListEqual(
+            vocabulary.copy().encode(values[::-1]).tolist(), codes[::-1].tolist()
+        )
+
+
+class InteractionsTest(unittest.TestCase):
+
+    """
+    Tester for the Interactions class.
+    """
+
+    def test_encoded_ndcg(self) -> None:
+        test = Interactions.from_frame(rel_matrix_4)
+        top_n = Interactions.from_frame(top_n_1, test.vocabularies)
+        self.assertEqual(top_n.frame["item"].dtype, np.int32)
+
+        ndcg_df = NDCG().evaluate(
+            top_n.frame, find_relevant_items(test.frame), ats=(2, 5)
+        )
+        assert_frame_equal(
+            top_n.decode(ndcg_df), NDCG().evaluate(top_n_1, pos_items, ats=(2, 5))
+        )
+
+    def test_encoded_entropy(self) -> None:
+        top_n = Interactions.from_frame(first_example.merge(user_groups, on="user"))
+        self.assertAlmostEqual(
+            Entropy().evaluate(top_n.frame),
+            Entropy().evaluate(first_example.merge(user_groups, on="user")),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
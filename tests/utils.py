@@ -1,3 +1,5 @@
+import pickle
+
 import numpy as np
 import pandas as pd
 
@@ -371,3 +373,27 @@ user_error_feature = pd.DataFrame(
 )
 
 pos_items = find_relevant_items(rel_matrix_4)
+
+
+def chunked(df: pd.DataFrame, size: int) -> list:
+    """
+    Split a DataFrame in chunks of size rows, as pd.read_csv(chunksize=size) would.
+    """
+
+    return [df.iloc[i : i + size] for i in range(0, len(df), size)]
+
+
+def sharded(accumulator, df: pd.DataFrame, n_shards: int):
+    """
+    Update a copy of the accumulator per shard of users, as separate workers would,
+    and merge the shards into the first one.
+    """
+
+    users = np.array_split(df["user"].unique(), n_shards)
+    shards = [
+        pickle.loads(pickle.dumps(accumulator)).update(df[df["user"].isin(part)])
+        for part in users
+    ]
+    for shard in shards[1:]:
+        shards[0].merge(pickle.loads(pickle.dumps(shard)))
+    return shards[0]